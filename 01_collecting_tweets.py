@@ -7,11 +7,21 @@ Created on Tue Nov 30 20:59:28 2021
 
 # Libraries
 import os
-import requests
+import sys
 import pandas as pd
 import datetime as dt
 from dotenv import load_dotenv
 from pre_processor import PreProcessor
+from instrumentation import start_run
+from collector import propagate_clean_tweets, Checkpoint, CsvSink, TWEET_COLUMNS, USER_COLUMNS, PLACE_COLUMNS
+from async_collector import AsyncTwitterClient, run_queries_async
+from translation import BatchTranslator, GoogleTranslator, TranslationCache
+from ingest_index import IngestIndex, clean_incremental
+from vocabulary import Vocabulary, encode_tokens
+from tweet_store import TweetStore
+from near_duplicates import NearDuplicateIndex
+from storage import (write_frame, ParquetSink, TWEETS_SCHEMA, CLEAN_TWEETS_SCHEMA, USERS_SCHEMA,
+                     PLACES_SCHEMA, TWEETS_PARTITIONS, USERS_PARTITIONS, PLACES_PARTITIONS)
 
 import warnings
 warnings.filterwarnings('ignore')
@@ -30,219 +40,139 @@ today = dt.datetime.today()
 today = today.strftime("%Y%m%d_%H_%M")
 
 
-def search_tweets(query, bearer_token = bearer_token, next_token = None):    
-    """
-    Function to request tweets according to a specific query.
-    
-    Inputs:
-        - query: A string that will be used to find tweets.
-                 Tweets must match this string to be returned.
-        - bearer_token: Security token from Twitter API.
-        - next_token: ID of the next page that matches the specified query.
-        
-    Outputs: Dictionary (json type) with the requested data.  
-    """
-    
-    headers = {"Authorization": "Bearer {}".format(bearer_token)}
-    
-    # end point
-    url = f"https://api.twitter.com/2/tweets/search/recent?query={query}&"
-
-    params = {
-        # select specific Tweet fields from each returned Tweet object
-        'tweet.fields': 'text,created_at,lang,possibly_sensitive', # public_metrics
-        
-        # maximum number of search results to be returned (10 - 100)
-        'max_results': 100,
-        
-        # additional data that relate to the originally returned Tweets
-        'expansions': 'author_id,referenced_tweets.id,geo.place_id',
-        
-        # select specific place fields 
-        "place.fields": 'country,full_name,name',
-        
-        # select specific user fields
-        "user.fields": 'location',
-        
-        # get the next page of results.
-        "next_token": next_token,
-    }
-    
-    # request
-    response = requests.get(url = url, params = params, headers = headers)
-
-    # verify successfull request
-    if response.status_code != 200:
-        raise Exception(response.status_code, response.text)
-        
-    else:
-        return response.json() 
-    
+# Record where the time goes in this run (wall time, rows/sec,
+# bytes fetched, cache hit rates and peak memory). Run the 
+# script with --profile to also wrap it in cProfile and 
+# tracemalloc.
+report = start_run(profile = "--profile" in sys.argv, trace_memory = "--profile" in sys.argv)
 
-def create_dataframes(json_tweets, today):
-    """
-    Function to create and organize different data into specific data frames.
-    
-    Inputs:
-        - json_tweets: A dictionary with tweets data.
-    
-    Outputs: 
-        - tweets: Pandas dataframe with relevant information about tweets (to
-                  further perform text classification).
-                  
-        - users: Pandas dataframe with users information.
-        
-        - places (optional): Pandas dataframe about places where users tweeted. If not a 
-                  single tweets contains the place where it was tweeted, then
-                  this dataframe will not be returned.
-    """
-        
-    # Create users dataframe
-    users = pd.json_normalize(json_tweets['includes']['users']).rename(columns = {"id":"user_id"})
-    
-    # Create df with tweet's data
-    tweets = pd.json_normalize(json_tweets['data']).rename(columns = {"id":"tweet_id", 
-                                                                      "geo.place_id":"geo_place_id"})
-        
-    # Get tweet's type
-    tweets['type'] = tweets.referenced_tweets.apply(lambda x: x[0]["type"] if type(x) == list else None)
-    
-    # get referenced tweets ids
-    tweets["ref_tweet_id"] = tweets.referenced_tweets.apply(lambda x: x[0]['id']\
-                                                            if isinstance(x, list) else x)
-
-        
-    # Drop retweeted tweets and tweets with undefined anguage
-    tweets = tweets[tweets["lang"] != "und"]
-        
-    # id to string
-    tweets["tweet_id"] = tweets["tweet_id"].astype(str)
-        
-    # id to string
-    users["user_id"] = users["user_id"].astype(str)
-        
-    # from string to datetime
-    tweets["created_at"] = pd.to_datetime(tweets["created_at"], utc = True)
-        
-    # Not all users enable their location when tweeting, so
-    # we need to check if there are available locations for
-    # the tweets returned.
-    if "places" in json_tweets['includes'].keys():
-
-        # If the field exists, create a dataframe with the corresponding data
-        places = pd.json_normalize(json_tweets['includes']['places']).rename(columns = {"id":"geo_place_id"})
-            
-        # Drop cols
-        tweets = tweets.drop(['referenced_tweets','edit_history_tweet_ids'], axis = 1)
-        return tweets, users, places
-        
-    else:
-        # Drop cols
-        tweets = tweets.drop(['referenced_tweets','edit_history_tweet_ids'], axis = 1)
-        return tweets, users
-    
-# search term
-query = "world cup"
-search_tweet = search_tweets(query = query)
+# search terms (all of them are collected at the same time)
+queries = ["world cup"]
 
+# If a previous collection of the same queries crashed,
+# continue from the last page stored of each query (and 
+# keep writing into the same files).
+checkpoint = Checkpoint("data/checkpoints/collection.json")
+state = checkpoint.load()
 
-# Check if we have tweet's location
-if "places" in search_tweet['includes'].keys():
-    main_tweets, main_users, main_places = create_dataframes(search_tweet, today)
+if state is not None and state.get("queries") == queries:
+    today = state["today"]
     
 else:
-    main_tweets, main_users = create_dataframes(search_tweet, today)
-    main_places = pd.DataFrame()
-
-for i in range(1, 41):
+    checkpoint.save(queries = queries, today = today)
+
+# date used to partition the stored data
+collection_date = dt.datetime.strptime(today, "%Y%m%d_%H_%M").strftime("%Y-%m-%d")
+
+# Every page is appended to staging csv files as soon as it
+# is collected, so memory does not grow with the number
+# of pages and a crashed run does not lose any page.
+tweets_sink = CsvSink(f"data/staging/tweets_{today}.csv", TWEET_COLUMNS + ["query"])
+users_sink = CsvSink(f"data/staging/users_{today}.csv", USER_COLUMNS)
+places_sink = CsvSink(f"data/staging/places_{today}.csv", PLACE_COLUMNS)
+
+# Tweets, users and places are also upserted into a local
+# SQLite store (indexed by ids and dates), so they can be 
+# joined later without loading and merging every file
+tweet_store = TweetStore("data/tweets.db")
+
+# Pages of every query are written into the same files
+# (tweets are tagged with their query)
+def handle_page(query, tweets, users, places):
+    print(query, tweets.shape[0])
     
-    # Check if there is a next token (another page)
-    # that matches the desired query
-    if 'next_token' in search_tweet['meta'].keys():
-        print(i, search_tweet["meta"]["next_token"])
-
-        # Collect data from next token
-        new_tweets = search_tweets(query = query, next_token = search_tweet['meta']['next_token'])
-        search_tweet = new_tweets
-
-        # Check if any tweet has enabled the location,
-        # so we can create the places dataframe.
-        if "places" in search_tweet['includes'].keys():
-            tweets, users, places = create_dataframes(search_tweet, today = today)
-
-            # Append data to main tweets
-            main_tweets = main_tweets.append(tweets)
-            main_users = main_users.append(users)
-            main_places = main_places.append(places)
-
-            # Reset index
-            main_tweets = main_tweets.reset_index(drop = True)
-            main_users = main_users.reset_index(drop = True)
-            main_places = main_places.reset_index(drop = True)
-
-        # If any tweet has its location enabled, then only
-        # create the other two dataframes.
-        else: 
-            tweets, users = create_dataframes(search_tweet, today = today)
-
-            # Append data to main tweets
-            main_tweets = main_tweets.append(tweets)
-            main_users = main_users.append(users)
-
-            # Reset index
-            main_tweets = main_tweets.reset_index(drop = True)
-            main_users = main_users.reset_index(drop = True)
-
-    # If there are not more results regarding the
-    # requested topic, then just stop requesting 
-    # more data.
-    else:
-        break
+    tweets_sink.write(tweets)
+    users_sink.write(users)
+    places_sink.write(places)
+    tweet_store.write(tweets, users, places, run_id = today, collection_date = collection_date)
 
-    
-print(f"\n{main_tweets.shape[0]} tweets collected so far")
-print(f"{main_users.shape[0]} users collected so far")
-print(f"{main_places.shape[0]} user's locations collected so far")
 
+# Queries are paginated concurrently under the same rate 
+# limit. Pages are decoded into column buffers and turned
+# into dataframes every 5 pages.
+pages = run_queries_async(queries, handle_page, client = AsyncTwitterClient(bearer_token),
+                          max_pages = 41, pages_per_batch = 5, checkpoint = checkpoint)
 
-# Store the data locally
-if main_places.empty:
-    main_tweets.to_csv(f"data/tweets/tweets_{today}.csv", index = False)
-    main_users.to_csv(f"data/users/users_{today}.csv", index = False)
+print(f"\n{sum(pages.values())} pages collected from {len(queries)} queries")
     
-else:
-    main_tweets.to_csv(f"data/tweets/tweets_{today}.csv", index = False)
-    main_users.to_csv(f"data/users/users_{today}.csv", index = False)
-    main_places.to_csv(f"data/places/places_{today}.csv", index = False)
+print(f"\n{tweets_sink.rows} tweets collected so far")
+print(f"{users_sink.rows} users collected so far")
+print(f"{places_sink.rows} user's locations collected so far")
+print(f"{tweet_store.counts()['tweets']} tweets in the local store")
+tweet_store.close()
+
+# load the tweets collected
+main_tweets = pd.read_csv(tweets_sink.path, dtype = {"tweet_id": str, "author_id": str, 
+                                                     "geo_place_id": str, "ref_tweet_id": str,
+                                                     "query": str})
+main_tweets["created_at"] = pd.to_datetime(main_tweets["created_at"], utc = True)
+
+# Store the data locally (partitioned parquet datasets)
+write_frame(main_tweets, "data/tweets", TWEETS_SCHEMA, TWEETS_PARTITIONS,
+            collection_date = collection_date, run_id = today)
+
+for sink, base_dir, schema, partitions in [(users_sink, "data/users", USERS_SCHEMA, USERS_PARTITIONS),
+                                           (places_sink, "data/places", PLACES_SCHEMA, PLACES_PARTITIONS)]:
+    if os.path.exists(sink.path):
+        parquet_sink = ParquetSink(base_dir, schema, partitions, collection_date = collection_date, 
+                                   run_id = today)
+        for chunk in pd.read_csv(sink.path, dtype = str, chunksize = 100000):
+            parquet_sink.write(chunk)
+        parquet_sink.close()
+        os.remove(sink.path)
+
+os.remove(tweets_sink.path)
 
 # update values
 main_tweets.loc[main_tweets["possibly_sensitive"] == False, "possibly_sensitive"] = 0
 main_tweets.loc[main_tweets["possibly_sensitive"] == True, "possibly_sensitive"] = 1
 
-# get unique tweets ids from referenced tweets that were retweeted
-ref_tweets = main_tweets[main_tweets["type"] == "retweeted"].ref_tweet_id.unique()
-
 # get unique tweets ids from original tweets
-og_tweets = main_tweets.tweet_id.unique().tolist()
-
-# get unique tweets that have been referenced
-# i.e., retweeted, quoted, etc
-both = [i for i in ref_tweets if i in og_tweets]
+og_tweets = main_tweets.tweet_id.unique()
 
 # generate a new dataframe without tweets that have
 # referenced other tweets in order to avoid extra
-# processing when cleaning them
+# processing when cleaning them (a tweet found by
+# several queries is only cleaned once)
 sample_df = main_tweets[~main_tweets["ref_tweet_id"].isin(og_tweets)]
-sample_df = sample_df[["tweet_id", "text", "lang"]].reset_index(drop = True)
+sample_df = sample_df[["tweet_id", "text", "lang"]].drop_duplicates(subset = ["tweet_id"]).reset_index(drop = True)
 
 
 # Clean data and only keep the roots of each word.
-pre_processor = PreProcessor()
-sample_df = pre_processor.lemmatizeWords(sample_df)
+# Translations are cached on disk, so tweets translated in
+# previous runs (e.g. retweets or duplicates) are not 
+# translated again.
+translator = BatchTranslator(GoogleTranslator(), cache = TranslationCache("data/cache/translations.db"))
+
+# Copies of the same tweet with small edits (not retweets) are
+# only translated and lemmatized once: they get the clean tweet
+# of the first of them (a one word edit is about 0.65 similar,
+# see NearDuplicateIndex). They are not stored in the ingest
+# index, so they are compared again in the next run.
+near_duplicates = NearDuplicateIndex(threshold = 0.6)
+
+# Lemmas of the tokens seen in previous runs are loaded from
+# disk (warm start) and saved again once the tweets are clean.
+pre_processor = PreProcessor(translator = translator, near_duplicates = near_duplicates,
+                             token_cache_dir = "data/cache/tokens")
+
+# Tweets cleaned in previous runs (same id or same 
+# content) are not cleaned again.
+ingest_index = IngestIndex("data/cache/ingest_index.db")
+sample_df, ingest_stats = clean_incremental(sample_df, pre_processor, ingest_index)
+pre_processor.saveTokenCaches()
+print(f"\n{ingest_stats['cleaned']} tweets cleaned ({ingest_stats['known_ids']} already processed, "
+      f"{ingest_stats['reused_contents']} with repeated content)")
+print(f"{near_duplicates.near_duplicates} near duplicates reused the clean tweet of "
+      f"{near_duplicates.representatives} representatives")
 
 # merge main dataframe with sample df to get the clean tweet
 main_tweets = main_tweets.merge(sample_df[["tweet_id", "clean_tweet"]],
                                 how = "left", on = "tweet_id")
+
+# assign the clean tweet of the original tweets to 
+# the tweets that retweeted them
+main_tweets = propagate_clean_tweets(main_tweets)
 main_tweets = main_tweets.dropna(subset = ["clean_tweet"]).reset_index(drop = True)
 
 
@@ -251,13 +181,29 @@ if "withheld.copyright" and "withheld.country_codes" in main_tweets.columns:
                                     "withheld.country_codes"], axis = 1)
 
 
-for tweet in both:
-    # get the clean tweet from the original tweet
-    clean_tweet = str(list(main_tweets.loc[(main_tweets["tweet_id"] == tweet), "clean_tweet"])[0])
-    
-    # assign the clean tweet to the "clean_tweet" column
-    main_tweets.loc[(main_tweets["ref_tweet_id"] == tweet), "clean_tweet"] = clean_tweet
+# Store the data locally. Clean tweets are stored as
+# lists of strings, so they do not need to be evaluated
+# back when they are read.
+write_frame(main_tweets, "data/clean_tweets", CLEAN_TWEETS_SCHEMA, TWEETS_PARTITIONS,
+            collection_date = collection_date, run_id = today)
+
+# Store the clean tweets as a bag-of-words matrix too (integer 
+# ids over a shared vocabulary), so they can be used by the 
+# models without another vectorizer pass. The vocabulary is
+# kept between runs, so a token has the same column in every 
+# matrix (older matrices only have fewer columns, see 
+# SparseTokens.to_scipy).
+vocabulary_path = "data/bag_of_words/vocabulary.json"
+if os.path.exists(vocabulary_path):
+    pre_processor.vocabulary = Vocabulary.load(vocabulary_path)
+else:
+    pre_processor.vocabulary = Vocabulary()
+
+encode_tokens(main_tweets["clean_tweet"], pre_processor.vocabulary, 
+              ids = main_tweets["tweet_id"]).save(f"data/bag_of_words/run_{today}.npz")
+pre_processor.vocabulary.save(vocabulary_path)
 
-# Store the data locally
-main_tweets.to_csv(f'data/clean_tweets/clean_tweets_{today}.csv', index = False)
+# Store the run report
+report.stop()
+report.save(f"data/reports/run_{today}.json")
 print("\n\nTweets collection process finished! \N{ghost}")
@@ -0,0 +1,213 @@
+# Libraries
+import time
+import asyncio
+import functools
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from collector import QueryPages
+from twitter_client import TwitterClient, search_params
+
+# use a non-blocking http client if it is installed,
+# otherwise requests are sent from a pool of threads
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncTwitterClient(TwitterClient):
+    """
+    Client to request the Twitter API from coroutines. It has the same
+    options, rate limiter, retries and metrics as TwitterClient, but
+    search is a coroutine, so many queries can wait for their pages at
+    the same time in a single thread. It uses aiohttp if it is
+    installed (otherwise the pooled requests session is used from a
+    pool of threads).
+
+    e.g.
+        async with AsyncTwitterClient(bearer_token) as client:
+            page = await client.search("world cup")
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # created on first use (inside the event loop)
+        self._session = None
+        self._executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _get(self, params):
+        """
+        Function to send a request.
+
+        Outputs: Tuple (status, headers, content).
+        """
+
+        # None values (e.g. no next_token) are not sent
+        params = {key: value for key, value in params.items() if value is not None}
+
+        if aiohttp is not None:
+            if self._session is None:
+                self._session = aiohttp.ClientSession(
+                    headers = {"Authorization": self.session.headers["Authorization"]},
+                    connector = aiohttp.TCPConnector(limit = self.pool_size),
+                    timeout = aiohttp.ClientTimeout(total = self.timeout))
+
+            async with self._session.get(self.url, params = params) as response:
+                return response.status, response.headers, await response.read()
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers = self.pool_size)
+
+        get = functools.partial(self.session.get, self.url, params = params, timeout = self.timeout)
+        response = await asyncio.get_running_loop().run_in_executor(self._executor, get)
+
+        return response.status_code, response.headers, response.content
+
+    async def search(self, query, next_token = None):
+        """
+        Function to request tweets according to a specific query.
+
+        Inputs:
+            - query: A string that will be used to find tweets.
+            - next_token: ID of the next page that matches the specified query.
+
+        Outputs: Dictionary (json type) with the requested data.
+        """
+
+        params = search_params(query, next_token)
+        errors = (requests.ConnectionError, requests.Timeout, asyncio.TimeoutError)
+        if aiohttp is not None:
+            errors += (aiohttp.ClientConnectionError,)
+
+        for attempt in range(self.max_retries + 1):
+
+            # wait if the rate budget (shared by every
+            # query) is exhausted
+            wait = await self.rate_limiter.acquire_async()
+
+            start = time.perf_counter()
+            try:
+                status, headers, content = await self._get(params)
+            except errors:
+                self.rate_limiter.release()
+                self._record(query = query, status = None, latency = time.perf_counter() - start,
+                             wait = wait, attempt = attempt, bytes = 0)
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            page, delay = self._handle_response(query, status, headers, content,
+                                                time.perf_counter() - start, wait, attempt)
+            if page is not None:
+                return page
+
+            if delay:
+                await asyncio.sleep(delay)
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+        if self._executor is not None:
+            self._executor.shutdown(wait = False)
+            self._executor = None
+
+        self.close()
+
+
+async def collect_queries(queries, handle_page, client = None, max_pages = 41, pages_per_batch = 1,
+                          checkpoint = None):
+    """
+    Coroutine to collect several queries concurrently. Pages of the
+    same query are requested one after the other (every page has the
+    token of the next one), but all the queries are paginated at the
+    same time through the same client, so the total time is bounded by
+    the rate limit instead of the sum of the latencies of each query.
+
+    Inputs:
+        - queries: List of strings that will be used to find tweets.
+        - handle_page: Function called with (query, tweets, users, places)
+                       for each batch of pages (e.g. to write them into a
+                       common sink). Tweets have a "query" column. Calls
+                       are made from the event loop, one at a time.
+        - client: AsyncTwitterClient object. By default a new one is
+                  created and closed at the end; a client given by the
+                  caller is not closed (see run_queries_async).
+        - max_pages: Maximum number of pages per query.
+        - pages_per_batch: Number of pages decoded together.
+        - checkpoint: Checkpoint object. The progress of every query is
+                      saved after each batch, and queries are resumed
+                      from it. Other values of the saved state are kept.
+
+    Outputs: Dictionary with the number of pages collected per query.
+    """
+
+    own_client = client is None
+    client = client if client is not None else AsyncTwitterClient()
+
+    # progress of each query: {query: {"next_token": ..., "pages": ..., "done": ...}}
+    state = (checkpoint.load() if checkpoint is not None else None) or {}
+    progress = state.get("progress", {})
+
+    async def collect(query):
+        pagination = QueryPages(max_pages, pages_per_batch, **progress.get(query, {}))
+
+        while not pagination.finished:
+
+            dataframes = pagination.add(await client.search(query, next_token = pagination.next_token))
+            if dataframes is None:
+                continue
+
+            # pages without results do not have data
+            tweets, users, places = dataframes
+            if tweets.shape[0] or users.shape[0]:
+                tweets["query"] = query
+                handle_page(query, tweets, users, places)
+
+            progress[query] = {"next_token": pagination.next_token, "pages": pagination.pages,
+                               "done": pagination.finished}
+            if checkpoint is not None:
+                checkpoint.save(**{**state, "progress": progress})
+
+        return pagination.pages
+
+    try:
+        results = await asyncio.gather(*[collect(query) for query in queries])
+    finally:
+        if own_client:
+            await client.aclose()
+
+    # every query has finished
+    if checkpoint is not None:
+        checkpoint.clear()
+
+    return dict(zip(queries, results))
+
+
+def run_queries_async(queries, handle_page, client = None, **kwargs):
+    """
+    Function to run collect_queries from synchronous code (e.g. a
+    script). Arguments are the same as collect_queries. The client is
+    closed when the queries finish or fail, since its connections
+    belong to the event loop of this call.
+
+    Outputs: Dictionary with the number of pages collected per query.
+    """
+
+    async def run():
+        try:
+            return await collect_queries(queries, handle_page, client = client, **kwargs)
+        finally:
+            if client is not None:
+                await client.aclose()
+
+    return asyncio.run(run())
@@ -0,0 +1,4 @@
+"""
+Benchmarks of the collection and pre-processing pipeline on synthetic
+tweets. See benchmarks/__main__.py to run the suite.
+"""
@@ -0,0 +1,56 @@
+"""
+Run the benchmark suite from the root of the repository:
+
+    python -m benchmarks --scale 10k
+    python -m benchmarks --scale 100k --only remove_noise create_dataframes
+    python -m benchmarks --save-baseline
+"""
+
+# Libraries
+import sys
+import argparse
+from benchmarks.synthetic import SCALES
+from benchmarks.suite import (BENCHMARKS, run_benchmarks, save_history, save_baseline, load_baseline,
+                              compare)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmarks on synthetic tweets")
+    parser.add_argument("--scale", choices = list(SCALES), default = "10k")
+    parser.add_argument("--only", nargs = "+", choices = list(BENCHMARKS))
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--tolerance", type = float, default = 0.2,
+                        help = "allowed slowdown against the baseline (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", action = "store_true")
+    parser.add_argument("--no-history", action = "store_true")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only, scale = args.scale, repeat = args.repeat, seed = args.seed)
+    regressions = compare(results, load_baseline(), tolerance = args.tolerance)
+
+    for result in results:
+        if "skipped" in result:
+            print(f"{result['name']:>20}  skipped ({result['skipped']})")
+            continue
+
+        ratio = result.get("baseline_ratio")
+        ratio = f"  x{ratio:.2f} vs baseline" if ratio is not None else ""
+        print(f"{result['name']:>20}  {result['rows']:>8} rows  {result['seconds']:8.3f}s  "
+              f"{result['rows_per_sec']:>12,.0f} rows/s{ratio}")
+
+    if not args.no_history:
+        save_history(results)
+
+    if args.save_baseline:
+        save_baseline(results)
+
+    for regression in regressions:
+        print(f"REGRESSION: {regression['name']} ({regression['scale']}) is "
+              f"{regression['ratio']:.2f}x the baseline")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
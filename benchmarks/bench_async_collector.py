@@ -0,0 +1,79 @@
+"""
+Wall time of collecting several queries from the local fake API:
+one query after the other (as separate runs of the script do), the
+threaded run_queries and the asyncio driver, with and without a rate
+limit. With a rate limit the floor is the number of windows needed
+to send every request.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_async_collector
+"""
+
+# Libraries
+import math
+import time
+from collector import iter_pages
+from twitter_client import TwitterClient, run_queries
+from async_collector import AsyncTwitterClient, run_queries_async
+from benchmarks.fake_api import FakeTwitterAPI
+
+
+def serial(queries, url, max_pages):
+    client = TwitterClient("token", url = url)
+    rows = 0
+
+    for query in queries:
+        for tweets, users, places in iter_pages(query, max_pages = max_pages, fetch = client.search):
+            rows += tweets.shape[0]
+
+    return rows
+
+
+def threaded(queries, url, max_pages):
+    rows = []
+    run_queries(queries, lambda query, tweets, users, places: rows.append(tweets.shape[0]),
+                client = TwitterClient("token", url = url), max_pages = max_pages)
+
+    return sum(rows)
+
+
+def asynchronous(queries, url, max_pages):
+    rows = []
+
+    def handle_page(query, tweets, users, places):
+        # every row is tagged with its query
+        assert (tweets["query"] == query).all()
+        rows.append(tweets.shape[0])
+
+    run_queries_async(queries, handle_page, client = AsyncTwitterClient("token", url = url, pool_size = 50),
+                      max_pages = max_pages)
+
+    return sum(rows)
+
+
+def run(n_queries = 20, pages = 5, latency = 0.1, limits = (None, 40), window = 1.0):
+    queries = ["query {}".format(i) for i in range(n_queries)]
+    requests = n_queries * pages
+    results = []
+
+    for limit in limits:
+        floor = latency * pages if limit is None else max(latency * pages, (math.ceil(requests / limit) - 1) * window)
+
+        for name, function in [("serial", serial), ("threads", threaded), ("asyncio", asynchronous)]:
+            with FakeTwitterAPI(pages_per_query = pages, latency = latency, limit = limit, window = window) as api:
+                start = time.perf_counter()
+                rows = function(queries, api.url, pages)
+                seconds = time.perf_counter() - start
+
+            results.append({"driver": name, "limit": limit, "rows": rows, "seconds": seconds,
+                            "floor": floor, "rejected": api.rejected})
+
+    return results
+
+
+if __name__ == "__main__":
+    for result in run():
+        limit = "-" if result["limit"] is None else f"{result['limit']}/s"
+        print(f"{result['driver']:>8}  limit={limit:>5}  rows={result['rows']}  {result['seconds']:.2f}s  "
+              f"(floor {result['floor']:.2f}s, {result['rejected']} requests rejected)")
@@ -0,0 +1,116 @@
+"""
+Benchmark of the near duplicate index: synthetic tweets plus lightly
+edited copies of some of them (a word changed or added, a different
+mention or link), cleaned with and without the index. Translations
+are done by the local stub with some latency per batch (about
+the latency of a batch sent to the translation api). It reports
+the time, the contents that went through the expensive stages and
+how many copies were found (and how many different tweets were
+merged by mistake) for several thresholds.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_near_duplicates
+"""
+
+# Libraries
+import time
+import random
+import pandas as pd
+from pre_processor import PreProcessor
+from near_duplicates import NearDuplicateIndex, shingles
+from translation import BatchTranslator, StubTranslator
+from benchmarks.synthetic import make_tweets, LANGUAGES
+
+
+def make_copies(n, copy_ratio = 0.4, seed = 0):
+    """
+    Function to create tweets where a share of them are edited copies of
+    a previous tweet (not retweets).
+
+    Outputs: Pandas dataframe with the columns tweet_id, text, lang and
+             original (position of the copied tweet, or its own position).
+    """
+
+    rng = random.Random(seed)
+    tweets = make_tweets(n, seed = seed, retweet_ratio = 0)[["tweet_id", "text", "lang"]]
+    texts, originals = tweets["text"].tolist(), list(range(n))
+
+    for i in range(1, n):
+        if rng.random() < copy_ratio:
+            original = originals[rng.randrange(i)]
+            words = texts[original].split()
+            vocabulary = LANGUAGES[tweets["lang"].iat[original]][1]
+
+            # a word changed or added and some noise
+            if rng.random() < 0.5:
+                words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            else:
+                words.insert(rng.randrange(len(words) + 1), rng.choice(vocabulary))
+            words.append(rng.choice(["@user{}".format(rng.randrange(5000)), "https://t.co/abc", "#WorldCup"]))
+
+            texts[i] = " ".join(words)
+            tweets.iat[i, tweets.columns.get_loc("lang")] = tweets["lang"].iat[original]
+            originals[i] = original
+
+    tweets["text"] = texts
+    tweets["original"] = originals
+
+    return tweets
+
+
+def clean(pdf, method, latency, near_duplicates = None):
+    pre_processor = PreProcessor(translator = BatchTranslator(StubTranslator(latency = latency), batch_size = 50),
+                                 near_duplicates = near_duplicates)
+
+    start = time.perf_counter()
+    output = getattr(pre_processor, method)(pdf[["tweet_id", "text", "lang"]].copy())
+    seconds = time.perf_counter() - start
+
+    computed = {stage: stats["computed"] for stage, stats in pre_processor.stage_stats.items()}
+
+    return output, seconds, computed
+
+
+def run(n = 20000, thresholds = (0.5, 0.6, 0.7, 0.8), method = "lemmatizeWords", latency = 0.3):
+    pdf = make_copies(n)
+    copies = pdf["original"].values != pd.RangeIndex(n).values
+
+    # last stage of the method
+    stage = "stem" if method == "stemWords" else "lemmatize"
+    texts = PreProcessor().runPipeline(pdf.copy(), until = "noise")["clean_tweet"].tolist()
+
+    results = []
+    _, seconds, computed = clean(pdf, method, latency)
+    results.append({"threshold": None, "seconds": seconds, "translated": computed["translate"],
+                    "computed": computed[stage], "found": 0.0, "wrong": 0})
+
+    for threshold in thresholds:
+        index = NearDuplicateIndex(threshold = threshold)
+        output, seconds, computed = clean(pdf, method, latency, index)
+
+        # copies with the same output as their original
+        clean_tweets = output["clean_tweet"].tolist()
+        same = [clean_tweets[i] == clean_tweets[original] for i, original in enumerate(pdf["original"])]
+
+        # tweets that got the text of a representative that is
+        # not a copy of the same tweet (and that does not have
+        # the same shingles, e.g. "!!! !!!" and "!!! !!! !!!")
+        representatives = index.deduplicate(texts, pdf["lang"].tolist())
+        first = dict(zip(representatives[::-1], pdf["original"].values[::-1]))
+        wrong = sum(first[representative] != original and shingles(text) != shingles(representative)
+                    for text, representative, original in zip(texts, representatives, pdf["original"]))
+
+        results.append({"threshold": threshold, "seconds": seconds, "translated": computed["translate"],
+                        "computed": computed[stage], "found": sum(s for s, copy in zip(same, copies) if copy) /
+                        copies.sum(), "wrong": wrong, "index": index.stats()})
+
+    return results
+
+
+if __name__ == "__main__":
+    for result in run():
+        threshold = "-" if result["threshold"] is None else result["threshold"]
+        print(f"threshold={threshold:<4}  {result['seconds']:.2f}s  translated={result['translated']}  "
+              f"computed={result['computed']}  copies found={result['found']:.1%}  "
+              f"tweets merged by mistake={result['wrong']}")
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark of the per-page decode cost: former json_normalize
+path vs the page decoder (one dataframe per page and one dataframe
+per batch of pages).
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_page_decoder
+"""
+
+# Libraries
+import json
+import time
+import pandas as pd
+from benchmarks.synthetic import make_pages
+from page_decoder import PageBatch, decode_page
+
+
+def json_normalize_page(raw):
+    """
+    Former create_dataframes implementation (json_normalize path).
+    """
+
+    json_tweets = json.loads(raw)
+    users = pd.json_normalize(json_tweets['includes']['users']).rename(columns = {"id":"user_id"})
+    tweets = pd.json_normalize(json_tweets['data']).rename(columns = {"id":"tweet_id",
+                                                                      "geo.place_id":"geo_place_id"})
+    tweets['type'] = tweets.referenced_tweets.apply(lambda x: x[0]["type"] if type(x) == list else None)
+    tweets["ref_tweet_id"] = tweets.referenced_tweets.apply(lambda x: x[0]['id']\
+                                                            if isinstance(x, list) else x)
+    tweets = tweets[tweets["lang"] != "und"]
+    tweets["tweet_id"] = tweets["tweet_id"].astype(str)
+    users["user_id"] = users["user_id"].astype(str)
+    tweets["created_at"] = pd.to_datetime(tweets["created_at"], utc = True)
+    places = pd.json_normalize(json_tweets['includes'].get('places', [])).rename(columns = {"id":"geo_place_id"})
+    tweets = tweets.drop(['referenced_tweets','edit_history_tweet_ids'], axis = 1)
+
+    return tweets, users, places
+
+
+def run(n_pages = 200, batch_size = 50):
+    pages = make_pages(n_pages * 100)
+    results = {}
+
+    start = time.perf_counter()
+    for page in pages:
+        json_normalize_page(page)
+    results["json_normalize_us_per_page"] = 1e6 * (time.perf_counter() - start) / n_pages
+
+    start = time.perf_counter()
+    for page in pages:
+        decode_page(page)
+    results["decoder_us_per_page"] = 1e6 * (time.perf_counter() - start) / n_pages
+
+    start = time.perf_counter()
+    batch = PageBatch()
+    for i, page in enumerate(pages, 1):
+        batch.add(page)
+        if i % batch_size == 0:
+            batch.flush()
+    batch.flush()
+    results["batched_decoder_us_per_page"] = 1e6 * (time.perf_counter() - start) / n_pages
+
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name:>30}: {value:.1f}")
@@ -0,0 +1,44 @@
+"""
+Speedup of the PreProcessor parallel mode (n_jobs) over 1, 2, 4 and
+8 worker processes. Translations are done by the local stub, so only
+the cleaning, tokenizing and lemmatizing work is measured.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_parallel
+"""
+
+# Libraries
+import time
+from pre_processor import PreProcessor
+from benchmarks.synthetic import make_tweets
+from translation import BatchTranslator, StubTranslator
+
+
+def run(n = 20000, workers = (1, 2, 4, 8), method = "lemmatizeWords"):
+    pdf = make_tweets(n)[["tweet_id", "text", "lang"]]
+    results = []
+    reference = None
+
+    for n_jobs in workers:
+        pre_processor = PreProcessor(translator = BatchTranslator(StubTranslator()), n_jobs = n_jobs)
+
+        start = time.perf_counter()
+        output = getattr(pre_processor, method)(pdf.copy())
+        seconds = time.perf_counter() - start
+
+        # results must not depend on the number of workers
+        if reference is None:
+            reference = output["clean_tweet"].tolist()
+        identical = output["clean_tweet"].tolist() == reference
+
+        results.append({"n_jobs": n_jobs, "seconds": seconds, "speedup": results[0]["seconds"] / seconds
+                        if results else 1.0, "identical": identical})
+
+    return results
+
+
+if __name__ == "__main__":
+    for result in run():
+        print(f"n_jobs={result['n_jobs']}  {result['seconds']:.2f}s  "
+              f"speedup={result['speedup']:.2f}x  identical={result['identical']}")
@@ -0,0 +1,76 @@
+"""
+Scaling benchmark of the retweet clean_tweet propagation step.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_propagation
+"""
+
+# Libraries
+import time
+import random
+import pandas as pd
+from collector import propagate_clean_tweets
+
+
+def make_tweets(n, retweet_ratio = 0.5, seed = 0):
+    """
+    Function to create a merged tweets dataframe: original tweets are
+    already cleaned and retweets point to one of them.
+    """
+
+    rng = random.Random(seed)
+    n_originals = max(1, int(n * (1 - retweet_ratio)))
+
+    tweet_ids = [str(i) for i in range(n)]
+    types = [None] * n_originals + ["retweeted"] * (n - n_originals)
+    ref_ids = [None] * n_originals + [str(rng.randrange(n_originals)) for i in range(n - n_originals)]
+    clean = [["word", str(i)] for i in range(n_originals)] + [None] * (n - n_originals)
+
+    return pd.DataFrame({"tweet_id": tweet_ids, "type": types, "ref_tweet_id": ref_ids, "clean_tweet": clean})
+
+
+def loop_propagation(main_tweets):
+    """
+    Former implementation (list membership plus two boolean masks
+    per referenced tweet).
+    """
+
+    ref_tweets = main_tweets[main_tweets["type"] == "retweeted"].ref_tweet_id.unique()
+    og_tweets = main_tweets.tweet_id.unique().tolist()
+    both = [i for i in ref_tweets if i in og_tweets]
+
+    for tweet in both:
+        clean_tweet = str(list(main_tweets.loc[(main_tweets["tweet_id"] == tweet), "clean_tweet"])[0])
+        main_tweets.loc[(main_tweets["ref_tweet_id"] == tweet), "clean_tweet"] = clean_tweet
+
+    return main_tweets
+
+
+def run(sizes = (10000, 20000, 40000, 80000, 160000, 320000), loop_limit = 20000):
+    results = []
+
+    for n in sizes:
+        pdf = make_tweets(n)
+
+        start = time.perf_counter()
+        propagate_clean_tweets(pdf.copy())
+        mapped = time.perf_counter() - start
+
+        loop = None
+        if n <= loop_limit:
+            start = time.perf_counter()
+            loop_propagation(pdf.copy())
+            loop = time.perf_counter() - start
+
+        results.append({"rows": n, "map_seconds": mapped, "map_us_per_row": 1e6 * mapped / n,
+                        "loop_seconds": loop})
+
+    return results
+
+
+if __name__ == "__main__":
+    for result in run():
+        loop = "-" if result["loop_seconds"] is None else f"{result['loop_seconds']:.3f}"
+        print(f"rows={result['rows']:>7}  map={result['map_seconds']:.4f}s "
+              f"({result['map_us_per_row']:.2f} us/row)  loop={loop}s")
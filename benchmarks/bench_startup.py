@@ -0,0 +1,69 @@
+"""
+Startup budget of the PreProcessor: time to import pre_processor and
+to create a PreProcessor in a new process (as a short-lived batch
+worker does), and heavy modules that are loaded by them. The exit
+code is 1 if any of the budgets is exceeded.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_startup
+
+The test suite always checks the lazy modules, and the budgets only
+with CHECK_STARTUP_BUDGET=1 (they depend on the machine).
+"""
+
+# Libraries
+import os
+import sys
+import json
+import subprocess
+
+# seconds (fastest of the repetitions)
+BUDGETS = {"import_seconds": 0.6, "construct_seconds": 0.005}
+
+# modules that must only be loaded when they are used
+LAZY_MODULES = ["nltk", "googletrans", "unidecode", "contractions", "scipy"]
+
+# code run in a new process
+PROBE = """
+import sys, json, time, types
+start = time.perf_counter()
+import pre_processor
+imported = time.perf_counter()
+pre_processor.PreProcessor()
+constructed = time.perf_counter()
+loaded = [name for name in {modules} if type(sys.modules.get(name)) is types.ModuleType]
+print(json.dumps({{"import_seconds": imported - start, "construct_seconds": constructed - imported,
+                  "loaded": loaded}}))
+"""
+
+
+def probe():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, "-c", PROBE.format(modules = LAZY_MODULES)], cwd = root)
+
+    return json.loads(output)
+
+
+def run(repeat = 5, budgets = BUDGETS):
+    probes = [probe() for i in range(repeat)]
+
+    result = {name: min(p[name] for p in probes) for name in budgets}
+    result["loaded"] = sorted(set(name for p in probes for name in p["loaded"]))
+    result["exceeded"] = [name for name, budget in budgets.items() if result[name] > budget]
+    result["exceeded"] += [f"{name} loaded" for name in result["loaded"]]
+
+    return result
+
+
+if __name__ == "__main__":
+    result = run()
+
+    for name, budget in BUDGETS.items():
+        print(f"{name:>18}: {1000 * result[name]:8.2f}ms  (budget {1000 * budget:.0f}ms)")
+    print(f"{'eager modules':>18}: {', '.join(result['loaded']) or '-'}")
+
+    for name in result["exceeded"]:
+        print(f"OVER BUDGET: {name}")
+
+    sys.exit(1 if result["exceeded"] else 0)
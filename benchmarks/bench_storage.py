@@ -0,0 +1,103 @@
+"""
+Benchmark of the Parquet storage layer against the csv files.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_storage
+"""
+
+# Libraries
+import os
+import time
+import random
+import shutil
+import tempfile
+import pandas as pd
+from storage import write_frame, read_frame, CLEAN_TWEETS_SCHEMA, TWEETS_PARTITIONS
+
+LANGS = ["en", "es", "pt", "fr", "ja", "ar", "in", "zh"]
+WORDS = ["world", "cup", "goal", "messi", "argentina", "mexico", "team", "match", "fans", "play"]
+
+
+def make_clean_tweets(n, days = 7, seed = 0):
+    """
+    Function to create a dataframe similar to the clean tweets.
+    """
+
+    rng = random.Random(seed)
+    dates = pd.date_range("2022-11-20", periods = days, freq = "D", tz = "UTC")
+
+    created_at = [dates[i % days] + pd.Timedelta(seconds = rng.randrange(86400)) for i in range(n)]
+
+    return pd.DataFrame({"tweet_id": [str(1590000000000000000 + i) for i in range(n)],
+                         "text": [" ".join(rng.choices(WORDS, k = 12)) for i in range(n)],
+                         "created_at": created_at,
+                         "lang": [rng.choice(LANGS) for i in range(n)],
+                         "possibly_sensitive": [rng.randint(0, 1) for i in range(n)],
+                         "author_id": [str(rng.randrange(10 ** 9)) for i in range(n)],
+                         "type": [rng.choice([None, "retweeted", "quoted"]) for i in range(n)],
+                         "run_id": "bench",
+                         "collection_date": [ts.strftime("%Y-%m-%d") for ts in created_at],
+                         "clean_tweet": [rng.sample(WORDS, 5) for i in range(n)]})
+
+
+def folder_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def timeit(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def run(n = 200000):
+    pdf = make_clean_tweets(n)
+    tmp = tempfile.mkdtemp()
+
+    try:
+        csv_path = os.path.join(tmp, "clean_tweets.csv")
+        parquet_path = os.path.join(tmp, "clean_tweets")
+
+        results = {"rows": n}
+        results["csv_write"], _ = timeit(lambda: pdf.to_csv(csv_path, index = False))
+        results["parquet_write"], _ = timeit(lambda: write_frame(pdf, parquet_path, CLEAN_TWEETS_SCHEMA,
+                                                                 TWEETS_PARTITIONS))
+        results["csv_size_mb"] = folder_size(csv_path) / 2 ** 20
+        results["parquet_size_mb"] = folder_size(parquet_path) / 2 ** 20
+
+        # full read (tokens have to be evaluated back from the csv)
+        def read_csv():
+            data = pd.read_csv(csv_path)
+            data["clean_tweet"] = data["clean_tweet"].apply(eval)
+            return data
+
+        results["csv_read"], _ = timeit(read_csv)
+        results["parquet_read"], _ = timeit(lambda: read_frame(parquet_path, CLEAN_TWEETS_SCHEMA,
+                                                               TWEETS_PARTITIONS))
+
+        # one day, one language and two columns
+        def read_csv_subset():
+            data = read_csv()
+            return data.loc[(data["collection_date"] == "2022-11-21") & (data["lang"] == "es"),
+                            ["tweet_id", "clean_tweet"]]
+
+        results["csv_read_subset"], _ = timeit(read_csv_subset)
+        results["parquet_read_subset"], _ = timeit(lambda: read_frame(parquet_path, CLEAN_TWEETS_SCHEMA,
+                                                                      TWEETS_PARTITIONS,
+                                                                      columns = ["tweet_id", "clean_tweet"],
+                                                                      dates = ["2022-11-21"], langs = ["es"]))
+
+    finally:
+        shutil.rmtree(tmp)
+
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name:>22}: {value:.3f}" if isinstance(value, float) else f"{name:>22}: {value}")
@@ -0,0 +1,104 @@
+"""
+Equivalence and throughput of the single pass cleaning functions
+(text_cleaner.clean_series and normalize_series) vs the former chain
+of apply calls of PreProcessor.removeNoise (before translation) and
+PreProcessor.textNormalization, over synthetic tweets plus a few
+edge cases.
+
+Run from the root of the repository (the nltk stopwords corpus is
+needed):
+
+    python -m benchmarks.bench_text_cleaner
+"""
+
+# Libraries
+import re
+import time
+import unidecode
+import contractions
+import pandas as pd
+from collections import Counter
+from nltk.corpus import stopwords
+from pre_processor import PreProcessor
+from benchmarks.synthetic import make_tweets
+from text_cleaner import clean_series, normalize_series
+
+# edge cases of the noise and normalization steps (accents, emojis,
+# html, mentions, links, quotes, contractions and replacements)
+EDGE_CASES = ["Canción <b>del</b> AÑO!!! 🎉⚽", "@Messi #WorldCup: \"GOAL\" https://t.co/abc more",
+              "Don't   stop... can't,  won't; y'all", "  gr8  ", "idk", "<a href='x'>link</a> — ok",
+              "ÉLÈVE naïve café ß", "tab\tnew\nline\r\n", "", "   ", "https://t.co/x\nnext line",
+              "email@domain.com x_y a-b", "😀😀😀", "Straße Ωmega 東京", "'quoted' \"double\""]
+
+
+def old_remove_noise(series):
+    """
+    Function with the former chain of apply calls of removeNoise (the
+    steps before the translation).
+    """
+
+    pdf = pd.DataFrame({"text": series})
+
+    pdf["clean_tweet"] = pdf.text.apply(lambda x: x.lower())
+    pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: unidecode.unidecode(x))
+    pdf["clean_tweet"] = pdf.clean_tweet.str.replace(r'<[^<>]*>', '', regex = True)
+    pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x:' '.join(re.sub(r"(@[A-Za-z0-9]+)|(#[A-Za-z0-9]+)|([-.,:_;])|(https?:\/\/.*[\r\n]*)",
+                                                                        "", x).split()).replace('"',''))
+    pdf['clean_tweet'] = pdf.clean_tweet.apply(lambda x: x.lstrip(' '))
+    pdf['clean_tweet'] = pdf.clean_tweet.apply(lambda x: x.rstrip(' '))
+
+    return pdf["clean_tweet"]
+
+
+def old_normalize(series, regex_dict, stop_words):
+    """
+    Function with the former chain of apply calls of textNormalization
+    (after removeNoise).
+    """
+
+    pdf = pd.DataFrame({"clean_tweet": series})
+
+    pdf['clean_tweet'] = pdf.clean_tweet.apply(lambda x: contractions.fix(x))
+    pdf['clean_tweet'] = pdf.clean_tweet.replace(regex_dict)
+    stopwords_dict = Counter(stop_words)
+    pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: ' '.join([word for word in x.split()
+                                                                   if word not in stopwords_dict]))
+
+    return pdf["clean_tweet"]
+
+
+def timeit(function, *args, repeat = 3):
+    # fastest of the repetitions
+    seconds = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        seconds.append(time.perf_counter() - start)
+
+    return min(seconds), list(result)
+
+
+def run(n = 100000, seed = 0):
+    texts = pd.Series(make_tweets(n, seed = seed)["text"].tolist() + EDGE_CASES, dtype = object)
+    regex_dict = PreProcessor().regex_dict
+    stop_words = stopwords.words('english')
+
+    results = {"rows": len(texts)}
+    results["old_noise"], old_clean = timeit(old_remove_noise, texts)
+    results["new_noise"], new_clean = timeit(clean_series, texts)
+
+    clean = pd.Series(new_clean, dtype = object)
+    results["old_normalize"], old_normal = timeit(old_normalize, clean, regex_dict, stop_words)
+    results["new_normalize"], new_normal = timeit(normalize_series, clean, regex_dict, frozenset(stop_words))
+
+    results["noise_speedup"] = results["old_noise"] / results["new_noise"]
+    results["normalize_speedup"] = results["old_normalize"] / results["new_normalize"]
+    results["noise_differences"] = [text for text, a, b in zip(texts, old_clean, new_clean) if a != b]
+    results["normalize_differences"] = [text for text, a, b in zip(clean, old_normal, new_normal) if a != b]
+
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name:>22}: {value:.3f}" if isinstance(value, float) else f"{name:>22}: {value}")
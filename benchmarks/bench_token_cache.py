@@ -0,0 +1,90 @@
+"""
+Benchmark of the token --> stem/lemma LRU caches on a Zipfian token
+stream (similar to the vocabulary of tweets), including the memory
+used by a full cache.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_token_cache
+"""
+
+# Libraries
+import time
+import random
+import itertools
+import tracemalloc
+import nltk
+from token_cache import TokenCache
+
+
+def zipf_tokens(n_tokens, vocabulary = 50000, exponent = 1.1, seed = 0):
+    """
+    Function to create a stream of tokens whose frequencies follow
+    Zipf's law.
+    """
+
+    rng = random.Random(seed)
+    words = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k = rng.randint(3, 10))) + "ing"
+             for i in range(vocabulary)]
+    weights = list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, vocabulary + 1)))
+
+    return rng.choices(words, cum_weights = weights, k = n_tokens)
+
+
+def cache_memory(maxsize, function):
+    """
+    Function to measure the memory (MB) used by a full cache.
+    """
+
+    tokens = ["token{}ing".format(i) for i in range(maxsize)]
+
+    tracemalloc.start()
+    cache = TokenCache(maxsize)
+    for token in tokens:
+        cache.lookup(token, function)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return current / 2 ** 20
+
+
+def run(n_tokens = 1000000, sizes = (1000, 10000, 100000)):
+    tokens = zipf_tokens(n_tokens)
+    functions = {"stem": nltk.stem.SnowballStemmer("english").stem}
+
+    # the lemmatizer needs the wordnet corpus
+    try:
+        lemmatizer = nltk.stem.wordnet.WordNetLemmatizer()
+        lemmatizer.lemmatize("warming")
+        functions["lemmatize"] = lemmatizer.lemmatize
+    except LookupError:
+        pass
+
+    results = []
+    for name, function in functions.items():
+        start = time.perf_counter()
+        for token in tokens:
+            function(token)
+        baseline = time.perf_counter() - start
+
+        for maxsize in sizes:
+            cache = TokenCache(maxsize)
+            start = time.perf_counter()
+            for token in tokens:
+                cache.lookup(token, function)
+            seconds = time.perf_counter() - start
+
+            results.append({"function": name, "maxsize": maxsize, "uncached_seconds": baseline,
+                            "cached_seconds": seconds, "speedup": baseline / seconds,
+                            "hit_rate": cache.stats()["hit_rate"],
+                            "memory_mb": cache_memory(maxsize, function)})
+
+    return results
+
+
+if __name__ == "__main__":
+    for result in run():
+        print(f"{result['function']:>9}  maxsize={result['maxsize']:>6}  "
+              f"uncached={result['uncached_seconds']:.2f}s  cached={result['cached_seconds']:.2f}s  "
+              f"speedup={result['speedup']:.1f}x  hit_rate={result['hit_rate']:.3f}  "
+              f"memory={result['memory_mb']:.1f}MB")
@@ -0,0 +1,70 @@
+"""
+Equivalence and throughput of the tweet tokenizer (text_cleaner) vs
+nltk.word_tokenize and nltk.sent_tokenize, over normalized synthetic
+tweets (the input of the tokenize stage) plus a few edge cases. The
+target is 10x the throughput of word_tokenize with the same tokens.
+
+Run from the root of the repository (nltk punkt and stopwords corpora
+are needed):
+
+    python -m benchmarks.bench_tokenizer
+"""
+
+# Libraries
+import time
+import nltk
+import pandas as pd
+from pre_processor import PreProcessor
+from benchmarks.synthetic import make_tweets
+from translation import BatchTranslator, StubTranslator
+from text_cleaner import tokenize_series, split_sentences
+
+# edge cases of the tweet tokenizer (quotes, clitics, contractions,
+# periods and other punctuation marks)
+EDGE_CASES = ["messi's goal!! wow", "i cannot believe (it) [really]", "he said 'hello' & left $5 100%",
+              "gonna wanna gotta", "rock'n'roll d'ye more'n 'tis", "hello. how are you? fine!",
+              "don't can't we'll they're i'm", "``quoted`` `x", "a*b <3 {x} y", "wow!!!great?? ok", ""]
+
+
+def normalized_tweets(n, seed = 0):
+    """
+    Function to create the input of the tokenize stage (output of
+    textNormalization) from synthetic tweets.
+    """
+
+    pre_processor = PreProcessor(translator = BatchTranslator(StubTranslator()), cache_stages = False)
+    pdf = pre_processor.textNormalization(make_tweets(n, seed = seed)[["tweet_id", "text", "lang"]])
+
+    return pd.Series(pdf["clean_tweet"].tolist() + EDGE_CASES, dtype = object)
+
+
+def run(n = 20000, target = 10.0):
+    texts = normalized_tweets(n)
+
+    start = time.perf_counter()
+    nltk_tokens = [nltk.word_tokenize(text) for text in texts.values]
+    nltk_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tweet_tokens = tokenize_series(texts)
+    tweet_seconds = time.perf_counter() - start
+
+    # strings with a different result
+    words_diff = [text for text, a, b in zip(texts.values, nltk_tokens, tweet_tokens) if a != b]
+    sents_diff = [text for text in texts.values if nltk.sent_tokenize(text) != split_sentences(text)]
+
+    return {"rows": len(texts), "nltk_seconds": nltk_seconds, "tweet_seconds": tweet_seconds,
+            "speedup": nltk_seconds / tweet_seconds, "target": target,
+            "word_differences": words_diff, "sentence_differences": sents_diff}
+
+
+if __name__ == "__main__":
+    result = run()
+    print(f"rows={result['rows']}  word_tokenize={result['nltk_seconds']:.2f}s  "
+          f"tweet={result['tweet_seconds']:.2f}s  speedup={result['speedup']:.1f}x "
+          f"(target {result['target']:.0f}x)")
+    print(f"different words: {len(result['word_differences'])}  "
+          f"different sentences: {len(result['sentence_differences'])}")
+
+    for text in (result["word_differences"] + result["sentence_differences"])[:10]:
+        print(f"  {text!r}")
@@ -0,0 +1,108 @@
+"""
+Benchmark of the SQLite tweet store against the csv files + pandas
+merge: writing the collected data, joining tweets to their authors
+and places in a range of time, and looking up the tweets of some
+authors.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_tweet_store
+"""
+
+# Libraries
+import os
+import time
+import shutil
+import tempfile
+import pandas as pd
+from tweet_store import TweetStore
+from benchmarks.synthetic import make_tweets
+
+
+def make_data(n, seed = 0):
+    """
+    Function to create synthetic tweets, users and places.
+    """
+
+    tweets = make_tweets(n, seed = seed)
+    tweets["query"] = "world cup"
+
+    users = pd.DataFrame({"user_id": tweets["author_id"].unique()})
+    users["name"] = users["user_id"]
+    users["username"] = users["user_id"]
+    users["location"] = ["City {}".format(i % 300) for i in range(users.shape[0])]
+
+    places = pd.DataFrame({"geo_place_id": tweets["geo_place_id"].dropna().unique()})
+    places["full_name"] = "Doha, Qatar"
+    places["name"] = "Doha"
+    places["country"] = "Qatar"
+
+    return tweets, users, places
+
+
+def timeit(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def run(n = 200000, authors = 100):
+    tweets, users, places = make_data(n)
+    tmp = tempfile.mkdtemp()
+
+    # an hour in the middle of the collection
+    start = tweets["created_at"].iloc[n // 2]
+    end = start + pd.Timedelta(hours = 1)
+    author_ids = users["user_id"].iloc[:authors].tolist()
+
+    try:
+        paths = {name: os.path.join(tmp, f"{name}.csv") for name in ["tweets", "users", "places"]}
+        store = TweetStore(os.path.join(tmp, "tweets.db"))
+
+        def write_csv():
+            for name, pdf in [("tweets", tweets), ("users", users), ("places", places)]:
+                pdf.to_csv(paths[name], index = False)
+
+        results = {"rows": n}
+        results["csv_write"], _ = timeit(write_csv)
+        results["store_write"], _ = timeit(lambda: store.write(tweets, users, places, run_id = "bench"))
+
+        # every file is loaded and merged to answer a query
+        def read_csv():
+            data = pd.read_csv(paths["tweets"], dtype = {"tweet_id": str, "author_id": str, "geo_place_id": str,
+                                                         "ref_tweet_id": str})
+            data["created_at"] = pd.to_datetime(data["created_at"], utc = True)
+            return data
+
+        def join_csv():
+            data = read_csv()
+            data = data[(data["created_at"] >= start) & (data["created_at"] < end)]
+            data = data.merge(pd.read_csv(paths["users"], dtype = str), how = "left",
+                              left_on = "author_id", right_on = "user_id")
+            return data.merge(pd.read_csv(paths["places"], dtype = str), how = "left", on = "geo_place_id")
+
+        results["csv_join_hour"], csv_rows = timeit(join_csv)
+        results["store_join_hour"], store_rows = timeit(lambda: store.read_tweets(start = start, end = end,
+                                                                                  users = True, places = True))
+
+        def authors_csv():
+            data = read_csv()
+            return data[data["author_id"].isin(author_ids)]
+
+        results["csv_authors"], csv_authors = timeit(authors_csv)
+        results["store_authors"], store_authors = timeit(lambda: store.tweets_by_author(author_ids))
+
+        # both paths must return the same rows
+        results["identical"] = (sorted(csv_rows["tweet_id"]) == sorted(store_rows["tweet_id"]) and
+                                sorted(csv_authors["tweet_id"]) == sorted(store_authors["tweet_id"]))
+        store.close()
+
+    finally:
+        shutil.rmtree(tmp)
+
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name:>18}: {value:.3f}" if isinstance(value, float) else f"{name:>18}: {value}")
@@ -0,0 +1,54 @@
+"""
+Memory of the clean tweets as lists of strings (one string object per
+token and row, e.g. after reading them back) vs integer ids over a
+shared vocabulary (SparseTokens), and time to encode them.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_vocabulary
+"""
+
+# Libraries
+import time
+import tracemalloc
+from benchmarks.synthetic import make_tweets
+from vocabulary import encode_tokens
+
+
+def traced(function):
+    """
+    Function to get the result of a function and the memory (MB) that
+    is still allocated by it.
+    """
+
+    tracemalloc.start()
+    result = function()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, current / 2 ** 20
+
+
+def run(sizes = (10000, 100000)):
+    results = []
+
+    for n in sizes:
+        texts = make_tweets(n)["text"].str.lower().tolist()
+
+        tokens, lists_mb = traced(lambda: [text.split() for text in texts])
+
+        start = time.perf_counter()
+        encoded, sparse_mb = traced(lambda: encode_tokens(tokens))
+        seconds = time.perf_counter() - start
+
+        results.append({"rows": n, "vocabulary": len(encoded.vocabulary), "lists_mb": lists_mb,
+                        "sparse_mb": sparse_mb, "encode_seconds": seconds})
+
+    return results
+
+
+if __name__ == "__main__":
+    for result in run():
+        print(f"rows={result['rows']:>7}  vocabulary={result['vocabulary']:>6}  "
+              f"lists={result['lists_mb']:.1f}MB  sparse={result['sparse_mb']:.1f}MB  "
+              f"encode={result['encode_seconds']:.2f}s")
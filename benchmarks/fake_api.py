@@ -0,0 +1,141 @@
+"""
+Local fake of the /2/tweets/search/recent end point to test and
+benchmark the collectors offline. Every query gets the same synthetic
+pages, every request takes a given latency and an optional rate limit
+(requests per window) is enforced with the x-rate-limit-* headers and
+429 responses, like the real API. Errors can be returned to the first
+requests (e.g. to test retries).
+
+e.g.
+    with FakeTwitterAPI(pages_per_query = 5, latency = 0.1) as api:
+        client = TwitterClient("token", url = api.url)
+"""
+
+# Libraries
+import time
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from benchmarks.synthetic import make_pages
+
+
+class FakeTwitterAPI:
+
+    def __init__(self, pages_per_query = 5, page_size = 100, latency = 0.05, limit = None, window = 1.0,
+                 seed = 0, errors = (), stall = 1.0):
+
+        # pages returned for any query (the next_token of
+        # page i is "token{i + 1}")
+        self.pages = make_pages(pages_per_query * page_size, seed = seed, page_size = page_size)
+
+        # seconds taken by every request
+        self.latency = latency
+
+        # maximum number of requests per window of seconds (None = no limit)
+        self.limit = limit
+        self.window = window
+        self.reset = None
+        self.count = 0
+
+        # responses of the first requests: a status code (without
+        # rate limit headers) or None (the request takes stall
+        # seconds, e.g. to make the client time out)
+        self.errors = list(errors)
+        self.stall = stall
+
+        # requests received by query
+        self.requests = {}
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self.server = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/2/tweets/search/recent"
+
+    def _rate_limit(self):
+        """
+        Function to count a request in the current window.
+
+        Outputs: Tuple (allowed, headers).
+        """
+
+        if self.limit is None:
+            return True, {}
+
+        with self._lock:
+            now = time.time()
+            if self.reset is None or now >= self.reset:
+                self.reset = now + self.window
+                self.count = 0
+
+            self.count += 1
+            remaining = self.limit - self.count
+            headers = {"x-rate-limit-limit": str(self.limit), "x-rate-limit-remaining": str(max(remaining, 0)),
+                       "x-rate-limit-reset": str(self.reset)}
+
+            if remaining < 0:
+                self.rejected += 1
+
+            return remaining >= 0, headers
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                query = params.get("query", [""])[0]
+                token = params.get("next_token", ["token0"])[0]
+
+                time.sleep(api.latency)
+                with api._lock:
+                    error = api.errors.pop(0) if api.errors else 0
+                if error is None:
+                    time.sleep(api.stall)
+
+                allowed, headers = api._rate_limit()
+
+                if error:
+                    status, body, headers = error, b'{"title": "Error"}', {}
+                elif not allowed:
+                    status, body = 429, b'{"title": "Too Many Requests"}'
+                else:
+                    with api._lock:
+                        api.requests[query] = api.requests.get(query, 0) + 1
+                    status, body = 200, api.pages[int(token[len("token"):])]
+
+                # the client may have given up (timeout)
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        threading.Thread(target = self.server.serve_forever, daemon = True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,199 @@
+"""
+Benchmark suite of the PreProcessor stages and the collector steps on
+synthetic corpora. Results are appended to a history file and compared
+with a stored baseline to flag regressions.
+"""
+
+# Libraries
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from benchmarks.synthetic import SCALES, make_tweets, make_pages
+
+# results folder
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+HISTORY_PATH = os.path.join(RESULTS_DIR, "history.jsonl")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+
+
+def _pre_processor():
+    from pre_processor import PreProcessor
+    from translation import BatchTranslator, StubTranslator
+
+    # no stage cache, so repetitions do not reuse results,
+    # and a local translator, so no request is sent
+    return PreProcessor(translator = BatchTranslator(StubTranslator()), cache_stages = False)
+
+
+def _pre_processor_benchmark(method):
+    def setup(n, seed):
+        return make_tweets(n, seed = seed)[["tweet_id", "text", "lang"]]
+
+    def run(tweets):
+        getattr(_pre_processor(), method)(tweets.copy())
+        return tweets.shape[0]
+
+    return setup, run
+
+
+def _create_dataframes_benchmark():
+    def setup(n, seed):
+        return make_pages(n, seed = seed)
+
+    def run(pages):
+        from collector import create_dataframes
+        from page_decoder import loads
+
+        return sum(create_dataframes(loads(page), None)[0].shape[0] for page in pages)
+
+    return setup, run
+
+
+def _propagation_benchmark():
+    def setup(n, seed):
+        tweets = make_tweets(n, seed = seed)
+        tweets["clean_tweet"] = [None if tweet_type == "retweeted" else text.split()
+                                 for tweet_type, text in zip(tweets["type"], tweets["text"])]
+        return tweets
+
+    def run(tweets):
+        from collector import propagate_clean_tweets
+
+        propagate_clean_tweets(tweets.copy())
+        return tweets.shape[0]
+
+    return setup, run
+
+
+# name --> (setup, run). setup is not timed.
+BENCHMARKS = {
+    "remove_noise": _pre_processor_benchmark("removeNoise"),
+    "text_normalization": _pre_processor_benchmark("textNormalization"),
+    "word_tokenize": _pre_processor_benchmark("wordTokenize"),
+    "lemmatize_words": _pre_processor_benchmark("lemmatizeWords"),
+    "create_dataframes": _create_dataframes_benchmark(),
+    "retweet_propagation": _propagation_benchmark(),
+}
+
+
+def run_benchmarks(names = None, scale = "10k", repeat = 3, seed = 0):
+    """
+    Function to run benchmarks.
+
+    Inputs:
+        - names: List of benchmarks to run (all of them by default).
+        - scale: Number of tweets (any of SCALES).
+        - repeat: Number of repetitions (the fastest one is kept).
+        - seed: Random seed of the synthetic data.
+
+    Outputs: List of dictionaries with the results. Benchmarks that can
+             not run (e.g. missing nltk corpora) are marked as skipped.
+    """
+
+    n = SCALES[scale]
+    results = []
+
+    for name in names or BENCHMARKS:
+        setup, run = BENCHMARKS[name]
+        data = setup(n, seed)
+
+        try:
+            timings = []
+            for i in range(repeat):
+                start = time.perf_counter()
+                rows = run(data)
+                timings.append(time.perf_counter() - start)
+
+        except LookupError as error:
+            # first line of the nltk message (without the banner)
+            reason = next(line.strip() for line in str(error).splitlines() if line.strip("* \n"))
+            results.append({"name": name, "scale": scale, "skipped": reason})
+            continue
+
+        seconds = min(timings)
+        results.append({"name": name, "scale": scale, "rows": rows, "seconds": seconds,
+                        "rows_per_sec": rows / seconds if seconds else None})
+
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr = subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_history(results, path = HISTORY_PATH):
+    """
+    Function to append the results of a run to the history file (one
+    json object per line).
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+
+    record = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(),
+              "python": sys.version.split()[0], "machine": platform.platform(), "results": results}
+
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def _key(result):
+    return "{}@{}".format(result["name"], result["scale"])
+
+
+def save_baseline(results, path = BASELINE_PATH):
+    """
+    Function to store the results as the baseline (seconds per row of
+    each benchmark and scale). Previous values of other benchmarks or
+    scales are kept.
+    """
+
+    baseline = load_baseline(path)
+    baseline.update({_key(result): result["seconds"] / result["rows"]
+                     for result in results if "seconds" in result and result["rows"]})
+
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent = 2, sort_keys = True)
+
+
+def load_baseline(path = BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance = 0.2):
+    """
+    Function to compare results with the baseline.
+
+    Inputs:
+        - results: Results of run_benchmarks.
+        - baseline: Dictionary returned by load_baseline.
+        - tolerance: Allowed slowdown (0.2 = 20% slower than the baseline).
+
+    Outputs: List of results slower than the baseline plus the tolerance
+             (with the "ratio" current/baseline).
+    """
+
+    regressions = []
+
+    for result in results:
+        if "seconds" not in result or _key(result) not in baseline or not result["rows"]:
+            continue
+
+        ratio = (result["seconds"] / result["rows"]) / baseline[_key(result)]
+        result["baseline_ratio"] = ratio
+
+        if ratio > 1 + tolerance:
+            regressions.append({**result, "ratio": ratio})
+
+    return regressions
@@ -0,0 +1,156 @@
+"""
+Deterministic synthetic tweets (mixed languages, mentions, hashtags,
+urls, html, emoji and retweets) and fake pages of the search end point
+in the v2 json shape.
+"""
+
+# Libraries
+import json
+import random
+import pandas as pd
+
+# number of tweets of each scale
+SCALES = {"10k": 10000, "100k": 100000, "1m": 1000000}
+
+# language --> (share of tweets, words)
+LANGUAGES = {
+    "en": (0.55, ["world", "cup", "goal", "team", "match", "playing", "fans", "winning", "referee",
+                  "don't", "can't", "it's", "amazing", "stadium", "penalty", "yeah", "btw", "gr8"]),
+    "es": (0.18, ["mundial", "gol", "equipo", "partido", "aficionados", "ganar", "árbitro", "increíble",
+                  "canción", "selección", "jugando", "estadio"]),
+    "pt": (0.08, ["copa", "gol", "time", "jogo", "torcida", "vitória", "seleção", "incrível", "estádio"]),
+    "fr": (0.06, ["coupe", "but", "équipe", "match", "supporters", "gagner", "arbitre", "été"]),
+    "ja": (0.04, ["ワールドカップ", "ゴール", "試合", "日本", "応援"]),
+    "ar": (0.04, ["كأس", "العالم", "هدف", "مباراة", "قطر"]),
+    "und": (0.05, ["⚽", "🔥", "🏆", "😍", "!!!"]),
+}
+
+HASHTAGS = ["#WorldCup", "#Qatar2022", "#FIFAWorldCup", "#ARG", "#MEX", "#BRA"]
+EMOJI = ["⚽", "🔥", "🏆", "😍", "🙌", "😂"]
+HTML = ["&amp;", "<b>", "</b>", "&gt;", "<br>"]
+PUNCT = [".", ",", "!", "?", ":", ";", "...", "\""]
+
+
+def _tweet_text(rng, words):
+    parts = rng.choices(words, k = rng.randint(6, 18))
+
+    if rng.random() < 0.5:
+        parts.insert(rng.randrange(len(parts) + 1), "@user{}".format(rng.randrange(5000)))
+    if rng.random() < 0.4:
+        parts.insert(rng.randrange(len(parts) + 1), rng.choice(HASHTAGS))
+    if rng.random() < 0.3:
+        parts.insert(rng.randrange(len(parts) + 1), rng.choice(EMOJI))
+    if rng.random() < 0.15:
+        parts.insert(rng.randrange(len(parts) + 1), rng.choice(HTML))
+    if rng.random() < 0.5:
+        parts[rng.randrange(len(parts))] += rng.choice(PUNCT)
+    if rng.random() < 0.35:
+        parts.append("https://t.co/{:010x}".format(rng.randrange(16 ** 10)))
+
+    text = " ".join(parts)
+
+    return text.capitalize() if rng.random() < 0.5 else text
+
+
+def make_tweets(n, seed = 0, retweet_ratio = 0.3, geo_ratio = 0.03):
+    """
+    Function to create a dataframe of synthetic tweets (same columns as
+    the tweets collected). The same n and seed always return the same
+    tweets.
+
+    Inputs:
+        - n: Number of tweets.
+        - seed: Random seed.
+        - retweet_ratio: Share of tweets that retweet a previous tweet.
+        - geo_ratio: Share of tweets with a place.
+
+    Outputs: Pandas dataframe.
+    """
+
+    rng = random.Random(seed)
+    langs = list(LANGUAGES)
+    weights = [LANGUAGES[lang][0] for lang in langs]
+    start = pd.Timestamp("2022-11-20", tz = "UTC")
+
+    columns = {"tweet_id": [], "text": [], "created_at": [], "lang": [], "possibly_sensitive": [],
+               "author_id": [], "geo_place_id": [], "type": [], "ref_tweet_id": []}
+
+    for i in range(n):
+        tweet_id = str(1594000000000000000 + i)
+        author = "user{}".format(rng.randrange(5000))
+
+        # retweet of a previous tweet
+        if i > 0 and rng.random() < retweet_ratio:
+            original = rng.randrange(i)
+            text = "RT @{}: {}".format(columns["author_id"][original], columns["text"][original])
+            lang = columns["lang"][original]
+            tweet_type, ref_tweet_id = "retweeted", columns["tweet_id"][original]
+        else:
+            lang = rng.choices(langs, weights)[0]
+            text = _tweet_text(rng, LANGUAGES[lang][1])
+            tweet_type, ref_tweet_id = (rng.choice(["quoted", "replied_to"]), str(rng.randrange(10 ** 18))) \
+                                       if rng.random() < 0.1 else (None, None)
+
+        columns["tweet_id"].append(tweet_id)
+        columns["text"].append(text)
+        columns["created_at"].append(start + pd.Timedelta(seconds = i))
+        columns["lang"].append(lang)
+        columns["possibly_sensitive"].append(rng.random() < 0.02)
+        columns["author_id"].append(author)
+        columns["geo_place_id"].append("place{}".format(rng.randrange(300)) if rng.random() < geo_ratio else None)
+        columns["type"].append(tweet_type)
+        columns["ref_tweet_id"].append(ref_tweet_id)
+
+    return pd.DataFrame(columns)
+
+
+def make_pages(n, seed = 0, page_size = 100):
+    """
+    Function to create fake pages of the /2/tweets/search/recent end
+    point (raw json bytes) with synthetic tweets.
+
+    Inputs:
+        - n: Number of tweets.
+        - seed: Random seed.
+        - page_size: Tweets per page (max_results).
+
+    Outputs: List of pages (bytes). Every page but the last one has a
+             next_token.
+    """
+
+    tweets = make_tweets(n, seed = seed)
+    pages = []
+
+    for start in range(0, n, page_size):
+        page = tweets.iloc[start:start + page_size]
+        data, users, places = [], {}, {}
+
+        for row in page.itertuples(index = False):
+            tweet = {"id": row.tweet_id, "text": row.text,
+                     "created_at": row.created_at.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                     "lang": row.lang, "possibly_sensitive": bool(row.possibly_sensitive),
+                     "author_id": row.author_id, "edit_history_tweet_ids": [row.tweet_id]}
+
+            if row.type is not None:
+                tweet["referenced_tweets"] = [{"type": row.type, "id": row.ref_tweet_id}]
+
+            if row.geo_place_id is not None:
+                tweet["geo"] = {"place_id": row.geo_place_id}
+                places[row.geo_place_id] = {"id": row.geo_place_id, "full_name": "Doha, Qatar",
+                                            "name": "Doha", "country": "Qatar"}
+
+            users[row.author_id] = {"id": row.author_id, "name": row.author_id,
+                                    "username": row.author_id, "location": "Qatar"}
+            data.append(tweet)
+
+        includes = {"users": list(users.values())}
+        if places:
+            includes["places"] = list(places.values())
+
+        meta = {"result_count": len(data), "newest_id": data[0]["id"], "oldest_id": data[-1]["id"]}
+        if start + page_size < n:
+            meta["next_token"] = "token{}".format(start // page_size + 1)
+
+        pages.append(json.dumps({"data": data, "includes": includes, "meta": meta}).encode("utf-8"))
+
+    return pages
@@ -0,0 +1,295 @@
+# Libraries
+import os
+import json
+import threading
+import pandas as pd
+from twitter_client import TwitterClient, SEARCH_URL
+from instrumentation import current_report
+from page_decoder import PageBatch, TWEET_COLUMNS, USER_COLUMNS, PLACE_COLUMNS
+
+# clients used by search_tweets (one per token and end point)
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def search_tweets(query, bearer_token = None, next_token = None, url = SEARCH_URL):
+    """
+    Function to request tweets according to a specific query. Requests
+    with the same token and end point share a TwitterClient, so the
+    connection is reused and the rate limits are respected.
+
+    Inputs:
+        - query: A string that will be used to find tweets.
+                 Tweets must match this string to be returned.
+        - bearer_token: Security token from Twitter API. If not defined,
+                        it is read from the environment variables.
+        - next_token: ID of the next page that matches the specified query.
+        - url: End point (it can be changed to use a local fake api).
+
+    Outputs: Dictionary (json type) with the requested data.
+    """
+
+    if bearer_token is None:
+        bearer_token = os.environ.get('bearer_token')
+
+    # reuse the client (session and rate budget)
+    with _clients_lock:
+        client = _clients.get((bearer_token, url))
+        if client is None:
+            client = _clients[(bearer_token, url)] = TwitterClient(bearer_token = bearer_token, url = url)
+
+    return client.search(query, next_token = next_token)
+
+
+def create_dataframes(json_tweets, today):
+    """
+    Function to create and organize different data into specific data frames.
+
+    Inputs:
+        - json_tweets: A dictionary with tweets data.
+
+    Outputs:
+        - tweets: Pandas dataframe with relevant information about tweets (to
+                  further perform text classification).
+
+        - users: Pandas dataframe with users information.
+
+        - places (optional): Pandas dataframe about places where users tweeted. If not a
+                  single tweets contains the place where it was tweeted, then
+                  this dataframe will not be returned.
+    """
+
+    # the page is decoded once into column buffers (see
+    # page_decoder), ids are strings and created_at is a 
+    # datetime. Tweets with undefined language are dropped.
+    with current_report().stage("create_dataframes") as record:
+        batch = PageBatch()
+        batch.add(json_tweets)
+        has_places = batch.has_places
+        tweets, users, places = batch.flush()
+        record["rows"] = tweets.shape[0]
+
+    # Not all users enable their location when tweeting, so
+    # places are only returned if there are available 
+    # locations for the tweets returned.
+    if has_places:
+        return tweets, users, places
+
+    else:
+        return tweets, users
+
+
+class Checkpoint:
+    """
+    Small json file with the state of a collection (query, next
+    token, number of pages collected, ...), so a crashed run can
+    be resumed from the last page stored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """
+        Function to read the last state saved.
+
+        Outputs: Dictionary with the state or None if there is not a
+                 checkpoint.
+        """
+
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, **state):
+        """
+        Function to save the state of a collection. The file is
+        replaced atomically, so it is never left half written.
+        """
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok = True)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """
+        Function to remove the checkpoint once a collection has finished.
+        """
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class CsvSink:
+    """
+    Output that appends dataframes to a csv file, so pages are
+    stored as soon as they are collected instead of keeping all
+    of them in memory.
+    """
+
+    def __init__(self, path, columns = None):
+        self.path = path
+
+        # columns of the first dataframe are used if
+        # they are not defined
+        self.columns = columns
+        self.rows = 0
+
+    def write(self, pdf):
+        """
+        Function to append a dataframe to the csv file. The header is
+        only written when the file is created.
+        """
+
+        if pdf is None or pdf.empty:
+            return
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok = True)
+
+        if self.columns is None:
+            self.columns = list(pdf.columns)
+
+        header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        pdf.reindex(columns = self.columns).to_csv(self.path, mode = "a", header = header, index = False)
+        self.rows += pdf.shape[0]
+
+    def close(self):
+        pass
+
+
+class QueryPages:
+    """
+    Pagination of a query: the next token, the number of pages
+    requested and the batch where they are decoded. It is shared by
+    iter_pages and collect_queries (async_collector), which only
+    differ in how pages are requested.
+
+    e.g.
+        pagination = QueryPages(max_pages = 41)
+        while not pagination.finished:
+            dataframes = pagination.add(fetch(query, next_token = pagination.next_token))
+    """
+
+    def __init__(self, max_pages = 41, pages_per_batch = 1, next_token = None, pages = 0, done = False):
+        self.max_pages = max_pages
+        self.pages_per_batch = pages_per_batch
+
+        # state of a previous collection
+        self.next_token = next_token
+        self.pages = pages
+        self.finished = done or pages >= max_pages
+
+        self.batch = PageBatch()
+
+    def add(self, page):
+        """
+        Function to decode a page of the query.
+
+        Inputs: Page returned by the api.
+
+        Outputs: Tuple (tweets, users, places) if a batch is complete
+                 (pages_per_batch pages or the last page), else None.
+        """
+
+        with current_report().stage("create_dataframes"):
+            self.batch.add(page)
+        self.pages += 1
+
+        # If there are not more results regarding the
+        # requested topic, then just stop requesting
+        # more data.
+        self.next_token = page.get("meta", {}).get("next_token")
+        self.finished = self.next_token is None or self.pages >= self.max_pages
+
+        if self.batch.pages < self.pages_per_batch and not self.finished:
+            return None
+
+        with current_report().stage("create_dataframes", rows = len(self.batch)):
+            return self.batch.flush()
+
+
+def iter_pages(query, max_pages = 41, checkpoint = None, fetch = search_tweets, pages_per_batch = 1,
+               **kwargs):
+    """
+    Generator to request all the pages that match a query. Pages are
+    decoded into column buffers and returned as dataframes every
+    pages_per_batch pages. The next token is saved in the checkpoint
+    once a batch has been consumed (i.e. after the caller has stored
+    it).
+
+    Inputs:
+        - query: A string that will be used to find tweets.
+        - max_pages: Maximum number of pages to request.
+        - checkpoint: Checkpoint object. If there is a saved state for
+                      the same query, the collection continues from it.
+        - fetch: Function used to request a page (search_tweets by default).
+        - pages_per_batch: Number of pages returned together.
+        - kwargs: Additional arguments for the fetch function.
+
+    Outputs: Tuples (tweets, users, places) for each batch. places is an
+             empty dataframe if no tweet of the batch has a location.
+    """
+
+    # resume a previous collection
+    state = checkpoint.load() if checkpoint is not None else None
+    if state is not None and state.get("query") != query:
+        state = None
+
+    pagination = QueryPages(max_pages, pages_per_batch)
+    if state is not None:
+        pagination = QueryPages(max_pages, pages_per_batch, state["next_token"], state["pages"])
+
+    while not pagination.finished:
+
+        dataframes = pagination.add(fetch(query = query, next_token = pagination.next_token, **kwargs))
+        if dataframes is None:
+            continue
+
+        # pages without results do not have data
+        if dataframes[0].shape[0] or dataframes[1].shape[0]:
+            yield dataframes
+
+        if checkpoint is not None and not pagination.finished:
+            checkpoint.save(**{**(state or {}), "query": query, "next_token": pagination.next_token,
+                               "pages": pagination.pages})
+
+    if checkpoint is not None:
+        checkpoint.clear()
+
+
+def propagate_clean_tweets(tweets, types = ("retweeted",)):
+    """
+    Function to copy the clean tweet of the original tweets onto the
+    tweets that referenced them (e.g. retweets), so they do not need
+    to be cleaned again. It uses a tweet_id --> clean_tweet mapping,
+    so it runs in linear time.
+
+    Inputs:
+        - tweets: Pandas dataframe with the following columns:
+            - tweet_id: Tweet's id.
+            - type: Type of reference (retweeted, quoted, ...).
+            - ref_tweet_id: Id of the referenced tweet.
+            - clean_tweet: Clean tweet (null if it was not cleaned).
+        - types: Types of reference that will get the clean tweet of
+                 the referenced tweet.
+
+    Outputs: The same dataframe with the clean tweets propagated.
+    """
+
+    # mapping between tweet ids and clean tweets
+    cleaned = tweets.loc[tweets["clean_tweet"].notnull(), ["tweet_id", "clean_tweet"]]
+    cleaned = cleaned.drop_duplicates(subset = ["tweet_id"])
+    mapping = pd.Series(cleaned["clean_tweet"].values, index = cleaned["tweet_id"].values)
+
+    # tweets that referenced another tweet and were not cleaned
+    mask = tweets["clean_tweet"].isnull() & tweets["type"].isin(types)
+    tweets.loc[mask, "clean_tweet"] = tweets.loc[mask, "ref_tweet_id"].map(mapping)
+
+    return tweets
@@ -0,0 +1,200 @@
+# Libraries
+import json
+import hashlib
+from sqlite_db import connect, select_in
+
+
+def config_hash(pre_processor, method):
+    """
+    Function to get the hash of the settings that change the clean tweet
+    of a content: the PreProcessor method and the regex dict and
+    tokenizer of the PreProcessor. Results of different settings are
+    stored under different keys, so they are never mixed.
+
+    Inputs:
+        - pre_processor: PreProcessor object.
+        - method: PreProcessor method used to clean the tweets.
+
+    Outputs: Hexadecimal string.
+    """
+
+    config = {"method": method,
+              "regex_dict": pre_processor.regex_dict,
+              "tokenizer": pre_processor.tokenizer}
+
+    return hashlib.sha1(json.dumps(config, sort_keys = True).encode("utf-8")).hexdigest()
+
+
+def content_hash(text, lang, config = ""):
+    """
+    Function to get the hash of a tweet's content. The language is part
+    of the hash, since the same text can be translated differently.
+
+    Inputs:
+        - text: Raw tweet.
+        - lang: Tweet's language.
+        - config: Hash of the cleaning settings (see config_hash).
+
+    Outputs: Hexadecimal string.
+    """
+
+    return hashlib.sha1("{}\x00{}\x00{}".format(config, lang, text).encode("utf-8")).hexdigest()
+
+
+class IngestIndex:
+    """
+    Persistent index (SQLite) of the tweets that have already been
+    cleaned. It stores the content hash of every tweet id and the clean
+    tweet of every content hash, so tweets collected again and tweets
+    with the same text are not cleaned twice. Tweet ids are stored by
+    cleaning settings (see config_hash), and content hashes include
+    them.
+    """
+
+    def __init__(self, path = ":memory:"):
+
+        self.path = path
+        self.conn = connect(path)
+
+        # indexes of older versions do not know the settings used
+        # by their results, so they are cleaned again
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(processed)")]
+        if columns and "config" not in columns:
+            self.conn.execute("DROP TABLE processed")
+            self.conn.execute("DROP TABLE IF EXISTS contents")
+
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS processed (
+                                 config TEXT NOT NULL,
+                                 tweet_id TEXT NOT NULL,
+                                 content_hash TEXT NOT NULL,
+                                 PRIMARY KEY (config, tweet_id))""")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS contents (
+                                 content_hash TEXT PRIMARY KEY,
+                                 clean_tweet TEXT NOT NULL)""")
+        self.conn.commit()
+
+    def _select(self, query, keys, params = ()):
+        return dict(select_in(self.conn, query, keys, params))
+
+    def lookup_ids(self, tweet_ids, config = ""):
+        """
+        Function to get the content hash of tweets already processed.
+
+        Inputs:
+            - tweet_ids: Iterable of tweet ids.
+            - config: Hash of the cleaning settings (see config_hash).
+
+        Outputs: Dictionary tweet_id --> content_hash (only ids found).
+        """
+
+        return self._select("SELECT tweet_id, content_hash FROM processed WHERE config = ? AND tweet_id IN ({})",
+                            tweet_ids, (config,))
+
+    def lookup_hashes(self, hashes):
+        """
+        Function to get the clean tweet of contents already processed.
+
+        Inputs: Iterable of content hashes.
+
+        Outputs: Dictionary content_hash --> clean tweet (only hashes found).
+        """
+
+        found = self._select("SELECT content_hash, clean_tweet FROM contents WHERE content_hash IN ({})", hashes)
+
+        return {key: json.loads(value) for key, value in found.items()}
+
+    def store(self, ids, contents, config = ""):
+        """
+        Function to store processed tweets.
+
+        Inputs:
+            - ids: Dictionary tweet_id --> content_hash.
+            - contents: Dictionary content_hash --> clean tweet.
+            - config: Hash of the cleaning settings (see config_hash).
+        """
+
+        self.conn.executemany("INSERT OR IGNORE INTO contents VALUES (?, ?)",
+                              [(key, json.dumps(value)) for key, value in contents.items()])
+        self.conn.executemany("INSERT OR REPLACE INTO processed VALUES (?, ?, ?)",
+                              [(config, tweet_id, key) for tweet_id, key in ids.items()])
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def clean_incremental(pdf, pre_processor, index, method = "lemmatizeWords"):
+    """
+    Function to clean tweets reusing the results of previous runs. Only
+    tweets whose id is not in the index and whose content (text and
+    language) has never been cleaned with the same settings (method,
+    regex dict and tokenizer) go through the PreProcessor, and each
+    distinct content is cleaned once.
+
+    Inputs:
+        - pdf: Pandas dataframe with the following columns:
+            - tweet_id: Tweet's id.
+            - text: Raw tweet.
+            - lang: Tweet's language.
+        - pre_processor: PreProcessor object.
+        - index: IngestIndex object.
+        - method: PreProcessor method used to clean the tweets.
+
+    Outputs:
+        - pdf: The same dataframe with the "clean_tweet" column.
+        - stats: Dictionary with the number of rows, rows already indexed
+                 (same id), rows with an already cleaned content, rows
+                 actually cleaned and contents that got the clean tweet of
+                 a near duplicate (they are not stored in the index).
+    """
+
+    tweet_ids = pdf["tweet_id"].astype(str).tolist()
+    config = config_hash(pre_processor, method)
+
+    # content hash of tweets already processed
+    # with these settings, and of the new ones
+    known_ids = index.lookup_ids(tweet_ids, config)
+    hashes = [known_ids[tweet_id] if tweet_id in known_ids else content_hash(text, lang, config)
+              for tweet_id, text, lang in zip(tweet_ids, pdf["text"].values, pdf["lang"].values)]
+
+    # clean tweets of contents already processed
+    cleaned = index.lookup_hashes(set(hashes))
+
+    # one row per content that has never been cleaned
+    new_rows = {}
+    for position, key in enumerate(hashes):
+        if key not in cleaned and key not in new_rows:
+            new_rows[key] = position
+
+    new_contents = {}
+    near_duplicates = set()
+    if new_rows:
+        sample = pdf.iloc[list(new_rows.values())][["tweet_id", "text", "lang"]].reset_index(drop = True)
+        sample = getattr(pre_processor, method)(sample)
+        new_contents = dict(zip(new_rows.keys(), sample["clean_tweet"].tolist()))
+        cleaned.update(new_contents)
+
+        # contents that got the clean tweet of a near duplicate
+        # (see NearDuplicateIndex) are not stored, so a wrong
+        # merge only lasts for this run
+        if "near_duplicate" in sample.columns:
+            near_duplicates = {key for key, near in zip(new_rows.keys(), sample["near_duplicate"]) if near}
+
+    index.store({tweet_id: key for tweet_id, key in zip(tweet_ids, hashes)
+                 if tweet_id not in known_ids and key not in near_duplicates},
+                {key: value for key, value in new_contents.items() if key not in near_duplicates},
+                config)
+
+    pdf["clean_tweet"] = [cleaned[key] for key in hashes]
+
+    stats = {"rows": len(hashes),
+             "known_ids": len(known_ids),
+             "reused_contents": sum(tweet_id not in known_ids and key not in new_contents
+                                    for tweet_id, key in zip(tweet_ids, hashes)),
+             "cleaned": len(new_contents),
+             "near_duplicates": len(near_duplicates)}
+
+    return pdf, stats
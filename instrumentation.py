@@ -0,0 +1,214 @@
+# Libraries
+import io
+import os
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# peak memory of the process (not available on Windows)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class RunReport:
+    """
+    Record of where the time goes in a run. Every instrumented stage
+    (http requests, page decoding, PreProcessor stages, ...) adds its
+    wall time, rows and bytes; caches can be registered to report their
+    hit rates. A run can optionally be profiled with cProfile and
+    tracemalloc.
+    """
+
+    def __init__(self, profile = False, trace_memory = False):
+
+        self.stages = {}
+        self.caches = {}
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+        # cProfile
+        self.profiler = cProfile.Profile() if profile else None
+        if self.profiler is not None:
+            self.profiler.enable()
+
+        # tracemalloc (peak memory of python objects by stage)
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def add(self, name, seconds, rows = 0, bytes = 0, peak_memory = None):
+        """
+        Function to add a measure to a stage.
+
+        Inputs:
+            - name: Name of the stage.
+            - seconds: Wall time.
+            - rows: Number of rows processed.
+            - bytes: Number of bytes fetched.
+            - peak_memory: Peak memory (bytes) traced during the stage.
+        """
+
+        with self._lock:
+            stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "rows": 0, "bytes": 0,
+                                                  "peak_memory": 0})
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+            stage["rows"] += rows
+            stage["bytes"] += bytes
+            if peak_memory is not None:
+                stage["peak_memory"] = max(stage["peak_memory"], peak_memory)
+
+    @contextmanager
+    def stage(self, name, rows = 0, bytes = 0):
+        """
+        Context manager to measure a stage. The yielded dictionary can be
+        updated with the rows and bytes known at the end of the stage.
+
+        e.g.
+            with report.stage("http") as record:
+                response = ...
+                record["bytes"] = len(response.content)
+        """
+
+        record = {"rows": rows, "bytes": bytes}
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if self.trace_memory and tracemalloc.is_tracing() else None
+            self.add(name, seconds, record["rows"], record["bytes"], peak)
+
+    def register_cache(self, name, stats):
+        """
+        Function to register a cache.
+
+        Inputs:
+            - name: Name of the cache.
+            - stats: Function that returns a dictionary with (at least)
+                     the number of hits and misses of the cache.
+        """
+
+        with self._lock:
+            self.caches[name] = stats
+
+    def report(self, top = 30):
+        """
+        Function to create the report of the run.
+
+        Inputs:
+            - top: Number of functions listed in the profile.
+
+        Outputs: Dictionary (json serializable).
+        """
+
+        with self._lock:
+            stages = {name: dict(stage) for name, stage in self.stages.items()}
+            caches = dict(self.caches)
+
+        for stage in stages.values():
+            stage["rows_per_sec"] = stage["rows"] / stage["seconds"] if stage["seconds"] else None
+
+        cache_stats = {}
+        for name, stats in caches.items():
+            values = dict(stats())
+            lookups = values.get("hits", 0) + values.get("misses", 0)
+            values["hit_rate"] = values.get("hits", 0) / lookups if lookups else None
+            cache_stats[name] = values
+
+        result = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+                  "wall_seconds": time.perf_counter() - self._start,
+                  "stages": stages,
+                  "caches": cache_stats,
+                  "peak_rss_mb": None,
+                  "peak_traced_mb": None}
+
+        # ru_maxrss is in kilobytes on linux
+        if resource is not None:
+            result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        # peak memory traced by tracemalloc during the stages
+        peaks = [stage["peak_memory"] for stage in stages.values() if stage["peak_memory"]]
+        if peaks:
+            result["peak_traced_mb"] = max(peaks) / 2 ** 20
+
+        if self.profiler is not None:
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream = stream).sort_stats("cumulative").print_stats(top)
+            result["profile"] = stream.getvalue()
+
+        return result
+
+    def stop(self):
+        """
+        Function to stop the profilers.
+        """
+
+        if self.profiler is not None:
+            self.profiler.disable()
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self.trace_memory = False
+
+    def save(self, path):
+        """
+        Function to store the report as a json file (and the cProfile
+        stats next to it, if the run was profiled).
+        """
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        report = self.report()
+
+        with open(path, "w") as f:
+            json.dump(report, f, indent = 2, default = str)
+
+        if self.profiler is not None:
+            self.profiler.dump_stats(os.path.splitext(path)[0] + ".prof")
+
+        return report
+
+
+# report of the current run
+_current = RunReport()
+
+
+def current_report():
+    """
+    Function to get the report of the current run.
+    """
+
+    return _current
+
+
+def start_run(profile = False, trace_memory = False):
+    """
+    Function to start a new run report (e.g. at the beginning of a
+    script). Instrumented code records into it from then on.
+
+    Inputs:
+        - profile: Wrap the run in cProfile.
+        - trace_memory: Trace the peak memory of each stage with tracemalloc.
+
+    Outputs: RunReport object.
+    """
+
+    global _current
+
+    _current.stop()
+    _current = RunReport(profile = profile, trace_memory = trace_memory)
+
+    return _current
@@ -0,0 +1,284 @@
+# Libraries
+import zlib
+import numpy as np
+from collections import OrderedDict
+
+
+def shingles(text, size = 2):
+    """
+    Function to get the shingles of a text (groups of consecutive words).
+
+    Inputs:
+        - text: A string without noise (output of removeNoise).
+        - size: Number of words per shingle.
+
+    Outputs: Set of shingles (a text shorter than the size is a single
+             shingle, an empty text has none).
+    """
+
+    words = text.split()
+
+    return {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))} if words else set()
+
+
+def _lsh_params(num_perm, threshold):
+    """
+    Function to choose the bands of the LSH index. Two texts with
+    similarity s share a band (and they are compared) with probability
+    1 - (1 - s^r)^b. The bands are chosen to minimize the texts compared
+    below the threshold plus the texts missed above it.
+
+    Outputs: Tuple (bands, rows per band).
+    """
+
+    similarity = np.linspace(0, 1, 201)
+    errors = {}
+
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            probability = 1 - (1 - similarity ** rows) ** bands
+            errors[(bands, rows)] = np.trapz(np.where(similarity < threshold, probability, 0), similarity) + \
+                                    np.trapz(np.where(similarity < threshold, 0, 1 - probability), similarity)
+
+    return min(errors, key = errors.get)
+
+
+class NearDuplicateIndex:
+    """
+    Index (MinHash + LSH) of tweets that are almost the same after
+    removing their noise, e.g. copies of a viral tweet with a word
+    changed that are not formal retweets. Every new text is compared
+    with the representatives already indexed (of the same language).
+    If it is similar enough to one of them, it is a member of its
+    cluster and it gets the results of the representative, otherwise
+    it becomes a new representative. Only representatives go through
+    the expensive stages (translate, normalize, tokenize and stem or
+    lemmatize). The index keeps the clusters of the max_contents most
+    recently seen contents, so a long-lived index does not keep every
+    tweet it has seen.
+
+    e.g.
+        index = NearDuplicateIndex(threshold = 0.6)
+        pre_processor = PreProcessor(near_duplicates = index)
+    """
+
+    def __init__(self, threshold = 0.6, num_perm = 128, shingle_size = 2, bands = None, seed = 0,
+                 max_contents = 100000):
+
+        # minimum (estimated) Jaccard similarity between the
+        # shingles of a member and its representative. A word
+        # changed in a tweet of 10 words is about 0.65, a word
+        # added about 0.8, so 0.7 misses most of the one word
+        # edits. In bench_near_duplicates 0.6 finds 84% of the
+        # copies (71% with 0.7), and tweets merged by mistake
+        # are almost only short tweets of a 5 words vocabulary
+        # (8 of 17500 tweets in en, es, pt and fr).
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+        # maximum number of distinct contents (representatives
+        # and members) kept (None = no limit). The least recently
+        # used clusters are removed, so a later copy of one of
+        # them becomes a new representative.
+        self.max_contents = max_contents
+
+        # bands of the LSH index (chosen from the threshold by default)
+        self.bands, self.rows = (bands, num_perm // bands) if bands else _lsh_params(num_perm, threshold)
+
+        # hash functions of the signatures (multiply-shift): the
+        # top 32 bits of a * x + b (mod 2^64), with a odd
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(0, 2 ** 63, size = num_perm, dtype = np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.randint(0, 2 ** 63, size = num_perm, dtype = np.uint64)
+
+        self.clear()
+
+    def clear(self):
+        """
+        Function to remove every representative (and the statistics).
+        """
+
+        # lang --> hash of a band --> ids of the representatives
+        self.buckets = {}
+
+        # text and signature of each representative (by id)
+        self.texts = {}
+        self.rep_signatures = {}
+
+        # (text, lang) --> id of its representative
+        self.assigned = {}
+
+        # id of each representative --> (lang, band keys, contents
+        # of the cluster), from the least to the most recently used
+        self.clusters = OrderedDict()
+        self._next_id = 0
+
+        # distinct contents that are new representatives
+        # and that are near duplicates of a representative
+        self.representatives = 0
+        self.near_duplicates = 0
+
+    def __len__(self):
+        return len(self.texts)
+
+    def signatures(self, texts):
+        """
+        Function to get the MinHash signatures of some texts. The hashes
+        of the shingles of many texts are computed together.
+
+        Inputs: List of strings.
+
+        Outputs: Numpy array (one row of num_perm integers per text) and
+                 a boolean array that tells which texts have shingles.
+        """
+
+        hashes, offsets = [], []
+        for text in texts:
+            offsets.append(len(hashes))
+            hashes.extend(zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text, self.shingle_size))
+
+        offsets = np.array(offsets, dtype = np.int64)
+        valid = np.diff(np.append(offsets, len(hashes))) > 0
+        signatures = np.zeros((len(texts), self.num_perm), dtype = np.uint32)
+
+        # (hashes x num_perm) values, minimum of every text
+        # (texts without shingles keep a row of zeros)
+        if hashes:
+            hashes = np.array(hashes, dtype = np.uint64)
+            values = (hashes[:, None] * self._a + self._b) >> np.uint64(32)
+            signatures[valid] = np.minimum.reduceat(values, offsets[valid], axis = 0)
+
+        return signatures, valid
+
+    def _band_keys(self, signatures):
+        # every band of rows is hashed into a single integer (the
+        # multipliers are different for every band, so a value
+        # identifies its band too)
+        bands = signatures[:, :self.bands * self.rows].reshape(-1, self.bands, self.rows).astype(np.uint64)
+
+        return (bands * self._a[:self.rows] + self._b[:self.bands, None]).sum(axis = 2).tolist()
+
+    def _assign(self, text, lang, signature, keys):
+        """
+        Function to get the representative of a new content (the content
+        itself if it is not similar enough to any representative).
+
+        Outputs: Id of the representative.
+        """
+
+        buckets = self.buckets.setdefault(lang, {})
+
+        # representatives that share a band with the text
+        candidates = {candidate for key in keys for candidate in buckets.get(key, ())}
+        if candidates:
+            candidates = sorted(candidates)
+            similarity = (np.stack([self.rep_signatures[c] for c in candidates]) == signature).mean(axis = 1)
+            best = int(similarity.argmax())
+
+            if similarity[best] >= self.threshold:
+                self.near_duplicates += 1
+                return candidates[best]
+
+        # new representative
+        rep_id = self._next_id
+        self._next_id += 1
+        self.texts[rep_id] = text
+        self.rep_signatures[rep_id] = signature
+        self.clusters[rep_id] = (lang, keys, [])
+        for key in keys:
+            buckets.setdefault(key, []).append(rep_id)
+
+        self.representatives += 1
+
+        return rep_id
+
+    def _evict(self):
+        """
+        Function to remove the least recently used clusters until the
+        index keeps at most max_contents contents.
+        """
+
+        while self.max_contents is not None and len(self.assigned) > self.max_contents:
+            rep_id, (lang, keys, contents) = self.clusters.popitem(last = False)
+
+            for content in contents:
+                del self.assigned[content]
+
+            buckets = self.buckets[lang]
+            for key in keys:
+                buckets[key].remove(rep_id)
+                if not buckets[key]:
+                    del buckets[key]
+
+            del self.texts[rep_id]
+            del self.rep_signatures[rep_id]
+
+    def deduplicate(self, texts, langs, block = 1000):
+        """
+        Function to replace every text by the text of its representative.
+        Texts are only compared with texts of the same language (their
+        translation depends on it). Contents seen in previous calls keep
+        their representative (while it is kept in the index).
+
+        Inputs:
+            - texts: List of strings without noise (output of removeNoise).
+            - langs: List with the language of each text.
+            - block: Number of signatures computed together.
+
+        Outputs: List with the text of the representative of each text
+                 (same order as the input).
+        """
+
+        assigned = self.assigned
+        clusters = self.clusters
+
+        # representative of every content of this call (clusters
+        # removed during the call are still used by it)
+        found = {}
+        new = []
+        for key in dict.fromkeys(zip(texts, langs)):
+            if key in assigned:
+                rep_id = assigned[key]
+                clusters.move_to_end(rep_id)
+                found[key] = self.texts[rep_id]
+
+            # contents without words are not indexed
+            elif isinstance(key[0], str):
+                new.append(key)
+
+        for i in range(0, len(new), block):
+            contents = new[i:i + block]
+            signatures, valid = self.signatures([text for text, lang in contents])
+            keys = self._band_keys(signatures)
+
+            for j, key in enumerate(contents):
+                if not valid[j]:
+                    continue
+
+                rep_id = self._assign(key[0], key[1], signatures[j], keys[j])
+                assigned[key] = rep_id
+                clusters[rep_id][2].append(key)
+                clusters.move_to_end(rep_id)
+                found[key] = self.texts[rep_id]
+
+            self._evict()
+
+        return [found.get(key, key[0]) for key in zip(texts, langs)]
+
+    def stats(self):
+        """
+        Function to get the index statistics. Hits are distinct contents
+        that reuse the results of a representative (the compute saved),
+        misses are representatives.
+
+        Outputs: Dictionary with the number of hits, misses, the hit
+                 rate and the number of representatives kept.
+        """
+
+        contents = self.near_duplicates + self.representatives
+
+        return {"hits": self.near_duplicates, "misses": self.representatives,
+                "hit_rate": self.near_duplicates / contents if contents else 0.0,
+                "size": len(self.texts), "bands": self.bands, "rows": self.rows,
+                "threshold": self.threshold}
@@ -0,0 +1,127 @@
+# Libraries
+import pandas as pd
+
+# use a fast json parser if it is installed
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+# Columns of each dataframe. Pages do not always
+# contain the same fields (e.g. places), so every
+# page is decoded into the same columns.
+TWEET_COLUMNS = ["tweet_id", "text", "created_at", "lang", "possibly_sensitive",
+                 "author_id", "geo_place_id", "type", "ref_tweet_id"]
+USER_COLUMNS = ["user_id", "name", "username", "location"]
+PLACE_COLUMNS = ["geo_place_id", "full_name", "name", "country"]
+
+
+class PageBatch:
+    """
+    Column buffers where the pages returned by the search end point are
+    decoded. Every page is parsed once and its fields are appended to a
+    list per column; dataframes are only created (and typed) when the
+    batch is flushed, so the construction cost is paid once for many
+    pages.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self._reset()
+
+    def _reset(self):
+        self.tweets = {col: [] for col in TWEET_COLUMNS}
+        self.users = {col: [] for col in USER_COLUMNS}
+        self.places = {col: [] for col in PLACE_COLUMNS}
+        self.has_places = False
+
+    def __len__(self):
+        return len(self.tweets["tweet_id"])
+
+    def add(self, page):
+        """
+        Function to decode a page into the column buffers.
+
+        Inputs: Page returned by the api (raw bytes/string or dictionary).
+        """
+
+        if isinstance(page, (bytes, bytearray, str)):
+            page = loads(page)
+
+        self.pages += 1
+        tweets = self.tweets
+        includes = page.get("includes", {})
+
+        for tweet in page.get("data", ()):
+
+            # Drop tweets with undefined language
+            lang = tweet.get("lang")
+            if lang == "und":
+                continue
+
+            # Get tweet's type and the referenced tweet id
+            refs = tweet.get("referenced_tweets")
+            ref = refs[0] if refs else {}
+
+            tweets["tweet_id"].append(str(tweet["id"]))
+            tweets["text"].append(tweet.get("text"))
+            tweets["created_at"].append(tweet.get("created_at"))
+            tweets["lang"].append(lang)
+            tweets["possibly_sensitive"].append(tweet.get("possibly_sensitive"))
+            tweets["author_id"].append(tweet.get("author_id"))
+            tweets["geo_place_id"].append(tweet.get("geo", {}).get("place_id"))
+            tweets["type"].append(ref.get("type"))
+            tweets["ref_tweet_id"].append(ref.get("id"))
+
+        for user in includes.get("users", ()):
+            self.users["user_id"].append(str(user["id"]))
+            for col in USER_COLUMNS[1:]:
+                self.users[col].append(user.get(col))
+
+        # Not all users enable their location when tweeting
+        if "places" in includes:
+            self.has_places = True
+            for place in includes["places"]:
+                self.places["geo_place_id"].append(place["id"])
+                for col in PLACE_COLUMNS[1:]:
+                    self.places[col].append(place.get(col))
+
+    def flush(self):
+        """
+        Function to create the dataframes of the pages decoded so far and
+        empty the buffers.
+
+        Outputs:
+            - tweets: Pandas dataframe with tweets (ids as strings and
+                      created_at as datetime).
+            - users: Pandas dataframe with users information.
+            - places: Pandas dataframe with places (empty if no tweet has
+                      a location).
+        """
+
+        tweets = pd.DataFrame(self.tweets, columns = TWEET_COLUMNS)
+        users = pd.DataFrame(self.users, columns = USER_COLUMNS)
+        places = pd.DataFrame(self.places, columns = PLACE_COLUMNS)
+
+        # from string to datetime
+        tweets["created_at"] = pd.to_datetime(tweets["created_at"], utc = True)
+
+        self._reset()
+        self.pages = 0
+
+        return tweets, users, places
+
+
+def decode_page(page):
+    """
+    Function to decode a single page.
+
+    Inputs: Page returned by the api (raw bytes/string or dictionary).
+
+    Outputs: Tuple (tweets, users, places) of dataframes.
+    """
+
+    batch = PageBatch()
+    batch.add(page)
+
+    return batch.flush()
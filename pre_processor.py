@@ -1,27 +1,92 @@
 # Libraries
-import re
-import nltk
-import unidecode
-import unicodedata
-import contractions
+import os
+import itertools
+import numpy as np
 import pandas as pd
-from collections import Counter
-from nltk.corpus import stopwords
-from googletrans import Translator
+import resources
+from concurrent.futures import ProcessPoolExecutor
+from token_cache import TokenCache
+from instrumentation import current_report
+from translation import NO_TRANSLATION
+from text_cleaner import clean_series, to_ascii, normalize_series, tokenize_series, split_sentences
+
+# nltk is only loaded when it is used (see resources)
+nltk = resources.lazy_import("nltk")
+
+# PreProcessor object of each worker process (parallel mode)
+_worker = None
+
+
+def _init_worker(kwargs):
+    """
+    Function to create the PreProcessor of a worker process. It is
+    called once per worker, so the stemmer, lemmatizer, stopwords
+    and translator are not sent with every chunk.
+    """
+    
+    global _worker
+    _worker = PreProcessor(**kwargs)
+    
+    # tokens computed by the worker are sent back with every chunk
+    _worker.lemma_cache.pop_new()
+    _worker.stem_cache.pop_new()
+
+
+def _process_chunk(method, pdf):
+    """
+    Function to run a PreProcessor method over a chunk of tweets
+    inside a worker process.
+    
+    Outputs: Tuple (processed chunk, dictionary with what the worker
+             learnt from the chunk: the counters of its near duplicate
+             index and the hits, misses and new tokens of its token
+             caches).
+    """
+    
+    index = _worker.near_duplicates
+    caches = {"lemma_cache": _worker.lemma_cache, "stem_cache": _worker.stem_cache}
+    
+    before = {name: (cache.hits, cache.misses) for name, cache in caches.items()}
+    if index is not None:
+        before["near_duplicates"] = (index.representatives, index.near_duplicates)
+    
+    pdf = getattr(_worker, method)(pdf)
+    
+    state = {name: (cache.hits - before[name][0], cache.misses - before[name][1], cache.pop_new())
+             for name, cache in caches.items()}
+    if index is not None:
+        state["near_duplicates"] = (index.representatives - before["near_duplicates"][0],
+                                    index.near_duplicates - before["near_duplicates"][1])
+    
+    return pdf, state
+
 
 class PreProcessor:
     
-    def __init__(self, regex_dict = None):
+    # stages of the pipeline (in order). stem and 
+    # lemmatize are alternative last stages.
+    STAGES = ("noise", "translate", "normalize", "tokenize", "stem", "lemmatize")
+    
+    # methods that can run in parallel mode --> last stage
+    PARALLEL_METHODS = {"stemWords": "stem", "lemmatizeWords": "lemmatize"}
+    
+    # tokenizers: "tweet" returns the same tokens as nltk, but
+    # most tweets are split with a single regex (see tokenize_text)
+    TOKENIZERS = ("tweet", "nltk")
+    
+    def __init__(self, regex_dict = None, translator = None, n_jobs = 1, chunks_per_job = 4,
+                 cache_stages = True, token_cache_size = 100000, token_cache_dir = None,
+                 tokenizer = "tweet", near_duplicates = None, stage_cache_size = 100000):
         
-        # creating classes
-        # stem
-        self.sb = nltk.stem.SnowballStemmer('english')
+        # the stemmer, lemmatizer, stopwords and default translator
+        # are shared by every PreProcessor of the process and they
+        # are created on first use (see the properties below), so 
+        # creating a PreProcessor is cheap.
         
-        # lemmatize
-        self.lemmatizer = nltk.stem.wordnet.WordNetLemmatizer()
-        
-        # translate
-        self.translator = Translator()
+        # translate (batched, cached and concurrent). A custom
+        # translation layer can be defined by the user, e.g. a
+        # BatchTranslator with a persistent TranslationCache
+        self._translator = translator
         
         # declare a default regex dict
         self.default_regex_dict = {'goo[o]*d':'good', '2morrow':'tomorrow', 'b4':'before', 'otw':'on the way',
@@ -34,10 +99,169 @@ class PreProcessor:
         # if no regex_dict defined by user, then use 
         # one by default. Else, concat two regex dicts
         if regex_dict:            
-            self.regex_dict = {**regex_dict, **default_regex_dict}
+            self.regex_dict = {**regex_dict, **self.default_regex_dict}
             
         else:
             self.regex_dict = self.default_regex_dict
+        
+        # word and sentence tokenizer
+        if tokenizer not in self.TOKENIZERS:
+            raise ValueError(f"Unknown tokenizer {tokenizer}. Available tokenizers: {self.TOKENIZERS}")
+        self.tokenizer = tokenizer
+        
+        # number of worker processes used by lemmatizeWords and
+        # stemWords. Every worker gets chunks_per_job chunks (on
+        # average) to balance the load.
+        self.n_jobs = n_jobs
+        self.chunks_per_job = chunks_per_job
+        
+        # results of each stage by input, so a text is only 
+        # processed once by every stage (see clearCache). Every
+        # stage keeps the stage_cache_size most recently used
+        # inputs (None = no limit), so a long-lived PreProcessor
+        # does not keep every tweet it has seen.
+        self.cache_stages = cache_stages
+        self.stage_cache_size = stage_cache_size
+        self.stage_cache = {}
+        
+        # rows received and rows actually computed by stage
+        self.stage_stats = {}
+        
+        # token --> lemma and token --> stem caches (they keep the
+        # token_cache_size most recently used tokens, None = no
+        # limit). If a folder is defined, caches are loaded from
+        # it (and can be saved with saveTokenCaches), so a run 
+        # reuses the vocabulary of the previous ones. In parallel
+        # mode, the tokens of the workers are added to them.
+        self.token_cache_size = token_cache_size
+        self.token_cache_dir = token_cache_dir
+        cache_path = lambda name: os.path.join(token_cache_dir, name) if token_cache_dir else None
+        self.lemma_cache = TokenCache(token_cache_size, path = cache_path("lemmas.json"))
+        self.stem_cache = TokenCache(token_cache_size, path = cache_path("stems.json"))
+        
+        # pool of worker processes of the parallel mode (created
+        # on the first call and kept until close is called)
+        self._pool = None
+        
+        # near duplicate index (see NearDuplicateIndex). If defined,
+        # tweets that are almost the same after removing their noise
+        # get the results of the first of them (their representative)
+        # and only representatives are translated, normalized, etc.
+        # In parallel mode, every worker gets a copy of the index
+        # (near duplicates are found among the tweets of a worker,
+        # and the index is kept while the pool is) and only its
+        # counters are added to this one.
+        self.near_duplicates = near_duplicates
+        
+        # token --> integer id shared by every call to bagOfWords
+        # (created on the first call, see vocabulary). It can be
+        # replaced by a Vocabulary loaded from a previous run.
+        self.vocabulary = None
+    
+    @property
+    def sb(self):
+        # stem
+        return resources.stemmer()
+    
+    @property
+    def lemmatizer(self):
+        # lemmatize
+        return resources.lemmatizer()
+    
+    @property
+    def stop_words(self):
+        # English stopwords
+        return resources.stop_words()
+    
+    @property
+    def translator(self):
+        # translate
+        return self._translator if self._translator is not None else resources.translator()
+    
+    def _workers(self):
+        """
+        Function to get the pool of worker processes. It is created on
+        the first call and reused by the next ones, so the workers (and
+        their stemmer, lemmatizer, translator and caches) are only
+        started once. Workers are created with the settings of the
+        PreProcessor at that moment.
+        """
+        
+        if self._pool is None:
+            # arguments to create the PreProcessor of each worker
+            kwargs = {"regex_dict": self.regex_dict, "translator": self._translator, 
+                      "cache_stages": self.cache_stages, "stage_cache_size": self.stage_cache_size,
+                      "token_cache_size": self.token_cache_size,
+                      "token_cache_dir": self.token_cache_dir, "tokenizer": self.tokenizer,
+                      "near_duplicates": self.near_duplicates}
+            
+            self._pool = ProcessPoolExecutor(max_workers = self.n_jobs, initializer = _init_worker,
+                                             initargs = (kwargs,))
+        
+        return self._pool
+    
+    def close(self):
+        """
+        Function to stop the worker processes of the parallel mode.
+        """
+        
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def runParallel(self, pdf, method):
+        """
+        Function to run a method over a dataframe using a pool of
+        processes. The dataframe is split into chunks that are
+        processed by the workers and then put back together in the
+        same order. The pool is kept between calls (see close).
+        
+        Inputs:
+            - pdf: Pandas dataframe with raw strings.
+            - method: Name of the method to run (e.g. "lemmatizeWords").
+        
+        Outputs: Pandas dataframe returned by the method.
+        """
+        
+        n_chunks = min(self.n_jobs * self.chunks_per_job, pdf.shape[0])
+        if n_chunks <= 1:
+            # run it in this process (calling the method again
+            # would come back to the parallel mode)
+            return self.runPipeline(pdf, until = self.PARALLEL_METHODS[method])
+        
+        # rows are grouped by language (once), so the tweets of a
+        # language are sent to the same workers and translated in
+        # fewer batches. The original order is restored at the end.
+        order = np.argsort(pd.factorize(pdf.lang)[0], kind = "stable")
+        grouped = pdf.iloc[order]
+        
+        # chunk limits
+        size = -(-pdf.shape[0] // n_chunks)
+        chunks = [grouped.iloc[i:i + size] for i in range(0, pdf.shape[0], size)]
+        
+        # stages run inside the workers are measured as a whole
+        with current_report().stage(f"preprocessor.parallel.{method}", rows = pdf.shape[0]):
+            results, states = zip(*self._workers().map(_process_chunk, [method] * len(chunks), chunks))
+        
+        # tokens computed by the workers are added to the caches of
+        # this process (so saveTokenCaches stores them), and the near
+        # duplicates they found are counted in its index (see stats)
+        for state in states:
+            for name in ("lemma_cache", "stem_cache"):
+                hits, misses, new = state[name]
+                getattr(self, name).update(new, hits = hits, misses = misses)
+            
+            if self.near_duplicates is not None:
+                self.near_duplicates.representatives += state["near_duplicates"][0]
+                self.near_duplicates.near_duplicates += state["near_duplicates"][1]
+        
+        return pd.concat(results).iloc[np.argsort(order)]
     
     def translate_twt(self, pdf):
         """
@@ -54,32 +278,314 @@ class PreProcessor:
                  in googletrans api to English.
         """
 
-        # Check if the language of the tweet is either undefined or English
-        # to avoid translation.
-        if pdf["lang"] == "und" or pdf["lang"] == "en":
-            pdf["translated_tweet"] = pdf["clean_tweet"]
+        # Languages that do not need a translation (English or
+        # undefined), language codes and errors are handled by
+        # the translation layer.
+        pdf["translated_tweet"] = self.translator.translate([pdf["clean_tweet"]], [pdf["lang"]])[0]
+                
+        return pdf["translated_tweet"]
 
-        # Check if tweet is in Hindi. The code of Hindi language is "hi", but 
-        # Twitter has defined the code as "in".
-        elif pdf["lang"] == "in":
-            pdf["translated_tweet"] = self.translator.translate(pdf["clean_tweet"], src = "hi", dest = "en").text
+    
+    def _runStage(self, stage, keys, function):
+        """
+        Function to run a stage of the pipeline. The stage is only
+        computed once for each distinct input (duplicated tweets are
+        processed once), and results are kept in the stage cache so
+        later calls can reuse them (up to stage_cache_size inputs per
+        stage, the least recently used ones are removed first).
+        
+        Inputs:
+            - stage: Name of the stage.
+            - keys: List with the input of each row (hashable).
+            - function: Function that receives a list of distinct inputs
+                        and returns a list with their outputs.
+        
+        Outputs: List with the output of each row.
+        """
+        
+        cache = self.stage_cache.setdefault(stage, {}) if self.cache_stages else {}
+        
+        with current_report().stage(f"preprocessor.{stage}", rows = len(keys)):
             
-        # Check if tweet is in Chinese. 
-        # The api supports simplified and traditional chinese.
-        elif pdf["lang"] == "zh":
-            pdf["translated_tweet"] = self.translator.translate(pdf["clean_tweet"], src = "zh-cn", dest = "en").text
-
-        # For any other language the translator should work just fine, so the
-        # api should work with the language detected by Twitter.
+            # distinct inputs that have not been computed yet
+            distinct = dict.fromkeys(keys)
+            missing = [key for key in distinct if key not in cache]
+            if missing:
+                cache.update(zip(missing, function(missing)))
+            
+            values = [cache[key] for key in keys]
+            
+            # inputs of this call become the most recently used (the
+            # dict keeps the insertion order) and the oldest ones are
+            # removed
+            if self.cache_stages and self.stage_cache_size is not None:
+                if len(missing) < len(distinct):
+                    missing = set(missing)
+                    for key in distinct:
+                        if key not in missing:
+                            cache[key] = cache.pop(key)
+                
+                for key in list(itertools.islice(cache, max(len(cache) - self.stage_cache_size, 0))):
+                    del cache[key]
+        
+        stats = self.stage_stats.setdefault(stage, {"rows": 0, "computed": 0})
+        stats["rows"] += len(keys)
+        stats["computed"] += len(missing)
+        
+        return values
+    
+    def _noise(self, pdf):
+        # lower case, accented characters, html tags, usernames,
+        # hashtags, punct marks, links and white spaces are all
+        # removed in a single traversal of the tweets
+        return self._runStage("noise", list(pdf.text.values), lambda texts: clean_series(pd.Series(texts)))
+    
+    def _deduplicate(self, pdf, texts):
+        # replace near duplicates by their representative, so the
+        # next stages compute them once (see _runStage)
+        with current_report().stage("preprocessor.near_duplicates", rows = len(texts)):
+            return self.near_duplicates.deduplicate(texts, list(pdf.lang.values))
+    
+    def _translate(self, pdf, texts):
+        # English and undefined tweets (most of them) do not need a
+        # translation, and the output of the noise stage is already
+        # ASCII, so they are returned as they are without going
+        # through the translation layer.
+        langs = pdf.lang.values
+        positions = np.flatnonzero(~pd.Series(langs, dtype = object).isin(NO_TRANSLATION).values)
+        if not len(positions):
+            return list(texts)
+        
+        # Translate the rest of the tweets. Tweets are grouped by
+        # language and translated in batches (the batches of every
+        # language are sent concurrently, see BatchTranslator).
+        # Then, normalize accented charcaters and other strange 
+        # characters returned by the translator.
+        def translate(keys):
+            translated = self.translator.translate([text for text, lang in keys], [lang for text, lang in keys])
+            return list(to_ascii(pd.Series(translated, dtype = object)))
+        
+        translated = self._runStage("translate", [(texts[i], langs[i]) for i in positions], translate)
+        
+        # put translated tweets back in their rows
+        results = list(texts)
+        for i, text in zip(positions, translated):
+            results[i] = text
+        
+        return results
+    
+    def _normalize(self, texts):
+        # expand contractions, normalize words and
+        # remove stopwords in a single pass
+        return self._runStage("normalize", texts, 
+                              lambda keys: normalize_series(pd.Series(keys, dtype = object), 
+                                                            self.regex_dict, self.stop_words))
+    
+    def _tokenize(self, texts):
+        # Use word_tokenize method (or the tweet tokenizer)
+        # to split the string into individual words and 
+        # keep only unique elements (in the same order, so 
+        # results do not depend on the hash seed)
+        if self.tokenizer == "tweet":
+            tokenize = lambda keys: tokenize_series(pd.Series(keys, dtype = object))
         else:
-            try:
-                pdf["translated_tweet"] = self.translator.translate(pdf["clean_tweet"], src = pdf["lang"], 
-                                                                    dest = "en").text
-            except (TypeError, ValueError):
-                pdf["translated_tweet"] = pdf["clean_tweet"]
+            tokenize = lambda keys: [nltk.word_tokenize(text) for text in keys]
+        
+        # tokens are kept as tuples, so the next stages can use
+        # them as keys and rows never share a mutable list
+        return self._runStage("tokenize", texts, 
+                              lambda keys: [tuple(dict.fromkeys(words)) for words in tokenize(keys)])
+    
+    def _stem(self, tokens):
+        # reduct words to its root (the stem of each 
+        # token is computed once, see stem_cache)
+        stem = lambda word: self.stem_cache.lookup(word, self.sb.stem)
+        return self._runStage("stem", tokens, 
+                              lambda keys: [tuple(stem(word) for word in words) for words in keys])
+    
+    def _lemmatize(self, tokens):
+        # lematize word from list of tokenized words (the
+        # lemma of each token is computed once, see lemma_cache)
+        unw_chars = ["(", ")", "[", "]"]
+        lemmatize = lambda word: self.lemma_cache.lookup(word, self.lemmatizer.lemmatize)
+        return self._runStage("lemmatize", tokens,
+                              lambda keys: [tuple(lemmatize(word) for word in words 
+                                                  if word not in unw_chars) for words in keys])
+    
+    def runPipeline(self, pdf, until = "lemmatize"):
+        """
+        Function to run the pre-processing pipeline up to a given stage.
+        Stages are run in this order (each of them exactly once per row):
+        
+            noise --> translate --> normalize --> tokenize --> stem | lemmatize
+        
+        If there is a near duplicate index, rows get the output of their
+        representative from the translate stage on.
+        
+        Inputs:
+            - pdf: Pandas dataframe with the following columns:
+                - text: Raw tweet.
+                - lang: Tweet's language.
+            - until: Last stage to run (any of STAGES).
+        
+        Outputs: The same dataframe with the "clean_tweet" column (output of
+                 the last stage). With a near duplicate index, the
+                 "near_duplicate" column tells which rows got the output
+                 of another content.
+        """
+        
+        if until not in self.STAGES:
+            raise ValueError(f"Unknown stage {until}. Available stages: {self.STAGES}")
+        
+        # report the caches hit rates in the current run
+        self._registerCaches()
+        
+        # stem and lemmatize are alternative last stages
+        stages = self.STAGES[:self.STAGES.index(until) + 1]
+        stages = [stage for stage in stages if stage in ("noise", "translate", "normalize", "tokenize", until)]
+        
+        for stage in stages:
+            if stage == "noise":
+                values = self._noise(pdf)
+                if self.near_duplicates is not None and stage != stages[-1]:
+                    texts, values = values, self._deduplicate(pdf, values)
+                    pdf["near_duplicate"] = [isinstance(text, str) and text != representative
+                                             for text, representative in zip(texts, values)]
+            elif stage == "translate":
+                values = self._translate(pdf, values)
+            elif stage == "normalize":
+                values = self._normalize(values)
+            elif stage == "tokenize":
+                values = self._tokenize(values)
+            elif stage == "stem":
+                values = self._stem(values)
+            else:
+                values = self._lemmatize(values)
+        
+        # tokens are returned as lists (a new one per row, the
+        # tuples of the stage cache are shared by duplicates)
+        if stages[-1] in ("tokenize", "stem", "lemmatize"):
+            values = [list(words) for words in values]
+        
+        pdf["clean_tweet"] = values
+        
+        return pdf
+    
+    def _registerCaches(self):
+        """
+        Function to register the caches in the report of the current run
+        (see instrumentation).
+        """
+        
+        def stage_cache_stats():
+            rows = sum(stats["rows"] for stats in self.stage_stats.values())
+            computed = sum(stats["computed"] for stats in self.stage_stats.values())
+            return {"hits": rows - computed, "misses": computed}
+        
+        report = current_report()
+        report.register_cache("preprocessor.stage_cache", stage_cache_stats)
+        report.register_cache("preprocessor.lemma_cache", self.lemma_cache.stats)
+        report.register_cache("preprocessor.stem_cache", self.stem_cache.stats)
+        if self.near_duplicates is not None:
+            report.register_cache("preprocessor.near_duplicates", self.near_duplicates.stats)
+        
+        if hasattr(self.translator, "cache"):
+            report.register_cache("translation_cache", self.translator.cache.stats)
+    
+    def clearCache(self):
+        """
+        Function to remove the results kept in the stage cache.
+        """
+        
+        self.stage_cache = {}
+    
+    def saveTokenCaches(self, token_cache_dir = None):
+        """
+        Function to store the lemma and stem caches, so the next runs
+        can load them (warm start).
+        
+        Inputs:
+            - token_cache_dir: Folder where the caches will be stored (the
+                               one defined when creating the object by default).
+        """
+        
+        token_cache_dir = token_cache_dir if token_cache_dir is not None else self.token_cache_dir
+        
+        self.lemma_cache.save(os.path.join(token_cache_dir, "lemmas.json"))
+        self.stem_cache.save(os.path.join(token_cache_dir, "stems.json"))
+    
+    
+    def processChunks(self, source, method = "lemmatizeWords", chunksize = 100000, output = None,
+                      columns = None, schema = None):
+        """
+        Function to process an input that does not fit in memory. The 
+        input is read by chunks, every chunk is processed (in the same 
+        way as a whole dataframe) and written to the output before the
+        next one is read.
+        
+        Inputs:
+            - source: Path of a csv file, a Parquet file or a Parquet 
+                      dataset folder, a list of paths, or an iterable of
+                      dataframes.
+            - method: Name of the method to run (e.g. "lemmatizeWords").
+            - chunksize: Number of rows per chunk.
+            - output: Path of the output (.csv or Parquet file) or an object 
+                      with write and close methods (e.g. CsvSink, ParquetSink).
+                      Optional.
+            - columns: List of columns to read (all of them by default). It
+                       must include text and lang.
+            - schema: Arrow schema of a Parquet output (see ParquetFileSink,
+                      inferred from the first chunk by default).
+        
+        Outputs: Generator of processed chunks. Chunks are only processed
+                 (and written to the output) while the generator is
+                 consumed, see writeChunks to just write the output.
+        """
+        
+        from storage import iter_chunks, ParquetFileSink
+        
+        if isinstance(output, str):
+            if output.endswith(".csv"):
+                from collector import CsvSink
+                output = CsvSink(output)
+            else:
+                output = ParquetFileSink(output, schema = schema)
+        
+        try:
+            for pdf in iter_chunks(source, chunksize = chunksize, columns = columns):
+                pdf = getattr(self, method)(pdf)
                 
-        return pdf["translated_tweet"]
-
+                if output is not None:
+                    output.write(pdf)
+                
+                # results of previous chunks are not kept, so memory
+                # does not grow with the size of the input (token 
+                # caches are bounded)
+                self.clearCache()
+                
+                yield pdf
+        
+        finally:
+            if output is not None:
+                output.close()
+    
+    
+    def writeChunks(self, source, output, method = "lemmatizeWords", chunksize = 100000, columns = None,
+                    schema = None):
+        """
+        Function to process an input that does not fit in memory and
+        write the results to an output (see processChunks), without
+        keeping the processed chunks.
+        
+        Inputs: Same as processChunks (output is required).
+        
+        Outputs: Number of rows written.
+        """
+        
+        return sum(pdf.shape[0] for pdf in self.processChunks(source, method = method, chunksize = chunksize,
+                                                               output = output, columns = columns,
+                                                               schema = schema))
+    
     
     def removeNoise(self, pdf):
         """
@@ -92,40 +598,8 @@ class PreProcessor:
         spaces will be removed (or transform) if it's the case.
         """
         
-        # to lower case
-        pdf["clean_tweet"] = pdf.text.apply(lambda x: x.lower())
-        
-        # remove accented characters from string
-        # e.g. canción --> cancion
-        pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: unidecode.unidecode(x))
-        
-        # remove html tags 
-        pdf["clean_tweet"] = pdf.clean_tweet.str.replace(r'<[^<>]*>', '', regex = True)
-        
-        # remove (match with) usernames | hashtags | punct marks | links
-        # punct marks = ",.':!?;
-        # do not remove: ' 
-        # but remove: "
-        pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x:' '.join(re.sub("(@[A-Za-z0-9]+)|(#[A-Za-z0-9]+)|([-.,:_;])|(https?:\/\/.*[\r\n]*)",
-                                                                            "", x).split()).replace('"',''))
-                
-        # remove white spaces at the begining and at 
-        # the end of a string
-        pdf['clean_tweet'] = pdf.clean_tweet.apply(lambda x: x.lstrip(' '))
-        pdf['clean_tweet'] = pdf.clean_tweet.apply(lambda x: x.rstrip(' '))
-        
-        # Translate tweet
-        pdf["clean_tweet"] = pdf.apply(lambda x: self.translate_twt(x) \
-                                       if pd.isnull(x.clean_tweet) == False else x, axis = 1)   
-
-        # normalize string
-        # normalize accented charcaters and other strange characters
-        # NFKD if there are accented characters (????
-        pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: unicodedata.normalize('NFKC', x)\
-                                                   .encode('ASCII', 'ignore').decode("utf-8")\
-                                                   if (pd.isnull(x) == False and x != "") else x)
-        
-        return pdf
+        # noise --> translate
+        return self.runPipeline(pdf, until = "translate")
     
     
     def textNormalization(self, pdf):
@@ -139,25 +613,8 @@ class PreProcessor:
         (expected) correct form and with no stopwords.
         """
         
-        # remove noise first
-        pdf = self.removeNoise(pdf)
-
-        # expand contractions
-        # e.g. don't --> do not
-        pdf['clean_tweet'] = pdf.clean_tweet.apply(lambda x: contractions.fix(x))
- 
-        # Normalize words
-        pdf['clean_tweet'] = pdf.clean_tweet.replace(self.regex_dict)
-                
-        # get English stopwords    
-        stop_words = stopwords.words('english')
-        stopwords_dict = Counter(stop_words)
-        
-        # remove stopwords from string
-        pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: ' '.join([word for word in x.split()
-                                                                       if word not in stopwords_dict]))
-            
-        return pdf
+        # noise --> translate --> normalize
+        return self.runPipeline(pdf, until = "normalize")
     
     
     def wordTokenize(self, pdf):
@@ -171,24 +628,9 @@ class PreProcessor:
         
         Outputs: A list of tokenized words.
         """
-        # string normalized
-        pdf = self.textNormalization(pdf)
-        
-        # Use word_tokenize method to split the string
-        # into individual words. By default it returns
-        # a list.
-        pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: nltk.word_tokenize(x))        
         
-        # Using isalpha() will help us to only keep
-        # items from the alphabet (no punctuation
-        # marks). 
-        #pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: [word for word in x if word.isalpha()])
-        
-        # Keep only unique elements
-        pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: list(set(x)))
-
-        # return list of tokenized words by row
-        return pdf
+        # noise --> translate --> normalize --> tokenize
+        return self.runPipeline(pdf, until = "tokenize")
     
     def phraseTokenize(self, pdf):
         """
@@ -205,9 +647,11 @@ class PreProcessor:
         # pandas dataframe with strings normalized
         pdf = self.textNormalization(pdf)
         
-        # Use sent_tokenize method to split the string
-        # into sentences. By default it returns a list.
-        pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: nltk.sent_tokenize(x))   
+        # Use sent_tokenize method (or the tweet tokenizer) to
+        # split the string into sentences. By default it returns
+        # a list.
+        sent_tokenize = split_sentences if self.tokenizer == "tweet" else nltk.sent_tokenize
+        pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: sent_tokenize(x))   
         
         return pdf 
     
@@ -223,16 +667,12 @@ class PreProcessor:
         Output: Roots of each word of a given string.
         """
         
-        # pandas dataframe with strings normalized
-        pdf = self.textNormalization(pdf)
-        
-        # tokenized string (into words)
-        pdf = self.wordTokenize(data)
-            
-        # reduct words to its root    
-        pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: [self.sb.stem(word) for word in x])
+        # parallel mode
+        if self.n_jobs > 1:
+            return self.runParallel(pdf, "stemWords")
         
-        return pdf
+        # noise --> translate --> normalize --> tokenize --> stem
+        return self.runPipeline(pdf, until = "stem")
     
     
     def lemmatizeWords(self, pdf):
@@ -247,21 +687,48 @@ class PreProcessor:
         Output: Roots of each word of a given string (with better
         performance than in stemming).
         """
-        unw_chars = ["(", ")", "[", "]"]
         
-        # pandas dataframe with strings normalized
-        pdf = self.textNormalization(pdf)
+        # parallel mode
+        if self.n_jobs > 1:
+            return self.runParallel(pdf, "lemmatizeWords")
         
-        # list of tokenized words (from string)
         # Here it was decided to tokenize by words
         # rather than by sentences due to it might
         # be easier to find the correct roots
         # of each word
-        pdf = self.wordTokenize(pdf)
+        # noise --> translate --> normalize --> tokenize --> lemmatize
+        return self.runPipeline(pdf, until = "lemmatize")
+    
+    
+    def bagOfWords(self, pdf, method = "lemmatizeWords", vocabulary = None, id_col = "tweet_id"):
+        """
+        Function to get the tokens of each row as a bag-of-words matrix 
+        (integer ids over a shared vocabulary) instead of lists of strings.
+        The matrix can be used by scikit-learn/TensorFlow without another 
+        vectorizer pass.
+        
+        Inputs:
+            - pdf: Pandas dataframe with the text and lang columns.
+            - method: Name of the method that returns the tokens (e.g. 
+                      "lemmatizeWords", "stemWords" or "wordTokenize").
+            - vocabulary: Vocabulary object. By default the vocabulary of
+                          the PreProcessor is used, so every call (e.g. 
+                          chunks of processChunks) shares the same ids.
+            - id_col: Column with the id of each row (optional).
+        
+        Outputs: SparseTokens object (see vocabulary). The dataframe does
+                 not get the clean_tweet column.
+        """
+        
+        from vocabulary import Vocabulary, encode_tokens
+        
+        if vocabulary is None:
+            if self.vocabulary is None:
+                self.vocabulary = Vocabulary()
+            vocabulary = self.vocabulary
         
-        # lematize word from list of tokenized words
-        #lematized = [self.lemmatizer.lemmatize(word) for word in tokenized]
-        pdf["clean_tweet"] = pdf.clean_tweet.apply(lambda x: [self.lemmatizer.lemmatize(word) 
-                                                              for word in x if word not in unw_chars])
+        tokens = getattr(self, method)(pdf[["text", "lang"]].copy())["clean_tweet"]
+        ids = pdf[id_col] if id_col in pdf.columns else None
         
-        return pdf
\ No newline at end of file
+        with current_report().stage("preprocessor.bag_of_words", rows = pdf.shape[0]):
+            return encode_tokens(tokens, vocabulary, ids = ids)
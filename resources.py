@@ -0,0 +1,91 @@
+# Libraries
+import sys
+import threading
+import importlib.util
+
+# process-wide objects (name --> object), created on first use
+_shared = {}
+_lock = threading.RLock()
+
+
+def lazy_import(name):
+    """
+    Function to import a module on first use. The module object is
+    returned right away, but its code only runs when one of its
+    attributes is used, so importing the modules of this repo does
+    not load nltk, unidecode, contractions, etc. until they are needed.
+
+    Inputs: Name of the module (e.g. "nltk").
+
+    Outputs: Module object.
+    """
+
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name = name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+
+    return module
+
+
+def shared(name, factory):
+    """
+    Function to get a process-wide object. It is created on first use
+    and then reused by every PreProcessor of the process (e.g. all the
+    objects created by a short-lived batch worker).
+
+    Inputs:
+        - name: Name of the object.
+        - factory: Function used to create it.
+
+    Outputs: The object.
+    """
+
+    try:
+        return _shared[name]
+    except KeyError:
+        with _lock:
+            if name not in _shared:
+                _shared[name] = factory()
+            return _shared[name]
+
+
+def stemmer():
+    from nltk.stem.snowball import SnowballStemmer
+
+    return shared("stemmer", lambda: SnowballStemmer('english'))
+
+
+def lemmatizer():
+    from nltk.stem.wordnet import WordNetLemmatizer
+
+    return shared("lemmatizer", WordNetLemmatizer)
+
+
+def stop_words():
+    from nltk.corpus import stopwords
+
+    # a set is enough to check if a word is a stopword
+    return shared("stop_words", lambda: frozenset(stopwords.words('english')))
+
+
+def word_tokenizer():
+    from nltk.tokenize import NLTKWordTokenizer
+
+    return shared("word_tokenizer", NLTKWordTokenizer)
+
+
+def translator():
+    from translation import BatchTranslator
+
+    # the translation cache is shared too, so a text is only
+    # translated once per process
+    return shared("translator", BatchTranslator)
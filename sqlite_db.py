@@ -0,0 +1,78 @@
+# Libraries
+import os
+import sqlite3
+
+# sqlite limits the number of variables per query
+MAX_VARIABLES = 500
+
+
+def connect(path = ":memory:", check_same_thread = True):
+    """
+    Function to open a SQLite database used by the caches and stores of
+    the pipeline. The folder is created if needed, and databases on disk
+    use WAL mode, so the same database can be used by several processes
+    (readers do not block the writer).
+
+    Inputs:
+        - path: Path of the database (":memory:" for a temporary one).
+        - check_same_thread: False if the connection is shared by several
+                             threads (the caller must lock it).
+
+    Outputs: sqlite3 connection.
+    """
+
+    # create folder if needed
+    if path != ":memory:" and os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+
+    conn = sqlite3.connect(path, check_same_thread = check_same_thread, timeout = 30)
+
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode = WAL")
+
+    return conn
+
+
+def in_queries(query, keys, size = MAX_VARIABLES):
+    """
+    Generator to split a query with an IN list into queries with at most
+    size variables each.
+
+    Inputs:
+        - query: SQL query where "{}" is replaced by the placeholders of
+                 the IN list (e.g. "SELECT * FROM t WHERE id IN ({})").
+        - keys: List of values of the IN list.
+        - size: Maximum number of values per query.
+
+    Outputs: Tuples (query, values). A single query without values is
+             returned if there are no keys.
+    """
+
+    for i in range(0, max(len(keys), 1), size):
+        chunk = keys[i:i + size]
+        yield query.format(",".join("?" * len(chunk))), chunk
+
+
+def select_in(conn, query, keys, params = ()):
+    """
+    Function to run a query with an IN list of any length.
+
+    Inputs:
+        - conn: sqlite3 connection.
+        - query: SQL query where "{}" is replaced by the placeholders of
+                 the IN list.
+        - keys: Iterable of values of the IN list.
+        - params: Values of the placeholders before the IN list.
+
+    Outputs: List of rows.
+    """
+
+    keys = list(keys)
+    if not keys:
+        return []
+
+    rows = []
+    for chunk_query, chunk in in_queries(query, keys):
+        rows.extend(conn.execute(chunk_query, [*params, *chunk]).fetchall())
+
+    return rows
@@ -0,0 +1,332 @@
+# Libraries
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+# Schemas of the stored data. Ids are stored as strings (they
+# do not fit in a float and they are never used as numbers),
+# timestamps keep their time zone and tokens are stored as
+# lists of strings (no need to eval them back).
+TWEETS_SCHEMA = pa.schema([("tweet_id", pa.string()),
+                           ("text", pa.string()),
+                           ("created_at", pa.timestamp("us", tz = "UTC")),
+                           ("lang", pa.string()),
+                           ("possibly_sensitive", pa.bool_()),
+                           ("author_id", pa.string()),
+                           ("geo_place_id", pa.string()),
+                           ("type", pa.string()),
+                           ("ref_tweet_id", pa.string()),
+                           ("query", pa.string()),
+                           ("run_id", pa.string()),
+                           ("collection_date", pa.string())])
+
+CLEAN_TWEETS_SCHEMA = pa.schema([field if field.name != "possibly_sensitive" else pa.field("possibly_sensitive", pa.int8())
+                                 for field in TWEETS_SCHEMA] + [("clean_tweet", pa.list_(pa.string()))])
+
+USERS_SCHEMA = pa.schema([("user_id", pa.string()),
+                          ("name", pa.string()),
+                          ("username", pa.string()),
+                          ("location", pa.string()),
+                          ("run_id", pa.string()),
+                          ("collection_date", pa.string())])
+
+PLACES_SCHEMA = pa.schema([("geo_place_id", pa.string()),
+                           ("full_name", pa.string()),
+                           ("name", pa.string()),
+                           ("country", pa.string()),
+                           ("run_id", pa.string()),
+                           ("collection_date", pa.string())])
+
+# Type of every known column, used when the type of a column
+# can not be inferred from the data (see ParquetFileSink)
+COLUMN_TYPES = {field.name: field.type for schema in (PLACES_SCHEMA, USERS_SCHEMA, TWEETS_SCHEMA)
+                for field in schema}
+COLUMN_TYPES["clean_tweet"] = pa.list_(pa.string())
+
+# Partition columns of each dataset
+TWEETS_PARTITIONS = ("collection_date", "lang")
+USERS_PARTITIONS = ("collection_date",)
+PLACES_PARTITIONS = ("collection_date",)
+
+
+def _partitioning(schema, partition_cols):
+    return ds.partitioning(pa.schema([schema.field(col) for col in partition_cols]), flavor = "hive")
+
+
+def to_table(pdf, schema):
+    """
+    Function to convert a dataframe into an arrow table with a given
+    schema. Missing columns are filled with nulls and extra columns
+    are dropped.
+
+    Inputs:
+        - pdf: Pandas dataframe.
+        - schema: Arrow schema.
+
+    Outputs: Arrow table.
+    """
+
+    pdf = pdf.reindex(columns = schema.names)
+
+    # columns that were not in the dataframe (all nulls)
+    # can not be casted from float to other types
+    for col in schema.names:
+        if pdf[col].isnull().all():
+            pdf[col] = pd.Series([None] * pdf.shape[0], index = pdf.index, dtype = object)
+
+    return pa.Table.from_pandas(pdf, schema = schema, preserve_index = False)
+
+
+def write_frame(pdf, base_dir, schema, partition_cols, collection_date = None, run_id = None):
+    """
+    Function to append a dataframe to a partitioned Parquet dataset.
+    Every call writes new files, so previous data is never rewritten.
+
+    Inputs:
+        - pdf: Pandas dataframe.
+        - base_dir: Folder of the dataset.
+        - schema: Arrow schema of the dataset.
+        - partition_cols: Columns used to partition the data.
+        - collection_date: Date of the collection (string YYYY-MM-DD). If
+                           defined, it overrides the column of the dataframe.
+        - run_id: ID of the collection run. If defined, it overrides the
+                  column of the dataframe.
+    """
+
+    if pdf.empty:
+        return
+
+    pdf = pdf.copy()
+
+    if collection_date is not None:
+        pdf["collection_date"] = collection_date
+
+    if run_id is not None:
+        pdf["run_id"] = run_id
+
+    ds.write_dataset(to_table(pdf, schema), base_dir, format = "parquet",
+                     partitioning = _partitioning(schema, partition_cols),
+                     basename_template = "part-{}-{{i}}.parquet".format(uuid.uuid4().hex),
+                     existing_data_behavior = "overwrite_or_ignore")
+
+
+def open_dataset(base_dir, schema, partition_cols):
+    """
+    Function to open a partitioned Parquet dataset. Files are memory
+    mapped and nothing is read until the data is requested.
+
+    Inputs:
+        - base_dir: Folder of the dataset.
+        - schema: Arrow schema of the dataset.
+        - partition_cols: Columns used to partition the data.
+
+    Outputs: Arrow dataset.
+    """
+
+    return ds.dataset(base_dir, schema = schema, format = "parquet",
+                      partitioning = _partitioning(schema, partition_cols),
+                      filesystem = fs.LocalFileSystem(use_mmap = True))
+
+
+def read_frame(base_dir, schema, partition_cols, columns = None, dates = None, langs = None,
+               run_id = None, filter = None):
+    """
+    Function to read a partitioned Parquet dataset. Only the requested
+    columns are read, and partitions (and row groups) that do not match
+    the filters are skipped.
+
+    Inputs:
+        - base_dir: Folder of the dataset.
+        - schema: Arrow schema of the dataset.
+        - partition_cols: Columns used to partition the data.
+        - columns: List of columns to read (all of them by default).
+        - dates: List of collection dates to read (all of them by default).
+        - langs: List of languages to read (all of them by default).
+        - run_id: ID of the collection run to read (all of them by default).
+        - filter: Any other arrow expression, e.g.
+                  ds.field("created_at") >= pd.Timestamp("2022-11-20", tz = "UTC")
+
+    Outputs: Pandas dataframe.
+    """
+
+    if not os.path.exists(base_dir):
+        return pd.DataFrame(columns = columns if columns is not None else schema.names)
+
+    expression = filter
+    conditions = [("collection_date", dates), ("lang", langs), ("run_id", [run_id] if run_id else None)]
+
+    for col, values in conditions:
+        if values is not None:
+            condition = ds.field(col).isin(list(values))
+            expression = condition if expression is None else expression & condition
+
+    dataset = open_dataset(base_dir, schema, partition_cols)
+
+    return dataset.to_table(columns = columns, filter = expression).to_pandas()
+
+
+class ParquetSink:
+    """
+    Output that appends dataframes to a partitioned Parquet dataset.
+    Rows are buffered until there are enough of them, so small pages
+    do not end up as many tiny files.
+    """
+
+    def __init__(self, base_dir, schema, partition_cols, collection_date = None, run_id = None,
+                 buffer_rows = 10000):
+        self.path = base_dir
+        self.schema = schema
+        self.partition_cols = partition_cols
+        self.collection_date = collection_date
+        self.run_id = run_id
+        self.buffer_rows = buffer_rows
+        self.buffer = []
+        self.buffered = 0
+        self.rows = 0
+
+    def write(self, pdf):
+        """
+        Function to append a dataframe to the dataset.
+        """
+
+        if pdf is None or pdf.empty:
+            return
+
+        self.buffer.append(pdf)
+        self.buffered += pdf.shape[0]
+        self.rows += pdf.shape[0]
+
+        if self.buffered >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Function to write the buffered rows.
+        """
+
+        if self.buffer:
+            write_frame(pd.concat(self.buffer, ignore_index = True), self.path, self.schema,
+                        self.partition_cols, collection_date = self.collection_date, run_id = self.run_id)
+
+        self.buffer = []
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+
+
+class ParquetFileSink:
+    """
+    Output that appends dataframes to a single Parquet file (one row
+    group per dataframe). The schema is taken from the first dataframe
+    unless it is defined. Columns whose type can not be inferred from
+    the first dataframe (only nulls, e.g. geo_place_id, or only empty
+    lists, e.g. clean_tweet) get the type of COLUMN_TYPES, or string
+    (list of strings) if they are not known.
+    """
+
+    def __init__(self, path, schema = None):
+        self.path = path
+        self.schema = schema
+        self.writer = None
+        self.rows = 0
+
+    @staticmethod
+    def infer_schema(pdf):
+        """
+        Function to get the schema of the file from the first dataframe.
+
+        Inputs: Pandas dataframe.
+
+        Outputs: Arrow schema.
+        """
+
+        schema = pa.Table.from_pandas(pdf, preserve_index = False).schema
+
+        # the type of a column without values in the first dataframe
+        # (null, or double if it was read as NaN) can not store the
+        # values of the next ones
+        empty = set(pdf.columns[pdf.isnull().all()])
+
+        fields = []
+        for field in schema:
+            if field.name in empty or pa.types.is_null(field.type):
+                field = pa.field(field.name, COLUMN_TYPES.get(field.name, pa.string()))
+
+            elif pa.types.is_list(field.type) and pa.types.is_null(field.type.value_type):
+                field = pa.field(field.name, COLUMN_TYPES.get(field.name, pa.list_(pa.string())))
+
+            fields.append(field)
+
+        return pa.schema(fields)
+
+    def write(self, pdf):
+        """
+        Function to append a dataframe to the file.
+        """
+
+        if pdf is None or pdf.empty:
+            return
+
+        if self.schema is None:
+            self.schema = self.infer_schema(pdf)
+
+        if self.writer is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok = True)
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+
+        self.writer.write_table(to_table(pdf, self.schema))
+        self.rows += pdf.shape[0]
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def iter_chunks(source, chunksize = 100000, columns = None):
+    """
+    Function to read csv or Parquet inputs by chunks, so they do not
+    need to fit in memory.
+
+    Inputs:
+        - source: Path of a csv file, a Parquet file or a folder with a
+                  Parquet dataset, or a list of paths (read one after
+                  the other). Any other object is considered an iterable
+                  of dataframes and is returned as it is.
+        - chunksize: Number of rows per chunk.
+        - columns: List of columns to read (all of them by default).
+
+    Outputs: Generator of pandas dataframes. The index of each chunk
+             continues the index of the previous one.
+    """
+
+    if isinstance(source, (str, os.PathLike)):
+        paths = [source]
+    elif isinstance(source, (list, tuple)) and all(isinstance(path, (str, os.PathLike)) for path in source):
+        paths = source
+    else:
+        yield from source
+        return
+
+    start = 0
+    for path in paths:
+        if str(path).endswith(".csv"):
+            # ids must be read as strings (they do not fit in a float)
+            dtype = {"tweet_id": str, "author_id": str, "geo_place_id": str, "ref_tweet_id": str}
+            chunks = pd.read_csv(path, chunksize = chunksize, usecols = columns, dtype = dtype)
+        else:
+            dataset = ds.dataset(path, format = "parquet", partitioning = "hive",
+                                 filesystem = fs.LocalFileSystem(use_mmap = True))
+            chunks = (batch.to_pandas() for batch in dataset.to_batches(columns = columns, batch_size = chunksize)
+                      if batch.num_rows)
+
+        for pdf in chunks:
+            pdf.index = pd.RangeIndex(start, start + pdf.shape[0])
+            start += pdf.shape[0]
+            yield pdf
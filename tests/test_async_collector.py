@@ -0,0 +1,92 @@
+# Libraries
+import pytest
+import pandas as pd
+from collector import Checkpoint
+from async_collector import AsyncTwitterClient, run_queries_async
+from benchmarks.fake_api import FakeTwitterAPI
+
+QUERIES = ["world cup", "qatar", "messi"]
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingClient(AsyncTwitterClient):
+    """
+    Client that fails after some requests (e.g. the collector was
+    killed).
+    """
+
+    def __init__(self, *args, pages = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pages = pages
+        self.calls = 0
+        self.closed = 0
+
+    async def search(self, query, next_token = None):
+        if self.calls == self.pages:
+            raise Crash()
+        self.calls += 1
+        return await super().search(query, next_token = next_token)
+
+    async def aclose(self):
+        self.closed += 1
+        await super().aclose()
+
+
+def collect(api, stored, **kwargs):
+    def handle_page(query, tweets, users, places):
+        stored.append(tweets)
+
+    client = kwargs.pop("client", None) or CrashingClient("token", url = api.url)
+    return run_queries_async(QUERIES, handle_page, client = client, **kwargs)
+
+
+def tweet_ids(stored):
+    return sorted(zip(*pd.concat(stored)[["query", "tweet_id"]].values.T))
+
+
+@pytest.mark.parametrize("pages_per_batch", [1, 2])
+def test_resume_from_checkpoint(tmp_path, pages_per_batch):
+    with FakeTwitterAPI(pages_per_query = 5, page_size = 20, latency = 0) as api:
+        expected = []
+        collect(api, expected)
+
+        checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+        checkpoint.save(run_id = "20221120")
+        stored = []
+
+        # the run crashes in the middle of the queries
+        with pytest.raises(Crash):
+            collect(api, stored, checkpoint = checkpoint, pages_per_batch = pages_per_batch,
+                    client = CrashingClient("token", url = api.url, pages = 7))
+
+        state = checkpoint.load()
+        assert state["run_id"] == "20221120"
+        saved = sum(progress["pages"] for progress in state["progress"].values())
+        assert 0 < saved < 5 * len(QUERIES)
+
+        # the next run only requests the pages that were not stored
+        requests = sum(api.requests.values())
+        pages = collect(api, stored, checkpoint = checkpoint, pages_per_batch = pages_per_batch)
+
+        assert pages == {query: 5 for query in QUERIES}
+        assert sum(api.requests.values()) - requests == 5 * len(QUERIES) - saved
+        assert tweet_ids(stored) == tweet_ids(expected)
+        assert checkpoint.load() is None
+
+
+@pytest.mark.parametrize("pages", [None, 4])
+def test_client_is_closed(pages):
+    with FakeTwitterAPI(pages_per_query = 3, page_size = 5, latency = 0) as api:
+        client = CrashingClient("token", url = api.url, pages = pages)
+
+        if pages is None:
+            collect(api, [], client = client)
+        else:
+            with pytest.raises(Crash):
+                collect(api, [], client = client)
+
+        assert client.closed == 1
+        assert client._session is None and client._executor is None
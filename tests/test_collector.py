@@ -0,0 +1,166 @@
+# Libraries
+import json
+import random
+import pytest
+import pandas as pd
+from collector import Checkpoint, create_dataframes, iter_pages, propagate_clean_tweets
+from page_decoder import TWEET_COLUMNS, USER_COLUMNS, PLACE_COLUMNS
+from twitter_client import TwitterClient
+from benchmarks.fake_api import FakeTwitterAPI
+from benchmarks.synthetic import make_pages
+from benchmarks.bench_page_decoder import json_normalize_page
+
+
+class Crash(Exception):
+    pass
+
+
+def crashing(fetch, pages):
+    """
+    Function to make a fetch function fail after some pages (e.g. the
+    collector was killed).
+    """
+
+    calls = []
+
+    def fetch_page(**kwargs):
+        if len(calls) == pages:
+            raise Crash()
+        calls.append(kwargs["next_token"])
+        return fetch(**kwargs)
+
+    return fetch_page
+
+
+def collect(pages, stored):
+    for tweets, users, places in pages:
+        stored.append(tweets)
+
+
+@pytest.mark.parametrize("pages_per_batch", [1, 2])
+def test_resume_from_checkpoint(tmp_path, pages_per_batch):
+    with FakeTwitterAPI(pages_per_query = 6, page_size = 20, latency = 0) as api:
+        client = TwitterClient("token", url = api.url)
+        expected = pd.concat([tweets for tweets, users, places in iter_pages("world cup", fetch = client.search)])
+
+        checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+        stored = []
+
+        # the run crashes while the fourth page is requested
+        with pytest.raises(Crash):
+            collect(iter_pages("world cup", checkpoint = checkpoint, fetch = crashing(client.search, 3),
+                               pages_per_batch = pages_per_batch), stored)
+
+        state = checkpoint.load()
+        assert state["query"] == "world cup"
+
+        # pages of a batch that was not stored are requested again
+        assert state["pages"] == 3 // pages_per_batch * pages_per_batch
+
+        # the next run starts after the last page stored
+        requests = api.requests["world cup"]
+        collect(iter_pages("world cup", checkpoint = checkpoint, fetch = client.search,
+                           pages_per_batch = pages_per_batch), stored)
+
+        assert api.requests["world cup"] - requests == 6 - state["pages"]
+        assert pd.concat(stored)["tweet_id"].tolist() == expected["tweet_id"].tolist()
+        assert checkpoint.load() is None
+
+
+def test_checkpoint_of_another_query_is_ignored(tmp_path):
+    with FakeTwitterAPI(pages_per_query = 3, page_size = 20, latency = 0) as api:
+        client = TwitterClient("token", url = api.url)
+        checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+        checkpoint.save(query = "qatar", next_token = "token2", pages = 2)
+
+        stored = []
+        collect(iter_pages("world cup", checkpoint = checkpoint, fetch = client.search), stored)
+
+        assert api.requests["world cup"] == 3
+        assert checkpoint.load() is None
+
+
+def comparable(pdf, columns):
+    # same columns, a row index and None for every null
+    pdf = pdf.reindex(columns = columns).reset_index(drop = True)
+    return pdf.astype(object).where(pdf.notnull(), None)
+
+
+def synthetic_pages(n = 2000, seed = 0):
+    """
+    Function to create pages with the optional fields of the api
+    missing in some tweets and in some pages.
+    """
+
+    rng = random.Random(seed)
+    pages = []
+
+    for i, raw in enumerate(make_pages(n, seed = seed)):
+        page = json.loads(raw)
+        for tweet in page["data"]:
+            if rng.random() < 0.1:
+                del tweet["possibly_sensitive"]
+
+        # a page without places (and without geo fields)
+        if i % 3 == 0:
+            page["includes"].pop("places", None)
+            for tweet in page["data"]:
+                tweet.pop("geo", None)
+
+        pages.append(json.dumps(page).encode("utf-8"))
+
+    return pages
+
+
+def test_create_dataframes_matches_json_normalize():
+    pages = synthetic_pages()
+    rows = 0
+
+    for page in pages:
+        expected = json_normalize_page(page)
+        output = create_dataframes(json.loads(page), "2022-11-20")
+
+        assert len(output) == (3 if "places" in json.loads(page)["includes"] else 2)
+        for pdf, reference, columns in zip(output, expected, (TWEET_COLUMNS, USER_COLUMNS, PLACE_COLUMNS)):
+            pd.testing.assert_frame_equal(comparable(pdf, columns), comparable(reference, columns))
+
+        assert output[0]["created_at"].dtype == expected[0]["created_at"].dtype
+        rows += output[0].shape[0]
+
+    # tweets with undefined language are dropped
+    assert 0 < rows < 2000
+
+
+def referencing_tweets():
+    return pd.DataFrame({"tweet_id": ["1", "2", "3", "4", "5", "6", "7", "1"],
+                         "type": [None, "retweeted", "quoted", "replied_to", "retweeted", "retweeted",
+                                  "retweeted", None],
+                         "ref_tweet_id": [None, "1", "1", "1", "404", "1", "2", None],
+                         "clean_tweet": [["messi", "goal"], None, None, None, None, ["own", "text"], None,
+                                         ["messi", "goal"]]})
+
+
+def test_retweets_get_the_clean_tweet_of_the_original():
+    tweets = propagate_clean_tweets(referencing_tweets())
+    clean = dict(zip(tweets.index, tweets["clean_tweet"]))
+
+    # retweet of a cleaned tweet
+    assert clean[1] == ["messi", "goal"]
+
+    # quotes and replies have their own text
+    assert clean[2] is None and clean[3] is None
+
+    # the original was not collected, or it is a retweet that was
+    # not cleaned when the mapping was built
+    assert pd.isnull(clean[4]) and pd.isnull(clean[6])
+
+    # retweets with a clean tweet keep it
+    assert clean[5] == ["own", "text"]
+    assert tweets.shape[0] == 8
+
+
+def test_other_types_can_be_propagated():
+    tweets = propagate_clean_tweets(referencing_tweets(), types = ("retweeted", "quoted"))
+
+    assert tweets["clean_tweet"].iloc[2] == ["messi", "goal"]
+    assert tweets["clean_tweet"].iloc[3] is None
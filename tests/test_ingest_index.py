@@ -0,0 +1,112 @@
+# Libraries
+import pytest
+import pandas as pd
+from sqlite_db import connect
+from pre_processor import PreProcessor
+from near_duplicates import NearDuplicateIndex
+from ingest_index import IngestIndex, config_hash, clean_incremental
+from translation import BatchTranslator, StubTranslator
+
+ORIGINAL = "argentina and france play the final of the world cup in qatar tomorrow"
+EDITED = "argentina and france play the final of the world cup in doha tomorrow"
+
+
+@pytest.fixture
+def stop_words(monkeypatch):
+    # the nltk stopwords corpus is not needed by these tests
+    monkeypatch.setattr(PreProcessor, "stop_words", frozenset(["the", "and", "of", "in"]))
+
+
+def make_pre_processor(near_duplicates = None):
+    return PreProcessor(translator = BatchTranslator(StubTranslator()), near_duplicates = near_duplicates)
+
+
+def make_tweets(texts, first_id = 0):
+    return pd.DataFrame({"tweet_id": [str(first_id + i) for i in range(len(texts))],
+                         "text": texts, "lang": "en"})
+
+
+def test_contents_are_cleaned_once(stop_words):
+    index = IngestIndex()
+    pdf, stats = clean_incremental(make_tweets([ORIGINAL, ORIGINAL, EDITED]), make_pre_processor(), index,
+                                   method = "stemWords")
+    assert stats == {"rows": 3, "known_ids": 0, "reused_contents": 0, "cleaned": 2, "near_duplicates": 0}
+
+    # same ids and a new id with a known content
+    pdf, stats = clean_incremental(make_tweets([ORIGINAL, ORIGINAL, EDITED, EDITED]), make_pre_processor(),
+                                   index, method = "stemWords")
+    assert stats == {"rows": 4, "known_ids": 3, "reused_contents": 1, "cleaned": 0, "near_duplicates": 0}
+    assert pdf["clean_tweet"].iloc[2] != pdf["clean_tweet"].iloc[0]
+
+
+def test_results_are_stored_by_method(stop_words, monkeypatch):
+    # lemmatizeWords needs the wordnet data
+    monkeypatch.setattr(PreProcessor, "lemmatizeWords", PreProcessor.stemWords)
+
+    index = IngestIndex()
+    pdf, stats = clean_incremental(make_tweets([EDITED]), make_pre_processor(), index, method = "stemWords")
+    assert stats["cleaned"] == 1
+
+    # same id and content, but another method
+    pdf, stats = clean_incremental(make_tweets([EDITED]), make_pre_processor(), index, method = "lemmatizeWords")
+    assert stats == {"rows": 1, "known_ids": 0, "reused_contents": 0, "cleaned": 1, "near_duplicates": 0}
+
+    # both results are kept
+    for method in ("stemWords", "lemmatizeWords"):
+        pdf, stats = clean_incremental(make_tweets([EDITED]), make_pre_processor(), index, method = method)
+        assert stats["known_ids"] == 1 and stats["cleaned"] == 0
+    assert len(index) == 2
+
+
+def test_results_are_stored_by_config(stop_words):
+    index = IngestIndex()
+    clean_incremental(make_tweets([ORIGINAL]), make_pre_processor(), index, method = "stemWords")
+
+    # another regex dict cleans the same content again
+    pre_processor = PreProcessor(regex_dict = {"qatar": "doha"}, translator = BatchTranslator(StubTranslator()))
+    pdf, stats = clean_incremental(make_tweets([ORIGINAL], first_id = 10), pre_processor, index,
+                                   method = "stemWords")
+    assert stats["reused_contents"] == 0 and stats["cleaned"] == 1
+
+    # and so does another tokenizer (the nltk one needs the punkt data)
+    assert config_hash(PreProcessor(tokenizer = "nltk"), "stemWords") != config_hash(PreProcessor(), "stemWords")
+
+    # the same settings reuse it
+    pdf, stats = clean_incremental(make_tweets([ORIGINAL], first_id = 20), make_pre_processor(), index,
+                                   method = "stemWords")
+    assert stats["reused_contents"] == 1 and stats["cleaned"] == 0
+
+
+def test_near_duplicates_are_not_stored(stop_words):
+    index = IngestIndex()
+    near_duplicates = NearDuplicateIndex()
+    pdf, stats = clean_incremental(make_tweets([ORIGINAL, EDITED]), make_pre_processor(near_duplicates),
+                                   index, method = "stemWords")
+
+    # the edited copy gets the clean tweet of the original in this run
+    assert near_duplicates.near_duplicates == 1
+    assert pdf["clean_tweet"].iloc[1] == pdf["clean_tweet"].iloc[0]
+    assert stats["near_duplicates"] == 1
+    assert len(index) == 1
+
+    # but it is cleaned on its own in a run without the index
+    pdf, stats = clean_incremental(make_tweets([ORIGINAL, EDITED]), make_pre_processor(), index,
+                                   method = "stemWords")
+    assert stats["known_ids"] == 1 and stats["cleaned"] == 1
+    assert "doha" in pdf["clean_tweet"].iloc[1] and "qatar" not in pdf["clean_tweet"].iloc[1]
+
+
+def test_indexes_without_settings_are_cleaned_again(stop_words, tmp_path):
+    path = str(tmp_path / "ingest_index.db")
+    conn = connect(path)
+    conn.execute("CREATE TABLE processed (tweet_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL)")
+    conn.execute("CREATE TABLE contents (content_hash TEXT PRIMARY KEY, clean_tweet TEXT NOT NULL)")
+    conn.execute("INSERT INTO processed VALUES ('0', 'old')")
+    conn.execute("""INSERT INTO contents VALUES ('old', '["stale"]')""")
+    conn.commit()
+    conn.close()
+
+    pdf, stats = clean_incremental(make_tweets([ORIGINAL]), make_pre_processor(), IngestIndex(path),
+                                   method = "stemWords")
+    assert stats["known_ids"] == 0 and stats["cleaned"] == 1
+    assert pdf["clean_tweet"].iloc[0] != ["stale"]
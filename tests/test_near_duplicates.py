@@ -0,0 +1,67 @@
+# Libraries
+import pytest
+import pandas as pd
+from pre_processor import PreProcessor
+from near_duplicates import NearDuplicateIndex
+from translation import BatchTranslator, StubTranslator
+
+ORIGINAL = "argentina and france play the final of the world cup in qatar tomorrow"
+EDITED = "argentina and france play the final of the world cup in doha tomorrow"
+
+
+def topics(n):
+    # tweets without a shingle in common
+    return [f"topic{i} is trending today with {i} tweets" for i in range(n)]
+
+
+def test_copies_get_the_representative():
+    index = NearDuplicateIndex()
+    texts = [ORIGINAL, EDITED, ORIGINAL, EDITED, "", "something else entirely"]
+
+    assert index.deduplicate(texts, ["en"] * 6) == [ORIGINAL, ORIGINAL, ORIGINAL, ORIGINAL, "",
+                                                     "something else entirely"]
+    assert (index.representatives, index.near_duplicates) == (2, 1)
+
+    # another language is another cluster
+    assert index.deduplicate([EDITED], ["es"]) == [EDITED]
+
+
+def test_least_recently_used_clusters_are_removed():
+    index = NearDuplicateIndex(max_contents = 4)
+    index.deduplicate([ORIGINAL, EDITED] + topics(2), ["en"] * 4)
+
+    # the original cluster is used again, so the topics are removed
+    index.deduplicate([ORIGINAL], ["en"])
+    index.deduplicate(topics(4)[2:], ["en"] * 2)
+
+    assert len(index.assigned) == 4 and len(index) == 3
+    assert sum(len(bucket) for buckets in index.buckets.values() for bucket in buckets.values()) == \
+           3 * index.bands
+    assert index.deduplicate([EDITED], ["en"]) == [ORIGINAL]
+
+    # removed contents are new representatives again
+    representatives = index.representatives
+    index.deduplicate(topics(1), ["en"])
+    assert index.representatives == representatives + 1
+
+
+def test_results_of_a_call_use_removed_clusters():
+    index = NearDuplicateIndex(max_contents = 1)
+
+    assert index.deduplicate([ORIGINAL, EDITED], ["en", "en"], block = 1) == [ORIGINAL, ORIGINAL]
+    assert len(index.assigned) <= 1
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_parallel_counters(monkeypatch, n_jobs):
+    monkeypatch.setattr(PreProcessor, "stop_words", frozenset(["the", "and", "of", "in"]))
+    pdf = pd.DataFrame({"text": [ORIGINAL, EDITED] * 4 + topics(8), "lang": "en"})
+
+    index = NearDuplicateIndex()
+    pre_processor = PreProcessor(translator = BatchTranslator(StubTranslator()), near_duplicates = index,
+                                 n_jobs = n_jobs, chunks_per_job = 1)
+    pre_processor.stemWords(pdf)
+
+    # every worker gets all the copies of a language
+    assert (index.representatives, index.near_duplicates) == (9, 1)
+    assert index.stats()["hits"] == 1
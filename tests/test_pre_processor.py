@@ -0,0 +1,100 @@
+# Libraries
+import pandas as pd
+from pre_processor import PreProcessor
+from benchmarks.synthetic import make_tweets
+from translation import BatchTranslator, StubTranslator
+
+
+def upper(computed):
+    def function(texts):
+        computed.extend(texts)
+        return [text.upper() for text in texts]
+    return function
+
+
+def test_stage_cache_is_bounded():
+    pre_processor = PreProcessor(stage_cache_size = 3)
+    computed = []
+
+    assert pre_processor._runStage("noise", ["a", "b", "a", "c"], upper(computed)) == ["A", "B", "A", "C"]
+    assert computed == ["a", "b", "c"]
+
+    # "a" is used again, so "b" is the least recently used input
+    pre_processor._runStage("noise", ["a", "d"], upper(computed))
+    assert list(pre_processor.stage_cache["noise"]) == ["c", "d", "a"]
+
+    assert pre_processor._runStage("noise", ["b", "a"], upper(computed)) == ["B", "A"]
+    assert computed == ["a", "b", "c", "d", "b"]
+    assert pre_processor.stage_stats["noise"] == {"rows": 8, "computed": 5}
+
+
+def test_calls_larger_than_the_stage_cache():
+    pre_processor = PreProcessor(stage_cache_size = 2)
+    pdf = pd.DataFrame({"text": ["Hello @user!", "GOAL https://t.co/x", "Hello @user!", "Qatar"],
+                        "lang": "en"})
+
+    output = pre_processor.runPipeline(pdf.copy(), until = "noise")
+    expected = PreProcessor(stage_cache_size = None).runPipeline(pdf.copy(), until = "noise")
+
+    assert output["clean_tweet"].tolist() == expected["clean_tweet"].tolist()
+    assert len(pre_processor.stage_cache["noise"]) == 2
+
+
+def test_unbounded_stage_cache():
+    pre_processor = PreProcessor(stage_cache_size = None)
+    pre_processor._runStage("noise", [str(i) for i in range(1000)], upper([]))
+
+    assert len(pre_processor.stage_cache["noise"]) == 1000
+
+
+def test_rows_do_not_share_token_lists(monkeypatch):
+    # the nltk stopwords corpus is not needed
+    monkeypatch.setattr(PreProcessor, "stop_words", frozenset(["the"]))
+    pre_processor = PreProcessor(translator = BatchTranslator(StubTranslator()))
+    pdf = pd.DataFrame({"text": ["Goal of the team", "Goal of the team"], "lang": "en"})
+
+    output = pre_processor.stemWords(pdf.copy())
+    output["clean_tweet"].iloc[0].append("MUTATED")
+
+    assert "MUTATED" not in output["clean_tweet"].iloc[1]
+    assert "MUTATED" not in pre_processor.stemWords(pdf.copy())["clean_tweet"].iloc[0]
+    assert all(isinstance(tokens, tuple) for tokens in pre_processor.stage_cache["stem"].values())
+
+
+def test_parallel_mode_matches_one_process(monkeypatch):
+    monkeypatch.setattr(PreProcessor, "stop_words", frozenset(["the", "el", "la"]))
+    pdf = make_tweets(300, seed = 1)[["text", "lang"]]
+
+    # an index that is not a range, with the languages mixed
+    pdf.index = [f"row{i}" for i in pdf.index[::-1]]
+
+    expected = PreProcessor(translator = BatchTranslator(StubTranslator())).stemWords(pdf.copy())
+
+    with PreProcessor(translator = BatchTranslator(StubTranslator()), n_jobs = 2) as pre_processor:
+        output = pre_processor.stemWords(pdf.copy())
+        pool = pre_processor._pool
+
+        # the pool is kept between calls
+        pd.testing.assert_frame_equal(pre_processor.stemWords(pdf.copy()), expected)
+        assert pre_processor._pool is pool
+
+    assert pre_processor._pool is None
+    pd.testing.assert_frame_equal(output, expected)
+    assert list(output.index) == list(pdf.index)
+
+
+def test_parallel_token_caches_are_saved(monkeypatch, tmp_path):
+    monkeypatch.setattr(PreProcessor, "stop_words", frozenset(["the"]))
+    pdf = pd.DataFrame({"text": ["players playing", "the finals", "playing finals", "goals"], "lang": "en"})
+
+    with PreProcessor(translator = BatchTranslator(StubTranslator()), n_jobs = 2,
+                      token_cache_dir = str(tmp_path)) as pre_processor:
+        pre_processor.stemWords(pdf)
+        stats = pre_processor.stem_cache.stats()
+        pre_processor.saveTokenCaches()
+
+    assert set(pre_processor.stem_cache.data) == {"players", "playing", "finals", "goals"}
+    assert stats["hits"] + stats["misses"] == 6
+
+    # a new PreProcessor loads the tokens of the workers
+    assert len(PreProcessor(token_cache_dir = str(tmp_path)).stem_cache) == 4
@@ -0,0 +1,23 @@
+# Libraries
+from sqlite_db import MAX_VARIABLES, connect, in_queries, select_in
+
+
+def test_connect_creates_folder_and_uses_wal(tmp_path):
+    conn = connect(str(tmp_path / "cache" / "test.db"))
+
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    conn.close()
+
+
+def test_select_in_splits_the_variables():
+    conn = connect()
+    conn.execute("CREATE TABLE t (lang TEXT, k INTEGER, v INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", [(lang, i, 2 * i) for lang in "ab" for i in range(1200)])
+
+    keys = list(range(0, 1500, 2))
+    rows = select_in(conn, "SELECT k, v FROM t WHERE lang = ? AND k IN ({})", keys, params = ["a"])
+
+    assert sorted(rows) == [(i, 2 * i) for i in keys if i < 1200]
+    assert select_in(conn, "SELECT k, v FROM t WHERE k IN ({})", []) == []
+    assert [len(chunk) for query, chunk in in_queries("{}", keys)] == [MAX_VARIABLES, len(keys) - MAX_VARIABLES]
+    assert list(in_queries("k IN ({})", [])) == [("k IN ()", [])]
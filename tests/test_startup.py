@@ -0,0 +1,18 @@
+# Libraries
+import os
+import pytest
+from benchmarks.bench_startup import BUDGETS, probe, run
+
+
+def test_heavy_modules_are_lazy():
+    assert probe()["loaded"] == []
+
+
+# wall-clock budgets depend on the machine (and its load), so
+# they are only checked on demand, e.g. on the benchmark machine:
+#     CHECK_STARTUP_BUDGET=1 python -m pytest tests/test_startup.py
+@pytest.mark.skipif(not os.environ.get("CHECK_STARTUP_BUDGET"), reason = "set CHECK_STARTUP_BUDGET=1 to check it")
+def test_startup_budget():
+    result = run(repeat = 5)
+
+    assert result["exceeded"] == [], {name: result[name] for name in BUDGETS}
@@ -0,0 +1,89 @@
+# Libraries
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from storage import CLEAN_TWEETS_SCHEMA, TWEETS_PARTITIONS, iter_chunks, read_frame, write_frame
+from pre_processor import PreProcessor
+from translation import BatchTranslator, StubTranslator
+
+
+def comparable(pdf):
+    # lists are read back as arrays and nulls as None
+    pdf = pdf.astype(object).where(pdf.notnull(), None)
+    pdf["clean_tweet"] = pdf["clean_tweet"].apply(list)
+    return pdf.reset_index(drop = True)
+
+
+def test_chunked_output_matches_in_memory_output(tmp_path, monkeypatch):
+    monkeypatch.setattr(PreProcessor, "stop_words", frozenset(["the", "of"]))
+
+    # the first chunk has no place, no sensitivity flag and
+    # only tweets without words
+    pdf = pd.DataFrame({"tweet_id": [str(10 ** 18 + i) for i in range(6)],
+                        "text": ["@messi", "#qatar2022 https://t.co/x", "the final of the world cup",
+                                 "messi scores again", "@fifa", "what a game"],
+                        "lang": "en",
+                        "geo_place_id": [None, None, "01a9a39529b27f36", None, None, "07d9f0b3c1b8a000"],
+                        "possibly_sensitive": [None, None, False, True, None, False]})
+    source = str(tmp_path / "tweets.csv")
+    pdf.to_csv(source, index = False)
+    output = str(tmp_path / "clean" / "tweets.parquet")
+
+    def make_pre_processor():
+        return PreProcessor(translator = BatchTranslator(StubTranslator()))
+
+    rows = make_pre_processor().writeChunks(source, output, method = "stemWords", chunksize = 2)
+    expected = make_pre_processor().stemWords(next(iter_chunks(source, chunksize = 10)))
+
+    assert rows == 6
+    assert pq.ParquetFile(output).metadata.num_row_groups == 3
+    assert pq.read_schema(output).field("possibly_sensitive").type == pa.bool_()
+    assert pq.read_schema(output).field("clean_tweet").type == pa.list_(pa.string())
+    pd.testing.assert_frame_equal(comparable(pd.read_parquet(output)), comparable(expected))
+
+
+def clean_tweets(run_id, day, n = 4):
+    return pd.DataFrame({"tweet_id": [str(1595000000000000000 + 10 * int(run_id[-1]) + i) for i in range(n)],
+                         "text": [f"tweet {i}" for i in range(n)],
+                         "created_at": pd.date_range(f"{day} 10:00", periods = n, freq = "h", tz = "UTC"),
+                         "lang": ["en", "es"] * (n // 2),
+                         "possibly_sensitive": [0, 1] * (n // 2),
+                         "author_id": [str(10 ** 17 + i) for i in range(n)],
+                         "geo_place_id": [None, "01a9a39529b27f36"] * (n // 2),
+                         "type": None, "ref_tweet_id": None, "query": "world cup",
+                         "clean_tweet": [["tweet", str(i)] if i else [] for i in range(n)]})
+
+
+def test_write_and_read_frame(tmp_path):
+    base_dir = str(tmp_path / "clean_tweets")
+    first = clean_tweets("run1", "2022-11-20")
+    second = clean_tweets("run2", "2022-11-21")
+
+    # every write appends new files
+    write_frame(first, base_dir, CLEAN_TWEETS_SCHEMA, TWEETS_PARTITIONS, collection_date = "2022-11-20",
+                run_id = "run1")
+    write_frame(second, base_dir, CLEAN_TWEETS_SCHEMA, TWEETS_PARTITIONS, collection_date = "2022-11-21",
+                run_id = "run2")
+
+    pdf = read_frame(base_dir, CLEAN_TWEETS_SCHEMA, TWEETS_PARTITIONS).sort_values("tweet_id", ignore_index = True)
+    expected = pd.concat([first.assign(run_id = "run1", collection_date = "2022-11-20"),
+                          second.assign(run_id = "run2", collection_date = "2022-11-21")], ignore_index = True)
+
+    # ids keep every digit, timestamps their time zone
+    # and tokens are lists of strings
+    assert pdf["tweet_id"].tolist() == expected["tweet_id"].tolist()
+    assert pdf["author_id"].tolist() == expected["author_id"].tolist()
+    assert pdf["created_at"].tolist() == expected["created_at"].tolist()
+    assert [list(tokens) for tokens in pdf["clean_tweet"]] == expected["clean_tweet"].tolist()
+    assert pdf["possibly_sensitive"].tolist() == expected["possibly_sensitive"].tolist()
+    assert pdf["geo_place_id"].tolist() == expected["geo_place_id"].tolist()
+    assert sorted(pdf.columns) == sorted(CLEAN_TWEETS_SCHEMA.names)
+
+    # partitions and columns are filtered
+    pdf = read_frame(base_dir, CLEAN_TWEETS_SCHEMA, TWEETS_PARTITIONS, columns = ["tweet_id", "lang"],
+                     dates = ["2022-11-21"], langs = ["es"])
+    assert list(pdf.columns) == ["tweet_id", "lang"]
+    assert sorted(pdf["tweet_id"]) == sorted(second.loc[second.lang == "es", "tweet_id"])
+
+    assert read_frame(base_dir, CLEAN_TWEETS_SCHEMA, TWEETS_PARTITIONS, run_id = "run1").shape[0] == 4
+    assert read_frame(str(tmp_path / "missing"), CLEAN_TWEETS_SCHEMA, TWEETS_PARTITIONS).empty
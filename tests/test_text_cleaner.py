@@ -0,0 +1,52 @@
+# Libraries
+import random
+import pandas as pd
+from pre_processor import PreProcessor
+from benchmarks.synthetic import make_tweets
+from benchmarks.bench_text_cleaner import EDGE_CASES, old_remove_noise, old_normalize
+from text_cleaner import clean_text, clean_series, normalize_text, normalize_series
+
+# small list instead of the nltk corpus (same role)
+STOP_WORDS = ["i", "me", "the", "a", "is", "it", "not", "do", "and", "of", "to", "in", "you", "are"]
+
+
+def corpus(n = 5000, fuzz = 3000, seed = 0):
+    """
+    Function to create raw tweets: synthetic tweets, the edge cases and
+    random strings of the characters that the cleaning steps handle in
+    a special way (e.g. a mention followed by a punct mark, html tags
+    with quotes, links in the middle of a line or non-ASCII runs).
+    """
+
+    rng = random.Random(seed)
+    alphabet = list("ab h@#<>\"'-.,:_;/\t\n\r") + ["http://", "https://t.co/", "<br>", "ñ", "É", "😀", "東京",
+                                                   "ß", "Σ", " ", " ", "ǅ", "don't", "gr8", "u"]
+    fuzzed = ["".join(rng.choices(alphabet, k = rng.randint(0, 15))) for i in range(fuzz)]
+
+    return make_tweets(n, seed = seed)["text"].tolist() + EDGE_CASES + fuzzed
+
+
+TEXTS = pd.Series(corpus(), dtype = object)
+
+
+def test_clean_series_matches_the_former_chain():
+    expected = old_remove_noise(TEXTS).tolist()
+
+    assert clean_series(TEXTS) == expected
+    assert [clean_text(text) for text in TEXTS] == expected
+
+
+def test_clean_series_of_strings_with_the_separator():
+    texts = pd.Series(["A\x00B <b>c</b>", "@user d"], dtype = object)
+
+    # cleaned one by one
+    assert clean_series(texts) == [clean_text(text) for text in texts] == ["a\x00b c", "d"]
+
+
+def test_normalize_series_matches_the_former_chain():
+    regex_dict = PreProcessor().regex_dict
+    clean = pd.Series(clean_series(TEXTS) + ["idk", "gr8", "I'm GONNA go", "Ça va"], dtype = object)
+    expected = old_normalize(clean, regex_dict, STOP_WORDS).tolist()
+
+    assert normalize_series(clean, regex_dict, frozenset(STOP_WORDS)) == expected
+    assert [normalize_text(text, regex_dict, frozenset(STOP_WORDS)) for text in clean] == expected
@@ -0,0 +1,66 @@
+# Libraries
+import pytest
+import pandas as pd
+from token_cache import TokenCache
+from pre_processor import PreProcessor
+from translation import BatchTranslator, StubTranslator
+
+
+def fill(cache, tokens):
+    return [cache.lookup(token, str.upper) for token in tokens]
+
+
+def test_least_recently_used_token_is_removed():
+    cache = TokenCache(maxsize = 2)
+    fill(cache, ["a", "b", "a", "c"])
+
+    # "a" was used after "b"
+    assert list(cache.data) == ["a", "c"]
+
+
+def test_hits_and_misses():
+    cache = TokenCache(maxsize = 2)
+    assert fill(cache, ["a", "b", "a", "c", "b"]) == ["A", "B", "A", "C", "B"]
+
+    assert cache.stats() == {"hits": 1, "misses": 4, "hit_rate": 0.2, "size": 2, "maxsize": 2}
+
+    cache.clear()
+    assert cache.stats()["hits"] == cache.stats()["misses"] == len(cache) == 0
+
+
+def test_no_limit():
+    cache = TokenCache(maxsize = None)
+    fill(cache, [str(i) for i in range(1000)])
+
+    assert len(cache) == 1000
+
+
+@pytest.mark.parametrize("maxsize", [None, 3, 2])
+def test_save_and_load(tmp_path, maxsize):
+    path = str(tmp_path / "cache" / "lemmas.json")
+    cache = TokenCache(maxsize = 3, path = path)
+    fill(cache, ["a", "b", "c", "a"])
+    cache.save()
+
+    # warm start (the most recently used tokens are kept)
+    loaded = TokenCache(maxsize = maxsize, path = path)
+    assert list(loaded.data.items()) == [("b", "B"), ("c", "C"), ("a", "A")][-(maxsize or 3):]
+
+    calls = []
+    loaded.lookup("a", lambda token: calls.append(token))
+    assert calls == [] and loaded.hits == 1
+
+
+def test_pre_processor_caches_are_saved(tmp_path, monkeypatch):
+    monkeypatch.setattr(PreProcessor, "stop_words", frozenset(["the"]))
+    pdf = pd.DataFrame({"text": ["the players are playing", "playing the final"], "lang": "en"})
+
+    pre_processor = PreProcessor(token_cache_size = None, stage_cache_size = None,
+                                 token_cache_dir = str(tmp_path), translator = BatchTranslator(StubTranslator()))
+    expected = pre_processor.stemWords(pdf.copy())["clean_tweet"].tolist()
+    pre_processor.saveTokenCaches()
+
+    # the next run finds every token in the cache
+    pre_processor = PreProcessor(token_cache_dir = str(tmp_path), translator = BatchTranslator(StubTranslator()))
+    assert pre_processor.stemWords(pdf.copy())["clean_tweet"].tolist() == expected
+    assert pre_processor.stem_cache.misses == 0 and pre_processor.stem_cache.hits > 0
@@ -0,0 +1,91 @@
+# Libraries
+import random
+import nltk
+import pytest
+import pandas as pd
+from nltk.tokenize import NLTKWordTokenizer
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+from pre_processor import PreProcessor
+from benchmarks.synthetic import make_tweets
+from benchmarks.bench_tokenizer import EDGE_CASES
+from text_cleaner import SENT_END_RE, clean_series, normalize_series, tokenize_text, split_sentences
+
+
+def punkt_available():
+    try:
+        nltk.sent_tokenize("ok. ok")
+    except LookupError:
+        return False
+    return True
+
+
+needs_punkt = pytest.mark.skipif(not punkt_available(), reason = "nltk punkt data is not installed")
+
+
+def corpus(n = 5000, fuzz = 3000, seed = 0):
+    """
+    Function to create the input of the tokenize stage: normalized
+    synthetic tweets (without removing stopwords, so there are more
+    clitics), the edge cases and random strings of the characters
+    that the tokenizer handles in a special way.
+    """
+
+    texts = clean_series(make_tweets(n, seed = seed)["text"])
+    texts = normalize_series(pd.Series(texts, dtype = object), PreProcessor().regex_dict, frozenset())
+
+    rng = random.Random(seed)
+    alphabet = "ab'`\"-.,;:?!()[]{}<>@#$%&*/ " + "nt" * 3 + "sdlmrve"
+    fuzzed = ["".join(rng.choices(alphabet, k = rng.randint(0, 20))) for i in range(fuzz)]
+
+    return list(texts) + EDGE_CASES + fuzzed
+
+
+def reference_tokenize(text):
+    """
+    Function to tokenize a string as nltk.word_tokenize does: split it
+    into sentences with Punkt and every sentence with the Treebank word
+    tokenizer. Without sentence ending characters a string is a single
+    sentence for any Punkt model, so an untrained one is used when the
+    punkt data is not installed.
+    """
+
+    if punkt_available():
+        return nltk.word_tokenize(text)
+
+    return [token for sentence in PunktSentenceTokenizer().tokenize(text)
+            for token in NLTKWordTokenizer().tokenize(sentence)]
+
+
+CORPUS = corpus()
+
+
+def test_corpus_covers_every_path():
+    single_sentence = [text for text in CORPUS if not SENT_END_RE.search(text)]
+
+    assert any("'" in text for text in single_sentence)
+    assert any("`" in text or '"' in text for text in single_sentence)
+    assert len(single_sentence) < len(CORPUS)
+
+
+def test_single_sentence_tokens_match_word_tokenize():
+    texts = [text for text in CORPUS if not SENT_END_RE.search(text)]
+    differences = [text for text in texts if tokenize_text(text) != reference_tokenize(text)]
+
+    assert differences == []
+
+
+def test_single_sentence_split_matches_sent_tokenize():
+    texts = [text for text in CORPUS if not SENT_END_RE.search(text)]
+    reference = nltk.sent_tokenize if punkt_available() else PunktSentenceTokenizer().tokenize
+
+    assert [text for text in texts if split_sentences(text) != reference(text)] == []
+
+
+@needs_punkt
+def test_tokens_match_word_tokenize():
+    assert [text for text in CORPUS if tokenize_text(text) != nltk.word_tokenize(text)] == []
+
+
+@needs_punkt
+def test_sentences_match_sent_tokenize():
+    assert [text for text in CORPUS if split_sentences(text) != nltk.sent_tokenize(text)] == []
@@ -0,0 +1,96 @@
+# Libraries
+import json
+import pytest
+from translation import BatchTranslator, StubTranslator, TranslationCache
+
+
+class FlakyTranslator(StubTranslator):
+    """
+    Stub that raises an error (e.g. the invalid response of a throttled
+    api) on its first calls.
+    """
+
+    def __init__(self, errors, **kwargs):
+        super().__init__(**kwargs)
+        self.errors = list(errors)
+
+    def translate_batch(self, texts, src):
+        if self.errors:
+            self.calls += 1
+            raise self.errors.pop(0)
+        return super().translate_batch(texts, src)
+
+
+def make_translator(backend = None, **kwargs):
+    backend = backend if backend is not None else StubTranslator(prefix = "en: ")
+    return BatchTranslator(backend, cache = TranslationCache(), backoff = 0, **kwargs), backend
+
+
+def test_texts_are_batched_by_language():
+    translator, backend = make_translator(batch_size = 2)
+    texts = ["hola", "adios", "buenos dias", "bonjour", "hello", None, ""]
+    langs = ["es", "es", "es", "fr", "en", "es", "es"]
+
+    assert translator.translate(texts, langs) == ["en: hola", "en: adios", "en: buenos dias", "en: bonjour",
+                                                  "hello", None, ""]
+
+    # 2 + 1 texts in spanish and 1 in french
+    assert backend.calls == 3
+    assert backend.texts == 4
+
+
+def test_duplicates_are_translated_once():
+    translator, backend = make_translator()
+
+    output = translator.translate(["Hola  mundo", "hola mundo", "hola mundo", "hola mundo"],
+                                  ["es", "es", "pt", "es"])
+
+    # same normalized text and language
+    assert output == ["en: Hola  mundo", "en: Hola  mundo", "en: hola mundo", "en: Hola  mundo"]
+    assert backend.texts == 2
+
+
+def test_cached_translations_are_reused(tmp_path):
+    path = str(tmp_path / "translations.db")
+    translator, backend = make_translator()
+    translator.cache = TranslationCache(path)
+    translator.translate(["hola", "adios"], ["es", "es"])
+
+    # a new cache on the same database (e.g. the next run)
+    translator.cache = TranslationCache(path)
+    assert translator.translate(["hola", "adios", "gracias"], ["es", "es", "es"]) == \
+           ["en: hola", "en: adios", "en: gracias"]
+
+    assert backend.texts == 3
+    assert translator.cache.stats() == {"hits": 2, "misses": 1}
+
+
+def test_errors_are_retried():
+    translator, backend = make_translator(FlakyTranslator([ConnectionError(), json.JSONDecodeError("", "", 0)],
+                                                          prefix = "en: "))
+
+    assert translator.translate(["hola mundo"], ["es"]) == ["en: hola mundo"]
+    assert backend.calls == 3
+    assert translator.cache.get_many("es", ["hola mundo"]) == {"hola mundo": "en: hola mundo"}
+
+
+def test_failures_are_not_cached():
+    translator, backend = make_translator(FlakyTranslator([ValueError()] * 2, prefix = "en: "), retries = 1)
+
+    with pytest.raises(ValueError):
+        translator.translate(["hola mundo"], ["es"])
+    assert translator.cache.get_many("es", ["hola mundo"]) == {}
+
+    # the next call translates the text
+    assert translator.translate(["hola mundo"], ["es"]) == ["en: hola mundo"]
+
+
+def test_unsupported_languages_are_kept_and_not_cached():
+    translator, backend = make_translator(StubTranslator(prefix = "en: ", languages = ["es", "hi"]))
+
+    output = translator.translate(["hola", "namaste", "kumusta", "kumusta"], ["es", "in", "tl", "tl"])
+
+    # "in" is the twitter code of hindi
+    assert output == ["en: hola", "en: namaste", "kumusta", "kumusta"]
+    assert backend.texts == 2
+    assert translator.cache.get_many("tl", ["kumusta"]) == {}
@@ -0,0 +1,87 @@
+# Libraries
+import pandas as pd
+from tweet_store import TweetStore
+
+
+def tweet(tweet_id, created_at, **values):
+    return {"tweet_id": tweet_id, "text": f"tweet {tweet_id}", "created_at": pd.Timestamp(created_at, tz = "UTC"),
+            "lang": "en", "possibly_sensitive": False, "author_id": "u1", "geo_place_id": None,
+            "type": None, "ref_tweet_id": None, "query": "world cup", **values}
+
+
+def make_store():
+    store = TweetStore()
+    tweets = pd.DataFrame([tweet("1", "2022-11-19 23:59:59", geo_place_id = "p1", possibly_sensitive = True),
+                           tweet("2", "2022-11-20 00:00:00", author_id = "u2", lang = "es"),
+                           tweet("3", "2022-11-20 12:30:00", author_id = "u3"),
+                           tweet("4", "2022-11-21 00:00:00")])
+    users = pd.DataFrame({"user_id": ["u1", "u2"], "name": ["Ana", "Luis"], "username": ["ana", "luis"],
+                          "location": ["Doha", "Madrid"]})
+    places = pd.DataFrame({"geo_place_id": ["p1"], "full_name": ["Doha, Qatar"], "name": ["Doha"],
+                           "country": ["Qatar"]})
+    store.write(tweets, users, places, run_id = "run1", collection_date = "2022-11-21")
+
+    return store
+
+
+def test_nulls_do_not_replace_stored_values():
+    store = make_store()
+    store.write(pd.DataFrame([tweet("1", "2022-11-19 23:59:59", text = "edited", possibly_sensitive = None)]),
+                pd.DataFrame({"user_id": ["u1"], "name": [None], "username": ["ana_2"], "location": [None]}),
+                run_id = "run2")
+
+    stored = store.get_tweets(["1"]).iloc[0]
+    assert (stored.text, stored.geo_place_id, stored.possibly_sensitive) == ("edited", "p1", 1)
+    assert (stored.run_id, stored.collection_date) == ("run2", "2022-11-21")
+
+    user = store.read_tweets(users = True).set_index("tweet_id").loc["1"]
+    assert (user.user_name, user.username, user.location) == ("Ana", "ana_2", "Doha")
+    assert store.counts() == {"tweets": 4, "users": 2, "places": 1}
+
+
+def test_users_and_places_are_joined():
+    pdf = make_store().read_tweets(users = True, places = True).set_index("tweet_id")
+
+    assert pdf.loc["1", ["user_name", "location", "place_full_name", "place_name", "place_country"]].tolist() == \
+           ["Ana", "Doha", "Doha, Qatar", "Doha", "Qatar"]
+
+    # tweets without a stored author or place are kept
+    assert pdf.loc["3", ["user_name", "place_country"]].isnull().all()
+    assert pdf.loc["2", "user_name"] == "Luis" and pd.isnull(pdf.loc["2", "place_name"])
+
+
+def test_time_range():
+    store = make_store()
+
+    def ids(**kwargs):
+        return store.read_tweets(**kwargs)["tweet_id"].tolist()
+
+    # start is included and end is excluded
+    assert ids(start = "2022-11-20", end = "2022-11-21") == ["2", "3"]
+    assert ids(start = pd.Timestamp("2022-11-20 13:30", tz = "Europe/Madrid")) == ["3", "4"]
+    assert ids(end = "2022-11-20") == ["1"]
+    assert ids(start = "2022-11-20", langs = ["es"]) == ["2"]
+    assert ids() == ["1", "2", "3", "4"]
+
+    created_at = store.read_tweets(start = "2022-11-21")["created_at"].iloc[0]
+    assert created_at == pd.Timestamp("2022-11-21", tz = "UTC")
+
+
+def test_locations():
+    store = make_store()
+
+    assert store.locations().values.tolist() == [["Doha", 2], ["Madrid", 1]]
+    assert store.locations(start = "2022-11-20", end = "2022-11-21").values.tolist() == [["Madrid", 1]]
+
+
+def test_every_query_of_a_tweet_is_kept():
+    store = make_store()
+    store.write(pd.DataFrame([tweet("1", "2022-11-19 23:59:59", query = "qatar"),
+                              tweet("5", "2022-11-22", query = "qatar")]))
+
+    queries = store.queries(["1", "5"]).sort_values(["tweet_id", "query"]).values.tolist()
+    assert queries == [["1", "qatar"], ["1", "world cup"], ["5", "qatar"]]
+    assert store.get_tweets(["1"])["query"].tolist() == ["world cup"]
+
+    assert sorted(store.tweets_by_query(["qatar"])["tweet_id"]) == ["1", "5"]
+    assert sorted(store.tweets_by_query(["qatar", "world cup"])["tweet_id"]) == ["1", "2", "3", "4", "5"]
@@ -0,0 +1,147 @@
+# Libraries
+import time
+import pytest
+import requests
+from twitter_client import RateLimiter, TwitterClient, TwitterAPIError
+from benchmarks.fake_api import FakeTwitterAPI
+
+
+class FakeClock:
+    """
+    Clock and sleep function of a RateLimiter: sleeping only moves
+    the clock forward, and every sleep is recorded.
+    """
+
+    def __init__(self, now = 1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_client(api, clock = None, **kwargs):
+    clock = clock if clock is not None else FakeClock()
+    limiter = RateLimiter(clock = clock.time, sleep = clock.sleep)
+
+    return TwitterClient("token", url = api.url, rate_limiter = limiter, **kwargs), clock
+
+
+def test_rate_limiter_waits_until_reset():
+    clock = FakeClock()
+    limiter = RateLimiter(clock = clock.time, sleep = clock.sleep)
+
+    assert limiter.acquire() == 0
+    limiter.update({"x-rate-limit-remaining": "0", "x-rate-limit-reset": str(clock.now + 10)})
+
+    # the budget is exhausted until the window is reset
+    assert limiter.acquire() == 10
+    assert clock.sleeps == [10]
+
+    # then the budget is unknown again
+    assert limiter.remaining is None
+
+
+def test_rate_limiter_counts_requests_in_flight():
+    clock = FakeClock()
+    limiter = RateLimiter(clock = clock.time, sleep = clock.sleep)
+
+    limiter.acquire()
+    limiter.acquire()
+
+    # the api counted one request, the other one is still in flight
+    limiter.update({"x-rate-limit-remaining": "1", "x-rate-limit-reset": str(clock.now + 5)})
+    assert limiter.remaining == 0
+
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+def test_rate_limit_headers_are_honored():
+    with FakeTwitterAPI(latency = 0, limit = 3, window = 0.3) as api:
+        client = TwitterClient("token", url = api.url)
+
+        start = time.perf_counter()
+        for i in range(6):
+            client.search("world cup")
+
+        # the second window was waited for instead of being rejected
+        assert api.rejected == 0
+        assert time.perf_counter() - start >= 0.2
+
+
+def test_5xx_is_retried_with_backoff():
+    with FakeTwitterAPI(latency = 0, errors = [503, 500]) as api:
+        client, clock = make_client(api, backoff = 1.0)
+        page = client.search("world cup")
+
+    assert page["data"]
+    assert clock.sleeps == [1.0, 2.0]
+    assert [metric["status"] for metric in client.metrics] == [503, 500, 200]
+
+
+def test_429_without_reset_header_backs_off():
+    with FakeTwitterAPI(latency = 0, errors = [429]) as api:
+        client, clock = make_client(api, backoff = 0.5)
+        client.search("world cup")
+
+    assert clock.sleeps == [0.5]
+
+
+def test_429_with_reset_header_waits_for_the_window():
+    with FakeTwitterAPI(latency = 0, limit = 1, window = 0.3) as api:
+        client = TwitterClient("token", url = api.url)
+        client.search("world cup")
+
+        # the budget of the client is unknown, so the second request
+        # is rejected and retried when the window is reset
+        client.rate_limiter.remaining = None
+        client.search("world cup")
+
+    assert api.rejected == 1
+    assert [metric["status"] for metric in client.metrics] == [200, 429, 200]
+
+
+def test_timeouts_are_retried():
+    with FakeTwitterAPI(latency = 0, errors = [None], stall = 1.0) as api:
+        client, clock = make_client(api, backoff = 1.0, timeout = 0.2)
+        page = client.search("world cup")
+
+    assert page["data"]
+    assert clock.sleeps == [1.0]
+    assert [metric["status"] for metric in client.metrics] == [None, 200]
+    assert client.rate_limiter.in_flight == 0
+
+
+def test_connection_errors_are_raised_after_max_retries():
+    with FakeTwitterAPI(latency = 0) as api:
+        url = api.url
+
+    # nothing listens on the port anymore
+    client = TwitterClient("token", url = url, max_retries = 2)
+    clock = FakeClock()
+    client.rate_limiter.sleep = clock.sleep
+
+    with pytest.raises(requests.ConnectionError):
+        client.search("world cup")
+    assert clock.sleeps == [1.0, 2.0]
+
+
+def test_errors_after_max_retries_and_client_errors():
+    with FakeTwitterAPI(latency = 0, errors = [503, 503, 503, 400]) as api:
+        client, clock = make_client(api, max_retries = 2)
+
+        with pytest.raises(TwitterAPIError) as error:
+            client.search("world cup")
+        assert error.value.status_code == 503
+
+        # client errors are not retried
+        with pytest.raises(TwitterAPIError) as error:
+            client.search("world cup")
+        assert error.value.status_code == 400
+
+    assert len(client.metrics) == 4
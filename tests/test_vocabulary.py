@@ -0,0 +1,32 @@
+# Libraries
+from vocabulary import Vocabulary, SparseTokens, encode_tokens
+
+
+def test_vocabulary_is_kept_between_runs(tmp_path):
+    path = str(tmp_path / "bag_of_words" / "vocabulary.json")
+
+    first = encode_tokens([["world", "cup"], ["cup", "cup", "final"]])
+    first.vocabulary.save(path)
+
+    # a later run gives the same ids to the same tokens
+    vocabulary = Vocabulary.load(path)
+    second = encode_tokens([["final", "messi"], None], vocabulary)
+
+    assert vocabulary.tokens == ["world", "cup", "final", "messi"]
+    assert second.row(0) == ["final", "messi"]
+    assert second.row(1) == []
+    assert second.to_scipy()[0, vocabulary.ids["final"]] == 1
+
+    # matrices of both runs can be stacked
+    assert first.to_scipy(n_features = len(vocabulary)).shape == (2, 4)
+
+
+def test_sparse_tokens_round_trip(tmp_path):
+    path = str(tmp_path / "run.npz")
+    encode_tokens([["a", "b", "a"]], ids = ["1"]).save(path)
+
+    loaded = SparseTokens.load(path)
+
+    assert loaded.ids == ["1"]
+    assert loaded.row(0) == ["a", "b"]
+    assert loaded.counts.tolist() == [2, 1]
@@ -0,0 +1,296 @@
+# Libraries
+import re
+import codecs
+import resources
+from functools import lru_cache
+
+# modules loaded on first use (see resources)
+nltk = resources.lazy_import("nltk")
+unidecode = resources.lazy_import("unidecode")
+contractions = resources.lazy_import("contractions")
+
+# Patterns are compiled once at import time, so every tweet
+# reuses the same compiled objects instead of recompiling
+# them on each apply pass.
+
+# clean_series and normalize_series join the tweets with this
+# character and clean them as a single string (a few passes over
+# a long string are much cheaper than a few passes per tweet).
+# It is not a white space and no pattern below matches it, so
+# every tweet is cleaned as if it was alone.
+SEPARATOR = "\x00"
+
+# html tags
+HTML_TAG_RE = re.compile(r'<[^<>\x00]*>')
+
+# usernames | hashtags | links (a link goes up to the end of
+# the line). Every alternative starts with a literal, so the
+# regex engine skips quickly the positions that can not match.
+TAG_RE = re.compile(r"@[A-Za-z0-9]+|#[A-Za-z0-9]+|https?://[^\n\x00]*[\r\n]*")
+
+# punct marks = ",.':!?;
+# do not remove: '
+# but remove: "
+# They are removed after the usernames, hashtags and links (e.g.
+# @user.name --> name), which gives the same result as a single
+# regex with all of them, since none of those starts with a punct
+# mark. Double quotes are removed after collapsing white spaces.
+PUNCT_MARKS = str.maketrans("", "", "-.,:_;")
+
+# strings that word_tokenize would split in a different way than
+# the fast path of tokenize_text: any character other than letters,
+# digits, spaces and a few punctuation marks (e.g. quotes or periods)
+SPECIAL_RE = re.compile(r"[^A-Za-z0-9 ;@#$%&?!*\[\](){}<>`]")
+
+# clitics that word_tokenize splits from the end of a word
+# (e.g. messi's --> messi 's)
+CLITIC_RE = re.compile(r"(?<=[A-Za-z0-9])(?:n't|N'T|'[sSmMdD]|'ll|'LL|'re|'RE|'ve|'VE)(?=$|[ ;@#$%&?!*\[\](){}<>`])")
+
+# tokens of a string without special characters: clitics (already
+# split from the words), words, pairs of backticks and any other
+# character (they are all split from the words by word_tokenize)
+TOKEN_RE = re.compile(r"n't|N'T|'(?:ll|LL|re|RE|ve|VE|[sSmMdD])|[A-Za-z0-9]+|``?|[^ ]")
+
+# words split by the MacIntyre contractions (e.g. cannot --> can not,
+# contractions.fix expands can't into cannot). All of them are split
+# after the third character.
+CONTRACTIONS = frozenset(["cannot", "gimme", "gonna", "gotta", "lemme", "wanna"])
+CONTRACTION_RE = re.compile("|".join(CONTRACTIONS))
+
+# characters that can end a sentence
+SENT_END_RE = re.compile(r"[.?!]")
+
+
+@lru_cache(maxsize = 100000)
+def _transliterate_run(run):
+    return unidecode.unidecode(run)
+
+
+def _transliterate(error):
+    # error handler of the ASCII encoder: it gets every run of
+    # non-ASCII characters (e.g. emojis or accented letters).
+    # Runs repeat a lot among tweets, so they are transliterated
+    # once.
+    return _transliterate_run(error.object[error.start:error.end]), error.end
+
+
+codecs.register_error("text_cleaner.transliterate", _transliterate)
+
+
+def _join(texts):
+    """
+    Function to join strings with the SEPARATOR.
+
+    Outputs: The joined string or None if any of the values is not
+             a string or contains the SEPARATOR (they must be
+             cleaned one by one).
+    """
+
+    try:
+        text = SEPARATOR.join(texts)
+    except TypeError:
+        return None
+
+    return text if text.count(SEPARATOR) == len(texts) - 1 else None
+
+
+def _remove_noise(text):
+    # to lower case and remove accented characters
+    # e.g. Canción --> cancion. The ASCII encoder copies the
+    # ASCII characters and only the non-ASCII runs are sent to
+    # unidecode (most of the English tweets have none)
+    text = text.lower()
+    if not text.isascii():
+        text = text.encode("ascii", "text_cleaner.transliterate").decode("ascii")
+
+    # remove html tags
+    text = HTML_TAG_RE.sub('', text)
+
+    # remove usernames, hashtags, links and punct marks,
+    # collapse white spaces and drop double quotes
+    text = TAG_RE.sub('', text).translate(PUNCT_MARKS)
+
+    return ' '.join(text.split()).replace('"', '')
+
+
+def clean_text(text):
+    """
+    Function to remove noise from a single raw tweet in one pass. It
+    does the same steps as the former chain of apply calls in
+    PreProcessor.removeNoise (before translation).
+
+    Inputs: A raw string.
+
+    Output: A lower case string without accented characters, html
+    tags, usernames, hashtags, links, punctuation marks and extra
+    white spaces.
+    """
+
+    # remove white spaces at the begining and at
+    # the end of a string
+    return _remove_noise(text).strip(' ')
+
+
+def clean_series(series):
+    """
+    Function to remove noise from a pandas series of raw tweets. The
+    tweets are joined and cleaned as a single string (see SEPARATOR).
+
+    Inputs: A pandas series with raw strings.
+
+    Output: A list with the clean strings (same order as the input).
+    """
+
+    texts = list(series.values)
+    text = _join(texts)
+
+    if text is None:
+        return [clean_text(text) for text in texts]
+
+    # white spaces next to the separators are left by the
+    # collapse of white spaces of the joined string
+    return [text.strip(' ') for text in _remove_noise(text).split(SEPARATOR)]
+
+
+def to_ascii(series):
+    """
+    Function to normalize accented and other strange characters
+    (e.g. characters returned by the translator) and keep only
+    ASCII characters.
+
+    Inputs: A pandas series with strings.
+
+    Output: A pandas series with normalized strings. Null values
+    are kept as they are.
+    """
+
+    return series.str.normalize('NFKC').str.encode('ascii', 'ignore').str.decode('utf-8')
+
+
+def normalize_text(text, replacements, stop_words):
+    """
+    Function to normalize a single clean string in one pass. It does
+    the same steps as the former chain of apply calls in
+    PreProcessor.textNormalization.
+
+    Inputs:
+        - text: A string without noise.
+        - replacements: Dictionary used to replace the whole string
+                        (same semantics as Series.replace).
+        - stop_words: Set of words that will be removed.
+
+    Output: A string with contractions expanded, replaced if it's
+    the case and with no stopwords.
+    """
+
+    # expand contractions
+    # e.g. don't --> do not
+    text = contractions.fix(text)
+
+    # Normalize words
+    text = replacements.get(text, text)
+
+    # remove stopwords from string
+    return ' '.join([word for word in text.split() if word not in stop_words])
+
+
+def normalize_series(series, replacements, stop_words):
+    """
+    Function to normalize a pandas series of clean strings. Contractions
+    of all the strings are expanded in a single call (see SEPARATOR).
+
+    Inputs:
+        - series: A pandas series with strings without noise.
+        - replacements: Dictionary used to replace the whole string.
+        - stop_words: Set of words that will be removed.
+
+    Output: A list with the normalized strings (same order as the input).
+    """
+
+    texts = list(series.values)
+    text = _join(texts)
+
+    # contractions lowers the string to find the contractions
+    # and some non-ASCII characters change their length when
+    # they are lowered (the positions of the next strings
+    # would be shifted)
+    if text is None or not text.isascii():
+        return [normalize_text(text, replacements, stop_words) for text in texts]
+
+    return [' '.join([word for word in replacements.get(text, text).split() if word not in stop_words])
+            for text in contractions.fix(text).split(SEPARATOR)]
+
+
+def _split_words(text):
+    """
+    Function to split a string without special characters (see
+    SPECIAL_RE) in the same way as the word tokenizer of nltk.
+    """
+
+    tokens = TOKEN_RE.findall(text)
+
+    if CONTRACTION_RE.search(text.lower()):
+        tokens = [part for token in tokens
+                  for part in ((token[:3], token[3:]) if token.lower() in CONTRACTIONS else (token,))]
+
+    return tokens
+
+
+def tokenize_text(text):
+    """
+    Function to split a normalized tweet into words. It returns the
+    same tokens as nltk.word_tokenize, but most tweets (without noise)
+    only have letters, digits, spaces and a few punctuation marks, so
+    they are split with a single regex instead of running the sentence
+    splitter and all the word tokenizer regexes.
+
+    Inputs: A normalized string.
+
+    Output: A list of tokens (same order as in the string).
+    """
+
+    if not SPECIAL_RE.search(text):
+        return _split_words(text)
+
+    if "'" in text and not SPECIAL_RE.search(CLITIC_RE.sub(" ", text)):
+        return _split_words(CLITIC_RE.sub(r" \g<0>", text))
+
+    # without sentence ending characters there is a single
+    # sentence, so the sentence splitter can be skipped and only
+    # the word tokenizer of word_tokenize is used. Periods are
+    # removed with the noise, but they can be added by the
+    # translator.
+    if not SENT_END_RE.search(text):
+        return resources.word_tokenizer().tokenize(text.rstrip())
+
+    return nltk.word_tokenize(text)
+
+
+def tokenize_series(series):
+    """
+    Function to split a pandas series of normalized tweets into words.
+
+    Inputs: A pandas series with normalized strings.
+
+    Output: A list with the list of tokens of each string (same order
+    as the input).
+    """
+
+    return [tokenize_text(text) for text in series.values]
+
+
+def split_sentences(text):
+    """
+    Function to split a normalized tweet into sentences. It returns the
+    same sentences as nltk.sent_tokenize, but the sentence splitter only
+    runs on strings with sentence ending characters.
+
+    Inputs: A normalized string.
+
+    Output: A list of sentences.
+    """
+
+    if not SENT_END_RE.search(text):
+        return [text.rstrip()] if text.strip() else []
+
+    return nltk.sent_tokenize(text)
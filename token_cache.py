@@ -0,0 +1,151 @@
+# Libraries
+import os
+import json
+from collections import OrderedDict
+
+
+class TokenCache:
+    """
+    Least recently used (LRU) cache of token --> value (e.g. lemma or
+    stem). Tweet vocabularies are heavily skewed, so most tokens are
+    found in the cache and the lemmatizer/stemmer is only called for
+    new ones. The cache can be stored on disk and loaded again (warm
+    start) in a later run.
+    """
+
+    def __init__(self, maxsize = 100000, path = None):
+
+        # maximum number of tokens kept (None = no limit)
+        self.maxsize = maxsize
+
+        # file used to persist the cache (optional)
+        self.path = path
+
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        # tokens computed since the last call to pop_new. They
+        # are only kept if it is a dictionary (e.g. in the worker
+        # processes of the parallel mode, see PreProcessor).
+        self.new = None
+
+        # warm start
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.data)
+
+    def lookup(self, token, function):
+        """
+        Function to get the value of a token. If the token is not in the
+        cache, the value is computed and stored (the least recently used
+        token is removed if the cache is full).
+
+        Inputs:
+            - token: String.
+            - function: Function used to compute the value of a new token.
+
+        Outputs: Value of the token.
+        """
+
+        try:
+            value = self.data[token]
+        except KeyError:
+            self.misses += 1
+            value = self.data[token] = function(token)
+            if self.new is not None:
+                self.new[token] = value
+            if self.maxsize is not None and len(self.data) > self.maxsize:
+                self.data.popitem(last = False)
+            return value
+
+        self.hits += 1
+        self.data.move_to_end(token)
+
+        return value
+
+    def pop_new(self):
+        """
+        Function to get the tokens computed since the last call (and
+        start keeping them if they were not kept).
+
+        Outputs: Dictionary token --> value.
+        """
+
+        new, self.new = self.new or {}, {}
+
+        return new
+
+    def update(self, items, hits = 0, misses = 0):
+        """
+        Function to add tokens computed somewhere else (e.g. by another
+        process). They are the most recently used tokens.
+
+        Inputs:
+            - items: Dictionary token --> value.
+            - hits: Number of hits to add to the statistics.
+            - misses: Number of misses to add to the statistics.
+        """
+
+        for token, value in items.items():
+            self.data[token] = value
+            self.data.move_to_end(token)
+
+        while self.maxsize is not None and len(self.data) > self.maxsize:
+            self.data.popitem(last = False)
+
+        self.hits += hits
+        self.misses += misses
+
+    def stats(self):
+        """
+        Function to get the cache statistics.
+
+        Outputs: Dictionary with the number of hits, misses, the hit
+                 rate and the number of tokens kept.
+        """
+
+        lookups = self.hits + self.misses
+
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self.data), "maxsize": self.maxsize}
+
+    def save(self, path = None):
+        """
+        Function to store the cache in a json file (from the least to the
+        most recently used token, so the order is kept when it is loaded).
+        """
+
+        path = path if path is not None else self.path
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(list(self.data.items()), f)
+        os.replace(tmp_path, path)
+
+    def load(self, path = None):
+        """
+        Function to load a cache stored with save. If the file has more
+        tokens than maxsize, only the most recently used ones are kept.
+        """
+
+        path = path if path is not None else self.path
+
+        with open(path) as f:
+            items = json.load(f)
+
+        if self.maxsize is not None:
+            items = items[-self.maxsize:] if self.maxsize else []
+
+        self.data = OrderedDict(items)
+
+    def clear(self):
+        self.data.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,348 @@
+# Libraries
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlite_db import connect, select_in
+
+# Languages that do not need to be translated
+NO_TRANSLATION = ("und", "en")
+
+# Twitter language codes that are defined differently
+# in the translation api. e.g. the code of Hindi
+# language is "hi", but Twitter has defined it as "in".
+# The api supports simplified and traditional chinese.
+LANG_CODES = {"in": "hi", "zh": "zh-cn"}
+
+
+def normalize_key(text):
+    """
+    Function to normalize a text before using it as a cache key, so
+    duplicated tweets (e.g. retweets) are only translated once.
+
+    Inputs: A string.
+
+    Output: Lower case string with collapsed white spaces.
+    """
+
+    return ' '.join(text.lower().split())
+
+
+class GoogleTranslator:
+    """
+    Translation backend that uses the googletrans api. Texts of
+    a batch are sent in a single call.
+    """
+
+    def __init__(self):
+
+        # the api client is created on first use, so nothing
+        # is loaded if no text needs to be translated
+        self.translator = None
+
+    def __getstate__(self):
+        # the api client can not be pickled (e.g. to send
+        # it to another process), so a new one is created
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+    def supports(self, src):
+        """
+        Function to check if the api can translate a language.
+
+        Inputs: Language code (api format).
+
+        Outputs: Boolean.
+        """
+
+        from googletrans import LANGUAGES
+
+        return src in LANGUAGES
+
+    def _client(self):
+        if self.translator is None:
+            from googletrans import Translator
+
+            self.translator = Translator()
+
+        return self.translator
+
+    def translate_batch(self, texts, src):
+        """
+        Function to translate a batch of texts to English.
+
+        Inputs:
+            - texts: List of strings in the same language.
+            - src: Language code of the texts (api format).
+
+        Outputs: List of translated strings (same order as the input).
+        """
+
+        results = self._client().translate(list(texts), src = src, dest = "en")
+
+        return [result.text for result in results]
+
+
+class StubTranslator:
+    """
+    Local translation backend to test and benchmark the translation
+    layer offline. It does not translate anything, it just returns
+    the same texts (with an optional prefix) after a given latency.
+    """
+
+    def __init__(self, latency = 0.0, prefix = "", fail_times = 0, languages = None):
+
+        # seconds that every call will take
+        self.latency = latency
+
+        # string added at the beginning of each text, so
+        # translated texts can be told apart
+        self.prefix = prefix
+
+        # number of calls that will raise an error before
+        # returning results (to check retries)
+        self.fail_times = fail_times
+
+        # language codes that can be "translated" (all of
+        # them by default)
+        self.languages = languages
+
+        # number of calls and texts received
+        self.calls = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def supports(self, src):
+        return self.languages is None or src in self.languages
+
+    def translate_batch(self, texts, src):
+        """
+        Function to "translate" a batch of texts.
+
+        Inputs:
+            - texts: List of strings in the same language.
+            - src: Language code of the texts (api format).
+
+        Outputs: List with the same strings (plus prefix).
+        """
+
+        with self._lock:
+            self.calls += 1
+            self.texts += len(texts)
+            fail = self.fail_times > 0
+            if fail:
+                self.fail_times -= 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if fail:
+            raise ConnectionError("stub translator failure")
+
+        return [self.prefix + text for text in texts]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class TranslationCache:
+    """
+    Persistent cache of translations stored in a SQLite database.
+    Keys are (lang, normalized text).
+    """
+
+    def __init__(self, path = ":memory:"):
+
+        # the same database can be used by several processes, and
+        # the connection by several threads (see BatchTranslator)
+        self.path = path
+        self.conn = connect(path, check_same_thread = False)
+
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS translations (
+                                 lang TEXT NOT NULL,
+                                 text TEXT NOT NULL,
+                                 translated TEXT NOT NULL,
+                                 PRIMARY KEY (lang, text))""")
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+        # cache statistics
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, lang, keys):
+        """
+        Function to get cached translations.
+
+        Inputs:
+            - lang: Twitter language code.
+            - keys: List of normalized texts.
+
+        Outputs: Dictionary with the keys found in the cache and their
+                 translation.
+        """
+
+        keys = list(keys)
+
+        query = "SELECT text, translated FROM translations WHERE lang = ? AND text IN ({})"
+
+        with self._lock:
+            found = dict(select_in(self.conn, query, keys, params = [lang]))
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+
+        return found
+
+    def put_many(self, lang, translations):
+        """
+        Function to store translations.
+
+        Inputs:
+            - lang: Twitter language code.
+            - translations: Dictionary with normalized texts and their
+                            translation.
+        """
+
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?)",
+                                  [(lang, key, value) for key, value in translations.items()])
+            self.conn.commit()
+
+    def stats(self):
+        """
+        Function to get the cache statistics.
+
+        Outputs: Dictionary with the number of hits and misses.
+        """
+
+        return {"hits": self.hits, "misses": self.misses}
+
+    def __getstate__(self):
+        # a connection can not be pickled (e.g. to send the cache
+        # to another process), so the database is opened again
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def close(self):
+        self.conn.close()
+
+
+class BatchTranslator:
+    """
+    Translation layer that groups texts by language into batches, sends
+    them concurrently to a backend (e.g. GoogleTranslator) and caches
+    the results, so duplicated texts are never translated twice.
+    """
+
+    def __init__(self, backend = None, cache = None, batch_size = 50, max_workers = 4,
+                 retries = 3, backoff = 1.0):
+
+        # translation backend
+        self.backend = backend if backend is not None else GoogleTranslator()
+
+        # translations cache
+        self.cache = cache if cache is not None else TranslationCache()
+
+        # number of texts per request
+        self.batch_size = batch_size
+
+        # number of concurrent requests
+        self.max_workers = max_workers
+
+        # number of retries (and initial seconds to wait)
+        # when a request fails
+        self.retries = retries
+        self.backoff = backoff
+
+    def _supports(self, src):
+        # backends without a list of languages are
+        # asked to translate every language
+        supports = getattr(self.backend, "supports", None)
+
+        return supports is None or supports(src)
+
+    def _translate_batch(self, texts, src):
+        """
+        Function to translate a batch with retries and exponential
+        backoff. Any error (e.g. a connection error or an invalid
+        response when the api throttles the requests) is retried.
+        """
+
+        for attempt in range(self.retries + 1):
+            try:
+                return self.backend.translate_batch(texts, src)
+
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def translate(self, texts, langs):
+        """
+        Function to translate texts from any language to English.
+
+        Inputs:
+            - texts: Iterable of strings (partially pre-processed tweets).
+            - langs: Iterable with the language of each text.
+
+        Outputs: List of translated texts (same order as the input).
+                 Texts in English, undefined language, languages not
+                 supported by the backend or null are returned as
+                 they are (and they are not cached).
+        """
+
+        results = list(texts)
+
+        # group positions by language and normalized text
+        groups = {}
+        for i, (text, lang) in enumerate(zip(results, langs)):
+            if lang in NO_TRANSLATION or not isinstance(text, str) or text == "":
+                continue
+            groups.setdefault(lang, {}).setdefault(normalize_key(text), []).append(i)
+
+        translated = {}
+        jobs = []
+
+        with ThreadPoolExecutor(max_workers = self.max_workers) as pool:
+            for lang, positions in groups.items():
+
+                # unsupported language, the original texts are kept
+                src = LANG_CODES.get(lang, lang)
+                if not self._supports(src):
+                    translated.update({(lang, key): results[indexes[0]] for key, indexes in positions.items()})
+                    continue
+
+                # use cached translations
+                cached = self.cache.get_many(lang, positions.keys())
+                translated.update({(lang, key): value for key, value in cached.items()})
+
+                # send missing texts in batches
+                missing = [key for key in positions if key not in cached]
+                for i in range(0, len(missing), self.batch_size):
+                    keys = missing[i:i + self.batch_size]
+                    texts = [results[positions[key][0]] for key in keys]
+                    future = pool.submit(self._translate_batch, texts, src)
+                    jobs.append((lang, keys, future))
+
+            for lang, keys, future in jobs:
+                batch = dict(zip(keys, future.result()))
+                self.cache.put_many(lang, batch)
+                translated.update({(lang, key): value for key, value in batch.items()})
+
+        # assign translations to every duplicated text
+        for lang, positions in groups.items():
+            for key, indexes in positions.items():
+                for i in indexes:
+                    results[i] = translated[(lang, key)]
+
+        return results
@@ -0,0 +1,329 @@
+# Libraries
+import numpy as np
+import pandas as pd
+from sqlite_db import connect, in_queries
+from page_decoder import TWEET_COLUMNS, USER_COLUMNS, PLACE_COLUMNS
+
+# Tables of the store: name --> (primary key, columns). Tweets found
+# by several queries (or collected again) are stored once, with the
+# values of the last write (but query keeps the first query, every
+# query of a tweet is stored in tweet_queries).
+TABLES = {"tweets": ("tweet_id", TWEET_COLUMNS + ["query", "run_id", "collection_date"]),
+          "users": ("user_id", USER_COLUMNS + ["run_id", "collection_date"]),
+          "places": ("geo_place_id", PLACE_COLUMNS + ["run_id", "collection_date"])}
+
+# Columns used by the joins and the time range scans
+INDEXES = {"tweets": ["author_id", "ref_tweet_id", "geo_place_id", "created_at"]}
+
+# Timestamps are stored as UTC strings with a fixed width, so
+# they are sorted (and compared) in chronological order
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def _timestamp(value):
+    """
+    Function to format a date or timestamp as it is stored.
+
+    Inputs: A string, datetime or pandas timestamp (naive values are UTC).
+
+    Outputs: String.
+    """
+
+    value = pd.Timestamp(value)
+    value = value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")
+
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+def _time_range(start, end):
+    """
+    Function to get the conditions of a range of time on created_at.
+
+    Outputs: Tuple (list of conditions, list of parameters).
+    """
+
+    conditions, params = [], []
+
+    if start is not None:
+        conditions.append("t.created_at >= ?")
+        params.append(_timestamp(start))
+
+    if end is not None:
+        conditions.append("t.created_at < ?")
+        params.append(_timestamp(end))
+
+    return conditions, params
+
+
+class TweetStore:
+    """
+    Local store (SQLite) of the tweets, users and places collected,
+    with indexes on the columns used to join them, so tweets can be
+    joined to their authors and places (or scanned by date) without
+    loading every file into pandas.
+
+    e.g.
+        store = TweetStore("data/tweets.db")
+        store.write(tweets, users, places, run_id = today)
+        pdf = store.read_tweets(start = "2022-11-20", end = "2022-11-21", users = True)
+    """
+
+    def __init__(self, path = ":memory:"):
+
+        # readers do not block the collector (and the other way
+        # round), and commits do not wait for every fsync
+        self.path = path
+        self.conn = connect(path)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+
+        # bulk writes update several indexes (64MB of cache)
+        self.conn.execute("PRAGMA cache_size = -65536")
+
+        for table, (key, columns) in TABLES.items():
+            definition = ", ".join(f"{col} TEXT PRIMARY KEY" if col == key else
+                                   f"{col} INTEGER" if col == "possibly_sensitive" else f"{col} TEXT"
+                                   for col in columns)
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definition})")
+
+            for col in INDEXES.get(table, ()):
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_{col} ON {table} ({col})")
+
+        # queries that found each tweet
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS tweet_queries (
+                                 tweet_id TEXT NOT NULL,
+                                 query TEXT NOT NULL,
+                                 PRIMARY KEY (tweet_id, query))""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tweet_queries_query ON tweet_queries (query)")
+
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _upsert(self, table, pdf, **values):
+        """
+        Function to insert the rows of a dataframe or update them if their
+        key is already stored (without committing).
+
+        Inputs:
+            - table: Name of the table.
+            - pdf: Pandas dataframe. Missing columns are stored as nulls and
+                   extra columns are ignored.
+            - values: Values of columns that override the dataframe (e.g.
+                      run_id = "20221120_10_00").
+
+        Outputs: Number of rows written.
+        """
+
+        if pdf is None or pdf.empty:
+            return 0
+
+        key, columns = TABLES[table]
+        pdf = pdf.reindex(columns = columns)
+
+        for col, value in values.items():
+            if value is not None:
+                pdf[col] = value
+
+        if table == "tweets":
+            # numpy formats the timestamps much faster than strftime
+            # (same TIMESTAMP_FORMAT)
+            created_at = pd.to_datetime(pdf["created_at"], utc = True)
+            formatted = np.char.add(np.datetime_as_string(created_at.dt.tz_localize(None).values, unit = "us"), "Z")
+            pdf["created_at"] = pd.Series(formatted, index = pdf.index, dtype = object).where(created_at.notnull(), None)
+            pdf["possibly_sensitive"] = pdf["possibly_sensitive"].map({True: 1, False: 0, 1: 1, 0: 0})
+
+        # nulls (NaN, NaT) --> None
+        pdf = pdf.astype(object).where(pdf.notnull(), None)
+
+        # a key can be repeated in the same dataframe (e.g. users
+        # of several pages), rows are written in order. Nulls do
+        # not replace values already stored, and the query of a
+        # tweet is the first one that found it.
+        updates = ", ".join(f"{col} = COALESCE({col}, excluded.{col})" if col == "query" else
+                            f"{col} = COALESCE(excluded.{col}, {col})" for col in columns if col != key)
+        self.conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                              f"ON CONFLICT ({key}) DO UPDATE SET {updates}",
+                              pdf.itertuples(index = False, name = None))
+
+        if table == "tweets":
+            self.conn.executemany("INSERT OR IGNORE INTO tweet_queries VALUES (?, ?)",
+                                  [(tweet_id, query) for tweet_id, query in zip(pdf[key], pdf["query"])
+                                   if query is not None])
+
+        return pdf.shape[0]
+
+    def write(self, tweets = None, users = None, places = None, run_id = None, collection_date = None):
+        """
+        Function to store a batch of tweets, users and places (e.g. the pages
+        of a query) in a single transaction. Rows already stored are updated
+        (but their values are kept where the new rows are null).
+
+        Inputs:
+            - tweets: Pandas dataframe with tweets (TWEET_COLUMNS and query).
+            - users: Pandas dataframe with users (USER_COLUMNS).
+            - places: Pandas dataframe with places (PLACE_COLUMNS).
+            - run_id: ID of the collection run.
+            - collection_date: Date of the collection (string YYYY-MM-DD).
+
+        Outputs: Dictionary with the number of rows written per table.
+        """
+
+        values = {"run_id": run_id, "collection_date": collection_date}
+
+        with self.conn:
+            return {"tweets": self._upsert("tweets", tweets, **values),
+                    "users": self._upsert("users", users, **values),
+                    "places": self._upsert("places", places, **values)}
+
+    def _query(self, query, params = ()):
+        pdf = pd.read_sql_query(query, self.conn, params = list(params))
+
+        if "created_at" in pdf.columns:
+            pdf["created_at"] = pd.to_datetime(pdf["created_at"], utc = True)
+
+        return pdf
+
+    def _select_in(self, query, keys):
+        keys = list(dict.fromkeys(str(key) for key in keys))
+
+        return pd.concat([self._query(chunk_query, chunk) for chunk_query, chunk in in_queries(query, keys)],
+                         ignore_index = True)
+
+    def read_tweets(self, start = None, end = None, langs = None, users = False, places = False,
+                    columns = None):
+        """
+        Function to read the tweets created in a range of time (all of them
+        by default), joined to their authors and places if required. The
+        range is scanned with the created_at index.
+
+        Inputs:
+            - start: First date or timestamp (included).
+            - end: Last date or timestamp (excluded).
+            - langs: List of languages to read.
+            - users: Join the name, username and location of the author.
+            - places: Join the full_name, name and country of the place.
+            - columns: List of tweet columns to read (all by default).
+
+        Outputs: Pandas dataframe sorted by created_at.
+        """
+
+        columns = [f"t.{col}" for col in (columns or TABLES["tweets"][1])]
+        joins = []
+        conditions, params = _time_range(start, end)
+
+        if users:
+            columns += ["u.name AS user_name", "u.username", "u.location"]
+            joins.append("LEFT JOIN users u ON u.user_id = t.author_id")
+
+        if places:
+            columns += ["p.full_name AS place_full_name", "p.name AS place_name", "p.country AS place_country"]
+            joins.append("LEFT JOIN places p ON p.geo_place_id = t.geo_place_id")
+
+        if langs:
+            conditions.append(f"t.lang IN ({','.join('?' * len(langs))})")
+            params += list(langs)
+
+        query = f"SELECT {', '.join(columns)} FROM tweets t {' '.join(joins)}"
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+
+        return self._query(query + " ORDER BY t.created_at", params)
+
+    def get_tweets(self, tweet_ids):
+        """
+        Function to get tweets by id.
+
+        Inputs: Iterable of tweet ids.
+
+        Outputs: Pandas dataframe (only ids found).
+        """
+
+        return self._select_in("SELECT * FROM tweets WHERE tweet_id IN ({})", tweet_ids)
+
+    def tweets_by_query(self, queries):
+        """
+        Function to get the tweets found by some queries.
+
+        Inputs: Iterable of queries.
+
+        Outputs: Pandas dataframe (a tweet found by several of the
+                 queries is returned once).
+        """
+
+        pdf = self._select_in("""SELECT * FROM tweets WHERE tweet_id IN
+                                     (SELECT tweet_id FROM tweet_queries WHERE query IN ({}))""", queries)
+
+        return pdf.drop_duplicates(subset = ["tweet_id"], ignore_index = True)
+
+    def queries(self, tweet_ids):
+        """
+        Function to get every query that found some tweets.
+
+        Inputs: Iterable of tweet ids.
+
+        Outputs: Pandas dataframe with the columns tweet_id and query.
+        """
+
+        return self._select_in("SELECT tweet_id, query FROM tweet_queries WHERE tweet_id IN ({})", tweet_ids)
+
+    def tweets_by_author(self, author_ids):
+        """
+        Function to get the tweets of some users.
+
+        Inputs: Iterable of user ids.
+
+        Outputs: Pandas dataframe.
+        """
+
+        return self._select_in("SELECT * FROM tweets WHERE author_id IN ({})", author_ids)
+
+    def referencing(self, tweet_ids):
+        """
+        Function to get the tweets that retweeted, quoted or replied to
+        some tweets.
+
+        Inputs: Iterable of referenced tweet ids.
+
+        Outputs: Pandas dataframe.
+        """
+
+        return self._select_in("SELECT * FROM tweets WHERE ref_tweet_id IN ({})", tweet_ids)
+
+    def locations(self, start = None, end = None):
+        """
+        Function to count tweets by the location of their authors in a range
+        of time.
+
+        Inputs:
+            - start: First date or timestamp (included).
+            - end: Last date or timestamp (excluded).
+
+        Outputs: Pandas dataframe with the columns location and tweets
+                 (sorted by number of tweets).
+        """
+
+        conditions, params = _time_range(start, end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        return self._query(f"""SELECT u.location, COUNT(*) AS tweets
+                               FROM tweets t JOIN users u ON u.user_id = t.author_id
+                               {where}
+                               GROUP BY u.location
+                               ORDER BY tweets DESC""", params)
+
+    def counts(self):
+        """
+        Function to count the rows of every table.
+
+        Outputs: Dictionary table --> number of rows.
+        """
+
+        return {table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+
+    def close(self):
+        self.conn.close()
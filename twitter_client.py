@@ -0,0 +1,368 @@
+# Libraries
+import os
+import time
+import asyncio
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from page_decoder import loads
+from instrumentation import current_report
+from concurrent.futures import ThreadPoolExecutor
+
+# end point
+SEARCH_URL = "https://api.twitter.com/2/tweets/search/recent"
+
+
+class TwitterAPIError(Exception):
+    """
+    Error returned by the Twitter API (the request was not successful
+    even after retrying it).
+    """
+
+    def __init__(self, status_code, text):
+        super().__init__(status_code, text)
+        self.status_code = status_code
+        self.text = text
+
+
+def search_params(query, next_token = None):
+    """
+    Function to build the parameters of a search request.
+
+    Inputs:
+        - query: A string that will be used to find tweets.
+                 Tweets must match this string to be returned.
+        - next_token: ID of the next page that matches the specified query.
+
+    Outputs: Dictionary with the request parameters.
+    """
+
+    return {
+        # tweets must match this string
+        'query': query,
+
+        # select specific Tweet fields from each returned Tweet object
+        'tweet.fields': 'text,created_at,lang,possibly_sensitive', # public_metrics
+
+        # maximum number of search results to be returned (10 - 100)
+        'max_results': 100,
+
+        # additional data that relate to the originally returned Tweets
+        'expansions': 'author_id,referenced_tweets.id,geo.place_id',
+
+        # select specific place fields
+        "place.fields": 'country,full_name,name',
+
+        # select specific user fields
+        "user.fields": 'location',
+
+        # get the next page of results.
+        "next_token": next_token,
+    }
+
+
+class RateLimiter:
+    """
+    Rate budget shared by every request of one or several clients. The
+    budget is updated with the x-rate-limit-remaining and
+    x-rate-limit-reset headers returned by the API, and requests wait
+    until the window is reset once the budget is exhausted.
+    """
+
+    def __init__(self, clock = time.time, sleep = time.sleep):
+
+        # requests left in the current window (None = unknown)
+        self.remaining = None
+
+        # epoch seconds when the window will be reset
+        self.reset = None
+
+        # requests reserved that have not been answered yet. The
+        # remaining budget returned by the API does not count them
+        # (e.g. many concurrent queries), so they are subtracted.
+        self.in_flight = 0
+
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """
+        Function to try to reserve a request of the budget.
+
+        Outputs: None if the request was reserved, otherwise the seconds
+                 to wait until the window is reset.
+        """
+
+        with self._lock:
+            while True:
+                if self.remaining is None or self.remaining > 0:
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    self.in_flight += 1
+                    return None
+
+                delay = self.reset - self.clock() if self.reset is not None else 0
+
+                # the window has been reset, so the budget is unknown again
+                if delay <= 0:
+                    self.remaining = None
+                    continue
+
+                return delay
+
+    def acquire(self):
+        """
+        Function to reserve a request of the budget. It blocks while the
+        budget is exhausted.
+
+        Outputs: Seconds waited.
+        """
+
+        waited = 0.0
+
+        while True:
+            delay = self._reserve()
+            if delay is None:
+                return waited
+
+            self.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self):
+        """
+        Function to reserve a request of the budget from a coroutine. It
+        waits (without blocking the event loop) while the budget is
+        exhausted.
+
+        Outputs: Seconds waited.
+        """
+
+        waited = 0.0
+
+        while True:
+            delay = self._reserve()
+            if delay is None:
+                return waited
+
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def update(self, headers):
+        """
+        Function to update the budget with the headers of a response
+        (every reserved request must be answered by update or release).
+        """
+
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+
+            if "x-rate-limit-remaining" in headers:
+                self.remaining = max(int(headers["x-rate-limit-remaining"]) - self.in_flight, 0)
+
+            if "x-rate-limit-reset" in headers:
+                self.reset = float(headers["x-rate-limit-reset"])
+
+    def release(self):
+        """
+        Function to release a reserved request that was not answered
+        (e.g. connection errors).
+        """
+
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+
+    def exhaust(self, reset = None):
+        """
+        Function to mark the budget as exhausted (e.g. after a 429
+        response) until the given reset time.
+        """
+
+        with self._lock:
+            self.remaining = 0
+            if reset is not None:
+                self.reset = float(reset)
+
+
+class TwitterClient:
+    """
+    Client to request the Twitter API. It keeps a persistent session
+    (keep-alive connection pooling), waits according to the rate limit
+    headers, retries 429 and 5xx responses with exponential backoff and
+    records the latency and wait time of every request.
+    """
+
+    def __init__(self, bearer_token = None, url = SEARCH_URL, rate_limiter = None,
+                 max_retries = 5, backoff = 1.0, pool_size = 10, timeout = 30):
+
+        # Security token from Twitter API. If not defined,
+        # it is read from the environment variables.
+        if bearer_token is None:
+            bearer_token = os.environ.get('bearer_token')
+
+        self.url = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+
+        # the same budget can be shared by several clients
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+
+        # persistent session
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": "Bearer {}".format(bearer_token)})
+        adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # one record per request
+        self.metrics = []
+        self._lock = threading.Lock()
+
+    def _record(self, **metric):
+        with self._lock:
+            self.metrics.append(metric)
+
+    def search(self, query, next_token = None):
+        """
+        Function to request tweets according to a specific query.
+
+        Inputs:
+            - query: A string that will be used to find tweets.
+            - next_token: ID of the next page that matches the specified query.
+
+        Outputs: Dictionary (json type) with the requested data.
+        """
+
+        params = search_params(query, next_token)
+
+        for attempt in range(self.max_retries + 1):
+
+            # wait if the rate budget is exhausted
+            wait = self.rate_limiter.acquire()
+
+            start = time.perf_counter()
+            try:
+                response = self.session.get(self.url, params = params, timeout = self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self.rate_limiter.release()
+                self._record(query = query, status = None, latency = time.perf_counter() - start,
+                             wait = wait, attempt = attempt, bytes = 0)
+                if attempt == self.max_retries:
+                    raise
+                self.rate_limiter.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            page, delay = self._handle_response(query, response.status_code, response.headers, response.content,
+                                                time.perf_counter() - start, wait, attempt)
+            if page is not None:
+                return page
+
+            if delay:
+                self.rate_limiter.sleep(delay)
+
+    def _handle_response(self, query, status, headers, content, latency, wait, attempt):
+        """
+        Function to record a response and decide what to do next (it is
+        shared by the sync and async clients).
+
+        Inputs:
+            - query: Query of the request.
+            - status: HTTP status code.
+            - headers: Response headers.
+            - content: Response body (bytes).
+            - latency: Seconds taken by the request.
+            - wait: Seconds waited for the rate limit.
+            - attempt: Number of the attempt (0 = first one).
+
+        Outputs: Tuple (page, delay). page is the decoded json if the
+                 request was successful (None otherwise) and delay the
+                 seconds to wait before retrying it.
+        """
+
+        self._record(query = query, status = status, latency = latency,
+                     wait = wait, attempt = attempt, bytes = len(content))
+
+        # time spent in the request and waiting for the rate limit
+        report = current_report()
+        report.add("http", latency, bytes = len(content))
+        if wait:
+            report.add("http.rate_limit_wait", wait)
+        self.rate_limiter.update(headers)
+
+        # verify successfull request
+        if status == 200:
+            return loads(content), 0
+
+        retry = status == 429 or status >= 500
+        if not retry or attempt == self.max_retries:
+            raise TwitterAPIError(status, content.decode("utf-8", "replace"))
+
+        # Too many requests: wait until the window is reset
+        # (if the api told us when), otherwise backoff
+        if status == 429 and "x-rate-limit-reset" in headers:
+            self.rate_limiter.exhaust(headers["x-rate-limit-reset"])
+            return None, 0
+
+        return None, self.backoff * 2 ** attempt
+
+    def metrics_summary(self):
+        """
+        Function to summarize the metrics of the requests.
+
+        Outputs: Dictionary with the number of requests, errors, bytes
+                 fetched, mean/max latency and total wait time (seconds).
+        """
+
+        with self._lock:
+            metrics = list(self.metrics)
+
+        latencies = sorted(metric["latency"] for metric in metrics)
+
+        return {"requests": len(metrics),
+                "errors": sum(metric["status"] != 200 for metric in metrics),
+                "bytes": sum(metric["bytes"] for metric in metrics),
+                "mean_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+                "p95_latency": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+                "max_latency": latencies[-1] if latencies else 0.0,
+                "total_wait": sum(metric["wait"] for metric in metrics)}
+
+    def close(self):
+        self.session.close()
+
+
+def run_queries(queries, handle_page, client = None, max_pages = 41, max_workers = 4):
+    """
+    Function to collect several queries concurrently. Every query is
+    paginated in its own thread, but all of them share the client
+    (and therefore the connection pool and the rate budget).
+
+    Inputs:
+        - queries: List of strings that will be used to find tweets.
+        - handle_page: Function called with (query, tweets, users, places)
+                       for each page. Calls are serialized, so it does not
+                       need to be thread safe.
+        - client: TwitterClient object (a new one by default).
+        - max_pages: Maximum number of pages per query.
+        - max_workers: Maximum number of queries requested at the same time.
+
+    Outputs: Dictionary with the number of pages collected per query.
+    """
+
+    from collector import iter_pages
+
+    client = client if client is not None else TwitterClient()
+    lock = threading.Lock()
+
+    def collect(query):
+        pages = 0
+        for tweets, users, places in iter_pages(query, max_pages = max_pages, fetch = client.search):
+            with lock:
+                handle_page(query, tweets, users, places)
+            pages += 1
+
+        return pages
+
+    with ThreadPoolExecutor(max_workers = max_workers) as pool:
+        return dict(zip(queries, pool.map(collect, queries)))
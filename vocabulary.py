@@ -0,0 +1,188 @@
+# Libraries
+import os
+import sys
+import json
+import numpy as np
+import scipy.sparse
+
+
+class Vocabulary:
+    """
+    Shared token <--> integer id mapping. Every token is stored once
+    (interned), so rows only keep integer ids instead of their own
+    string objects. The mapping has the same shape as the vocabulary_
+    of scikit-learn vectorizers (token --> column).
+    """
+
+    def __init__(self, tokens = None):
+
+        # token --> id and id --> token
+        self.ids = {}
+        self.tokens = []
+
+        for token in tokens or []:
+            self.add(token)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __contains__(self, token):
+        return token in self.ids
+
+    def __getitem__(self, token_id):
+        return self.tokens[token_id]
+
+    def add(self, token):
+        """
+        Function to get the id of a token. New tokens get the next id.
+
+        Inputs: A string.
+
+        Outputs: Integer id of the token.
+        """
+
+        try:
+            return self.ids[token]
+        except KeyError:
+            token = sys.intern(token)
+            token_id = self.ids[token] = len(self.tokens)
+            self.tokens.append(token)
+            return token_id
+
+    def save(self, path):
+        """
+        Function to store the vocabulary in a json file (the tokens in
+        order of their ids), so later runs give the same ids to the
+        same tokens. The file is replaced atomically.
+        """
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.tokens, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Function to load a vocabulary stored with save.
+        """
+
+        with open(path) as f:
+            return cls(json.load(f))
+
+
+class SparseTokens:
+    """
+    Integer encoded tokens of a set of rows in CSR layout: the ids of
+    the tokens of row i are indices[indptr[i]:indptr[i + 1]] (in the
+    order of the first occurrence) and counts has the number of times
+    each of them appears in the row. It is a bag-of-words matrix of
+    rows x vocabulary size.
+    """
+
+    def __init__(self, indptr, indices, counts, vocabulary, ids = None):
+        self.indptr = indptr
+        self.indices = indices
+        self.counts = counts
+        self.vocabulary = vocabulary
+
+        # id of each row (e.g. tweet_id), optional
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def row(self, i):
+        """
+        Function to get the tokens of a row back (without repetitions).
+        """
+
+        return [self.vocabulary[token_id] for token_id in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def to_scipy(self, n_features = None):
+        """
+        Function to get the bag-of-words matrix.
+
+        Inputs:
+            - n_features: Number of columns (size of the vocabulary by
+                          default). A larger value is needed to stack
+                          matrices encoded with a growing vocabulary.
+
+        Outputs: scipy.sparse.csr_matrix of rows x n_features.
+        """
+
+        n_features = n_features if n_features is not None else len(self.vocabulary)
+
+        return scipy.sparse.csr_matrix((self.counts, self.indices, self.indptr),
+                                       shape = (len(self), n_features))
+
+    def save(self, path):
+        """
+        Function to store the matrix, the vocabulary and the row ids in a
+        .npz file. The file can also be read with scipy.sparse.load_npz.
+        """
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        arrays = {"format": np.array("csr"), "shape": np.array([len(self), len(self.vocabulary)]),
+                  "data": self.counts, "indices": self.indices, "indptr": self.indptr,
+                  "vocabulary": np.array(self.vocabulary.tokens, dtype = str)}
+
+        if self.ids is not None:
+            arrays["ids"] = np.array(self.ids, dtype = str)
+
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Function to load a file stored with save.
+        """
+
+        with np.load(path) as loaded:
+            vocabulary = Vocabulary(loaded["vocabulary"].tolist())
+            ids = loaded["ids"].tolist() if "ids" in loaded else None
+
+            return cls(loaded["indptr"], loaded["indices"], loaded["data"], vocabulary, ids = ids)
+
+
+def encode_tokens(tokens, vocabulary = None, ids = None):
+    """
+    Function to encode lists of tokens as integer ids.
+
+    Inputs:
+        - tokens: Iterable (e.g. the clean_tweet column) with the list of
+                  tokens of each row. Null values are empty rows.
+        - vocabulary: Vocabulary to use. New tokens are added to it, so
+                      several calls (e.g. chunks) share the same ids.
+        - ids: Id of each row (optional).
+
+    Outputs: SparseTokens object.
+    """
+
+    vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+    add = vocabulary.add
+
+    indptr = [0]
+    indices = []
+    counts = []
+
+    for words in tokens:
+        # id --> count (in the order of the first occurrence)
+        row = {}
+        if isinstance(words, (list, tuple)):
+            for word in words:
+                token_id = add(word)
+                row[token_id] = row.get(token_id, 0) + 1
+
+        indices.extend(row.keys())
+        counts.extend(row.values())
+        indptr.append(len(indices))
+
+    return SparseTokens(np.array(indptr, dtype = np.int64), np.array(indices, dtype = np.int32),
+                        np.array(counts, dtype = np.int32), vocabulary,
+                        ids = list(ids) if ids is not None else None)